@@ -1,30 +1,46 @@
 # -*- coding: utf-8 -*-
 
-import yfinance as yf
-import pandas as pd
-import requests
-import time
 import sys
 from datetime import datetime
 
+import pandas as pd
+
+import clock
+from indicator_cache import indicator_cache
+from indicators import BollingerBank, IncrementalRSI
+from latency import format_summary, latency
+from market_data import iter_bars
+import metrics
+from notifier import BarkDispatcher
+from scheduler import BarChangeTracker, PriorityPoller, sleep_until_next_bar
+from state_store import state_path, save_snapshot, load_snapshot, restore_ticker_states
+from tse_calendar import is_market_open, sleep_until_open, tse
+from watchlists import TSE_WATCH_LIST
+
 # ================= CONFIGURATION =================
 
 # Watchlist: Tokyo Stock Exchange stocks
-WATCH_LIST = [
-    "6723.T", "9432.T", "7011.T", "7203.T", "8058.T", "8306.T", "9501.T", "285A.T", 
-    "6758.T", "9434.T", "2760.T", "9984.T", "8035.T", "9503.T", "4324.T", "9433.T", 
-    "7272.T", "6367.T", "6146.T", "6269.T", "6501.T", "8316.T", "5706.T", "5016.T", 
-    "7974.T", "7013.T", "4063.T", "4502.T", "6762.T", "6361.T", "6503.T", "8053.T", 
-    "7267.T", "6981.T", "6702.T", "8002.T", "4568.T", "9502.T", "1911.T", "5802.T"
-]
+WATCH_LIST = TSE_WATCH_LIST
 BARK_KEY = "****************"
-CHECK_INTERVAL = 120
+CHECK_INTERVAL = 120  # Poll the forming daily bar on 120-second clock boundaries
+SETTLE_SECONDS = 5    # Delay after each boundary before fetching
+BAR_PERIOD = "3mo"    # History window downloaded per scan
+BAR_INTERVAL = "1d"   # Daily candles
+STATE_FILE = state_path("three_tracks")  # Snapshot for warm restarts
 
 # Three Track Parameters
 BOLL_PERIOD = 20      # Bollinger Bands period
 BOLL_STD = 2          # Standard deviation multiplier
 RSI_PERIOD = 14       # RSI period
 RSI_OVERSOLD = 30     # RSI oversold threshold
+RSI_SMOOTHING = "sma" # "sma" reproduces calculate_rsi over the download window exactly, "wilder" for Wilder smoothing
+TOUCH_TIMEOUT_DAYS = 10     # S1 resets if RSI hasn't reversed this many days after the touch
+REVERSAL_TIMEOUT_DAYS = 15  # S2 resets if MACD hasn't confirmed this many days after the reversal
+SIGNAL_RESET_DAYS = 5       # S3 resets this many days after the alert
+
+# Priority polling: tickers that cannot change stage before tomorrow are fetched every FAR_POLL_EVERY scans
+PRIORITY_POLLING = True
+FAR_POLL_EVERY = 3    # Scan cycles between polls of S3 tickers and S1 tickers that cannot reverse today
 
 # State machine for each ticker
 ticker_states = {
@@ -37,34 +53,46 @@ ticker_states = {
     } for ticker in WATCH_LIST
 }
 
+# Rolling Bollinger bands for the whole watchlist (one column per ticker), O(1) per bar
+bollinger = BollingerBank(WATCH_LIST, BOLL_PERIOD, BOLL_STD)
+
+# Streaming RSI per ticker: the forming daily bar is revised in O(1) each poll, and the
+# window is replayed once a day when its first bar moves (values match calculate_rsi exactly)
+rsi_engines = {ticker: IncrementalRSI(RSI_PERIOD, mode=RSI_SMOOTHING, history=10, anchored=True)
+               for ticker in WATCH_LIST}
+
+# Latest daily bar seen per ticker (unchanged bars are not re-evaluated)
+bar_tracker = BarChangeTracker()
+
 # =================================================
 
-def is_market_open():
-    """Check if Tokyo Stock Exchange is currently open."""
-    now = datetime.now()
-    if now.weekday() >= 5:
-        return False, "Weekend"
-    
-    current_time = now.strftime("%H:%M")
-    if "09:00" <= current_time <= "11:30": 
-        return True, "Morning_Session"
-    if "11:30" < current_time < "12:30": 
-        return False, "Lunch_Break"
-    if "12:30" <= current_time <= "15:30": 
-        return True, "Afternoon_Session"
-    
-    return False, "Market_Closed"
+def restore_state():
+    """
+    Reload stages, touch/alert dates, stage history, Bollinger and RSI engines
+    from the last snapshot.
+    Returns: number of tickers restored
+    """
+    global bollinger
+    snapshot = load_snapshot(STATE_FILE)
+    restored = restore_ticker_states(ticker_states, snapshot.get("ticker_states"))
+    for ticker, engine in snapshot.get("rsi_engines", {}).items():
+        if ticker in rsi_engines and (engine.period, engine.mode, getattr(engine, "anchored", False)) == (
+                RSI_PERIOD, RSI_SMOOTHING, True):
+            rsi_engines[ticker] = engine
+    saved_bands = snapshot.get("bollinger")
+    if saved_bands is not None and (saved_bands.tickers, saved_bands.period, saved_bands.num_std) == (
+            bollinger.tickers, bollinger.period, bollinger.num_std):
+        bollinger = saved_bands
+    return restored
 
-def calculate_rsi(series, period=14):
-    """Calculate RSI indicator"""
-    delta = series.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
+def persist_state():
+    """Atomically snapshot the state machine after a scan."""
+    try:
+        save_snapshot(STATE_FILE, ticker_states=ticker_states, rsi_engines=rsi_engines, bollinger=bollinger)
+    except Exception as e:
+        print(f"  State_Save_Failed_{type(e).__name__}_{str(e)[:60]}")
 
-def track1_touch_lower_band(df):
+def track1_touch_lower_band(ticker, df):
     """
     Track 1: Touch Bollinger Lower Band
     Check if price pierces -2sigma lower band (oversold warning)
@@ -72,17 +100,14 @@ def track1_touch_lower_band(df):
     Returns: (is_touched, price, lower_band, status_text)
     """
     try:
-        close = df['Close'].iloc[:, 0] if isinstance(df['Close'], pd.DataFrame) else df['Close']
-        low = df['Low'].iloc[:, 0] if isinstance(df['Low'], pd.DataFrame) else df['Low']
+        close = indicator_cache.column(ticker, df, 'Close')
+        low = indicator_cache.column(ticker, df, 'Low')
         
-        # Calculate Bollinger Bands
-        sma = close.rolling(window=BOLL_PERIOD).mean()
-        std = close.rolling(window=BOLL_PERIOD).std()
-        lower_band = sma - (BOLL_STD * std)
+        # Update Bollinger Bands incrementally (only new bars and the forming bar are fed)
+        _, _, current_lower = bollinger.sync(ticker, close)
         
         current_price = float(close.iloc[-1])
         current_low = float(low.iloc[-1])
-        current_lower = float(lower_band.iloc[-1])
         
         # Check if price touched or pierced lower band
         is_touched = current_low <= current_lower
@@ -99,7 +124,7 @@ def track1_touch_lower_band(df):
     except Exception as e:
         return False, 0, 0, f"Error_{str(e)[:30]}"
 
-def track2_rsi_reversal(df):
+def track2_rsi_reversal(ticker, df):
     """
     Track 2: RSI Momentum Reversal
     Check if RSI breaks above 30 from oversold zone (<30)
@@ -107,10 +132,10 @@ def track2_rsi_reversal(df):
     Returns: (is_reversed, current_rsi, rsi_min, status_text)
     """
     try:
-        close = df['Close'].iloc[:, 0] if isinstance(df['Close'], pd.DataFrame) else df['Close']
-        
-        # Calculate RSI
-        rsi = calculate_rsi(close, RSI_PERIOD)
+        # Update RSI incrementally (only new bars and the forming bar are fed)
+        engine = rsi_engines[ticker]
+        engine.sync(indicator_cache.column(ticker, df, 'Close'))
+        rsi = pd.Series(engine.history)
         
         current_rsi = float(rsi.iloc[-1])
         prev_rsi = float(rsi.iloc[-2])
@@ -136,7 +161,7 @@ def track2_rsi_reversal(df):
     except Exception as e:
         return False, 0, 0, f"Error_{str(e)[:30]}"
 
-def track3_macd_golden_cross(df):
+def track3_macd_golden_cross(ticker, df):
     """
     Track 3: MACD Golden Cross
     Check if MACD shows golden cross and histogram turning red (positive)
@@ -144,13 +169,8 @@ def track3_macd_golden_cross(df):
     Returns: (is_golden_cross, dif, dea, histogram, status_text)
     """
     try:
-        close = df['Close'].iloc[:, 0] if isinstance(df['Close'], pd.DataFrame) else df['Close']
-        
-        # Calculate MACD
-        ema12 = close.ewm(span=12, adjust=False).mean()
-        ema26 = close.ewm(span=26, adjust=False).mean()
-        dif = ema12 - ema26
-        dea = dif.ewm(span=9, adjust=False).mean()
+        # Calculate MACD (memoized per bar)
+        dif, dea = indicator_cache.macd(ticker, df)
         histogram = dif - dea
         
         current_dif = float(dif.iloc[-1])
@@ -184,7 +204,115 @@ def track3_macd_golden_cross(df):
     except Exception as e:
         return False, 0, 0, 0, f"Error_{str(e)[:30]}"
 
-def analyze_three_tracks(ticker):
+def advance_state(state, today, touched, reversed, rsi, confirmed, detail="",
+                  touch_timeout=None, reversal_timeout=None, reset_days=None):
+    """
+    Advance one ticker's Three-Track state machine by one bar.
+    Shared by the live scanner (analyze_three_tracks) and the backtest,
+    which replays history with `today` set to each bar's date.
+    
+    Args:
+        state: the ticker's entry in ticker_states (mutated in place)
+        today: date of the bar being evaluated
+        touched, reversed, rsi, confirmed: track results for this bar
+        detail: track status text appended to the status line
+        touch_timeout, reversal_timeout, reset_days: timeouts in days
+            (default TOUCH_TIMEOUT_DAYS, REVERSAL_TIMEOUT_DAYS, SIGNAL_RESET_DAYS)
+    Returns: (stage, status_text, should_alert)
+    """
+    if touch_timeout is None:
+        touch_timeout = TOUCH_TIMEOUT_DAYS
+    if reversal_timeout is None:
+        reversal_timeout = REVERSAL_TIMEOUT_DAYS
+    if reset_days is None:
+        reset_days = SIGNAL_RESET_DAYS
+    
+    current_stage = state["stage"]
+    
+    # ========== STATE MACHINE LOGIC ==========
+    
+    # Stage 0 -> Stage 1: Touch lower band
+    if current_stage == 0:
+        if touched:
+            state["stage"] = 1
+            state["touch_date"] = today
+            state["rsi_min"] = rsi
+            state["stage_history"].append(f"S1_{today}")
+            status = f"S1_Touched | {detail}"
+            return 1, status, False
+        else:
+            status = f"S0_Waiting | {detail}"
+            return 0, status, False
+    
+    # Stage 1 -> Stage 2: RSI reversal (break above 30)
+    elif current_stage == 1:
+        # Track minimum RSI while in stage 1
+        if rsi < state["rsi_min"]:
+            state["rsi_min"] = rsi
+        
+        # Check for reversal
+        if reversed:
+            state["stage"] = 2
+            state["stage_history"].append(f"S2_{today}")
+            status = f"S2_Reversed | {detail}"
+            return 2, status, False
+        
+        # Timeout: if more than touch_timeout days since touch and no reversal, reset
+        if state["touch_date"] and (today - state["touch_date"]).days > touch_timeout:
+            state["stage"] = 0
+            state["rsi_min"] = 100
+            state["stage_history"].clear()
+            status = f"S0_Reset_Timeout | {detail}"
+            return 0, status, False
+        
+        status = f"S1_WaitRSI | {detail}"
+        return 1, status, False
+    
+    # Stage 2 -> Stage 3: MACD golden cross
+    elif current_stage == 2:
+        if confirmed:
+            state["stage"] = 3
+            state["stage_history"].append(f"S3_{today}")
+            
+            # Send alert only once per day
+            if state["alert_date"] != today:
+                state["alert_date"] = today
+                status = f"***S3_BUY_SIGNAL*** | {detail}"
+                return 3, status, True
+            else:
+                status = f"S3_Already_Alerted | {detail}"
+                return 3, status, False
+        
+        # Timeout: if more than reversal_timeout days since RSI reversal, reset
+        if len(state["stage_history"]) >= 2:
+            s2_date_str = state["stage_history"][-1].split("_")[1]
+            s2_date = datetime.strptime(s2_date_str, "%Y-%m-%d").date()
+            if (today - s2_date).days > reversal_timeout:
+                state["stage"] = 0
+                state["rsi_min"] = 100
+                state["stage_history"].clear()
+                status = f"S0_Reset_Timeout | {detail}"
+                return 0, status, False
+        
+        status = f"S2_WaitMACD | {detail}"
+        return 2, status, False
+    
+    # Stage 3: Monitor position (can add exit logic here)
+    elif current_stage == 3:
+        # Auto reset after reset_days days to look for next opportunity
+        if state["alert_date"] and (today - state["alert_date"]).days > reset_days:
+            state["stage"] = 0
+            state["rsi_min"] = 100
+            state["stage_history"].clear()
+            status = f"S0_Reset_NewCycle | {detail}"
+            return 0, status, False
+        
+        status = f"S3_InPosition | {detail}"
+        return 3, status, False
+    
+    return 0, "Unknown_Stage", False
+
+def analyze_three_tracks(ticker, df):
     """
     Main Three-Track Strategy State Machine
     
@@ -193,112 +321,93 @@ def analyze_three_tracks(ticker):
     Stage 2 (Reversed): RSI reversed, waiting for MACD golden cross
     Stage 3 (Confirmed): All three tracks aligned -> BUY SIGNAL!
     
+    Args:
+        ticker: ticker symbol
+        df: daily OHLCV frame for this ticker (from the batched download)
     Returns: (stage, status_text, should_alert)
     """
     global ticker_states
     
     try:
-        # Download daily data (for more stable signals)
-        df = yf.download(ticker, period="3mo", interval="1d", progress=False, auto_adjust=True)
-        
         if df.empty or len(df) < 50:
             return 0, "Insufficient_Data", False
         
         state = ticker_states[ticker]
-        today = datetime.now().date()
-        current_stage = state["stage"]
+        today = clock.now().date()
         
         # Analyze all three tracks
-        touched, price, lower_band, track1_status = track1_touch_lower_band(df)
-        reversed, rsi, rsi_min, track2_status = track2_rsi_reversal(df)
-        confirmed, dif, dea, hist, track3_status = track3_macd_golden_cross(df)
+        with latency.span("indicator", ticker):
+            touched, price, lower_band, track1_status = track1_touch_lower_band(ticker, df)
+            reversed, rsi, rsi_min, track2_status = track2_rsi_reversal(ticker, df)
+            confirmed, dif, dea, hist, track3_status = track3_macd_golden_cross(ticker, df)
         
         # ========== STATE MACHINE LOGIC ==========
-        
-        # Stage 0 -> Stage 1: Touch lower band
-        if current_stage == 0:
-            if touched:
-                state["stage"] = 1
-                state["touch_date"] = today
-                state["rsi_min"] = rsi
-                state["stage_history"].append(f"S1_{today}")
-                status = f"S1_Touched | {track1_status} | {track2_status} | {track3_status}"
-                return 1, status, False
-            else:
-                status = f"S0_Waiting | {track1_status} | {track2_status} | {track3_status}"
-                return 0, status, False
-        
-        # Stage 1 -> Stage 2: RSI reversal (break above 30)
-        elif current_stage == 1:
-            # Track minimum RSI while in stage 1
-            if rsi < state["rsi_min"]:
-                state["rsi_min"] = rsi
-            
-            # Check for reversal
-            if reversed:
-                state["stage"] = 2
-                state["stage_history"].append(f"S2_{today}")
-                status = f"S2_Reversed | {track1_status} | {track2_status} | {track3_status}"
-                return 2, status, False
-            
-            # Timeout: if more than 10 days since touch and no reversal, reset
-            if state["touch_date"] and (today - state["touch_date"]).days > 10:
-                state["stage"] = 0
-                state["rsi_min"] = 100
-                state["stage_history"].clear()
-                status = f"S0_Reset_Timeout | {track1_status} | {track2_status} | {track3_status}"
-                return 0, status, False
-            
-            status = f"S1_WaitRSI | {track1_status} | {track2_status} | {track3_status}"
-            return 1, status, False
-        
-        # Stage 2 -> Stage 3: MACD golden cross
-        elif current_stage == 2:
-            if confirmed:
-                state["stage"] = 3
-                state["stage_history"].append(f"S3_{today}")
-                
-                # Send alert only once per day
-                if state["alert_date"] != today:
-                    state["alert_date"] = today
-                    status = f"***S3_BUY_SIGNAL*** | {track1_status} | {track2_status} | {track3_status}"
-                    return 3, status, True
-                else:
-                    status = f"S3_Already_Alerted | {track1_status} | {track2_status} | {track3_status}"
-                    return 3, status, False
-            
-            # Timeout: if more than 15 days since RSI reversal, reset
-            if len(state["stage_history"]) >= 2:
-                s2_date_str = state["stage_history"][-1].split("_")[1]
-                s2_date = datetime.strptime(s2_date_str, "%Y-%m-%d").date()
-                if (today - s2_date).days > 15:
-                    state["stage"] = 0
-                    state["rsi_min"] = 100
-                    state["stage_history"].clear()
-                    status = f"S0_Reset_Timeout | {track1_status} | {track2_status} | {track3_status}"
-                    return 0, status, False
-            
-            status = f"S2_WaitMACD | {track1_status} | {track2_status} | {track3_status}"
-            return 2, status, False
-        
-        # Stage 3: Monitor position (can add exit logic here)
-        elif current_stage == 3:
-            # Auto reset after 5 days to look for next opportunity
-            if state["alert_date"] and (today - state["alert_date"]).days > 5:
-                state["stage"] = 0
-                state["rsi_min"] = 100
-                state["stage_history"].clear()
-                status = f"S0_Reset_NewCycle | {track1_status} | {track2_status} | {track3_status}"
-                return 0, status, False
-            
-            status = f"S3_InPosition | {track1_status} | {track2_status} | {track3_status}"
-            return 3, status, False
-        
-        return 0, "Unknown_Stage", False
+        detail = f"{track1_status} | {track2_status} | {track3_status}"
+        with latency.span("state", ticker):
+            return advance_state(state, today, touched, reversed, rsi, confirmed, detail)
     
     except Exception as e:
         return 0, f"Critical_Error_{type(e).__name__}_{str(e)[:30]}", False
 
+def evaluate(ticker, df):
+    """
+    Evaluate one ticker's freshly fetched daily bars.
+    Shared by run_radar and the unified daemon (radar_daemon.py).
+    
+    Returns: (str: status_text, alert) where alert is (title, body) or None
+    """
+    if not bar_tracker.changed(ticker, df):
+        return f"[=] Unchanged_Bar | S{ticker_states[ticker]['stage']}", None
+    
+    stage, status_text, is_triggered = analyze_three_tracks(ticker, df)
+    
+    # Display with stage indicator
+    if stage == 3:
+        prefix = "[***]"
+    elif stage == 2:
+        prefix = "[>>]"
+    elif stage == 1:
+        prefix = "[!]"
+    else:
+        prefix = "[ ]"
+    
+    alert = None
+    if is_triggered:
+        bark_msg = f"{ticker}_Three_Track_Buy_Signal"
+        detail = f"Bollinger_Touch->RSI_Reversal->MACD_GoldenCross"
+        alert = (bark_msg, detail)
+    
+    return f"{prefix} {status_text}", alert
+
+def poll_every(ticker):
+    """
+    Scan cycles a ticker can wait before its next poll.
+
+    Every ticker is polled on the first scan of each session and on the
+    closing scan (the run loops call PriorityPoller.poll_all), so
+    day-based resets and the previous bar's RSI are always current and
+    the final daily bar is always seen. Between those:
+    - S2 is one MACD confirmation away from the alert: every cycle.
+    - S1 can only reverse if the previous bar's RSI was below
+      RSI_OVERSOLD, which stays fixed for the day: every cycle if so,
+      otherwise it cannot move to S2 before tomorrow's first scan.
+    - S0 can touch the lower band on any intraday low: every cycle.
+    - S3 (already alerted) only resets SIGNAL_RESET_DAYS days after the
+      alert: every FAR_POLL_EVERY cycles.
+
+    Only tickers whose stage cannot change before tomorrow's first scan
+    are deferred, so no stage transition or alert is ever delayed.
+    """
+    if not PRIORITY_POLLING:
+        return 1
+    stage = ticker_states[ticker]["stage"]
+    if stage in (0, 2):
+        return 1
+    history = rsi_engines[ticker].history
+    if stage == 1 and (len(history) < 2 or not history[-2] >= RSI_OVERSOLD):
+        return 1
+    return FAR_POLL_EVERY
+
 def run_radar():
     """Main monitoring loop"""
     print("=" * 100)
@@ -312,62 +421,89 @@ def run_radar():
     print("  S3: MACD golden cross -> *** BUY SIGNAL ***")
     print("=" * 100)
     
-    while True:
-        open_status, status_msg = is_market_open()
-        current_time_str = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        if not open_status:
-            sys.stdout.write(f"\r[{current_time_str}] {status_msg}... Sleeping ")
-            sys.stdout.flush()
-            time.sleep(600)
-            continue
-        
-        print(f"\n[{current_time_str}] {status_msg} - Scanning Watchlist...")
-        print("-" * 100)
-        
-        # Track alerts
-        alert_list = []
-        
-        # Scan each ticker
-        for ticker in WATCH_LIST:
-            sys.stdout.write(f"  {ticker:8s} | ")
-            sys.stdout.flush()
+    # Warm restart: keep in-progress setups and alert dates
+    restored = restore_state()
+    if restored:
+        print(f" Restored state for {restored} tickers from {STATE_FILE}")
+    
+    # Pushes are delivered in the background so the scan never waits on Bark
+    notifier = BarkDispatcher(BARK_KEY)
+    metrics.start_server()
+    poller = PriorityPoller()
+    
+    try:
+        while True:
+            open_status, status_msg = is_market_open()
+            current_time_str = clock.now().strftime('%Y-%m-%d %H:%M:%S')
             
-            stage, status_text, is_triggered = analyze_three_tracks(ticker)
+            if not open_status:
+                # Market is closed, sleep until the next session opens
+                next_open = tse.next_open()
+                sys.stdout.write(f"\r[{current_time_str}] {status_msg}... Sleeping until {next_open:%Y-%m-%d %H:%M} JST ")
+                sys.stdout.flush()
+                sleep_until_open()
+                poller.poll_all()
+                continue
             
-            # Display with stage indicator
-            if stage == 3:
-                prefix = "[***]"
-            elif stage == 2:
-                prefix = "[>>]"
-            elif stage == 1:
-                prefix = "[!]"
-            else:
-                prefix = "[ ]"
+            # Tickers that can change stage every scan, the rest every FAR_POLL_EVERY scans
+            # (all of them on the closing scan, before the daily bar is final)
+            if tse.closing():
+                poller.poll_all()
+            due = poller.due(WATCH_LIST)
+            print(f"\n[{current_time_str}] {status_msg} - Scanning {len(due)}/{len(WATCH_LIST)} tickers...")
+            print("-" * 100)
             
-            print(f"{prefix} {status_text}")
+            # Track alerts
+            alert_list = []
             
-            # Collect alerts
-            if is_triggered:
-                alert_list.append((ticker, status_text))
-        
-        # Send push notifications
-        if alert_list:
-            print("\n" + "=" * 100)
-            for ticker, msg in alert_list:
-                try:
-                    bark_msg = f"{ticker}_Three_Track_Buy_Signal"
-                    detail = f"Bollinger_Touch->RSI_Reversal->MACD_GoldenCross"
-                    url = f"https://api.day.app/{BARK_KEY}/{bark_msg}/{detail}"
-                    requests.get(url, timeout=5)
-                    print(f"  !!! [ALERT SENT] {ticker} - THREE TRACKS CONFIRMED !!!")
-                except:
-                    print(f"  !!! [ALERT FAILED] {ticker} !!!")
-            print("=" * 100)
-        
-        print(f"\nNext scan in {CHECK_INTERVAL} seconds...")
-        print("-" * 100)
-        time.sleep(CHECK_INTERVAL)
+            # Fetch concurrently (cache top-ups) and scan each ticker as its bars arrive
+            for ticker, df in iter_bars(due, period=BAR_PERIOD, interval=BAR_INTERVAL):
+                sys.stdout.write(f"  {ticker:8s} | ")
+                sys.stdout.flush()
+                
+                status_text, alert = evaluate(ticker, df)
+                print(status_text)
+                
+                # Collect alerts
+                if alert:
+                    alert_list.append((ticker, alert))
+                poller.schedule(ticker, poll_every(ticker))
+            
+            poller.advance()
+            
+            # Send push notifications
+            if alert_list:
+                print("\n" + "=" * 100)
+                for ticker, alert in alert_list:
+                    notifier.send(ticker, *alert)
+                    print(f"  !!! [ALERT QUEUED] {ticker} - THREE TRACKS CONFIRMED !!!")
+                print("=" * 100)
+            
+            persist_state()
+            metrics.record_stages(STRATEGY["name"], ticker_states)
+            print(format_summary(latency.end_scan(STRATEGY["name"])))
+            
+            print(f"\nNext scan at the next {CHECK_INTERVAL}-second boundary...")
+            print("-" * 100)
+            sleep_until_next_bar(CHECK_INTERVAL, SETTLE_SECONDS)
+    finally:
+        # Deliver (or dead-letter) pushes still queued when the loop stops
+        notifier.close()
+
+# Plug-in descriptor for radar_daemon.py
+STRATEGY = {
+    "name": "three_tracks",
+    "watch_list": WATCH_LIST,
+    "period": BAR_PERIOD,
+    "interval": BAR_INTERVAL,
+    "poll_seconds": CHECK_INTERVAL,
+    "settle_seconds": SETTLE_SECONDS,
+    "evaluate": evaluate,
+    "restore_state": restore_state,
+    "persist_state": persist_state,
+    "states": ticker_states,
+    "poll_every": poll_every,
+}
 
 if __name__ == "__main__":
     try:
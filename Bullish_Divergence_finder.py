@@ -1,73 +1,101 @@
 # -*- coding: utf-8 -*-
 
-import yfinance as yf
-import pandas as pd
+import argparse
+import sys
 from datetime import datetime
 
+import pandas as pd
+
+import clock
+from indicator_cache import indicator_cache
+from indicators import DivergenceTracker, IncrementalMACD
+from latency import format_summary, latency
+from market_data import iter_bars
+import metrics
+from notifier import BarkDispatcher
+from scheduler import drop_incomplete_bar, sleep_until_next_bar
+from state_store import state_path, save_snapshot, load_snapshot, restore_ticker_states
+from tse_calendar import is_market_open, sleep_until_open, tse
+from watchlists import TSE_INTRADAY_LIST, TSE_WATCH_LIST
+
 # ================= CONFIGURATION =================
 # Tokyo Stock Exchange tickers
-WATCH_LIST = [
-    "6723.T", "9432.T", "7011.T", "7203.T", "8058.T", "8306.T", "9501.T", "285A.T",
-    "6758.T", "9434.T", "2760.T", "9984.T", "8035.T", "9503.T", "4324.T", "9433.T",
-    "7272.T", "6367.T", "6146.T", "6269.T", "6501.T", "8316.T", "5706.T", "5016.T",
-    "7974.T", "7013.T", "4063.T", "4502.T", "6762.T", "6361.T", "6503.T", "8053.T",
-    "7267.T", "6981.T", "6702.T", "8002.T", "4568.T", "9502.T", "1911.T", "5802.T"
-]
+WATCH_LIST = TSE_WATCH_LIST
 
 LOOKBACK_BARS = 10  # Number of bars to look back
+BAR_PERIOD = "3mo"
+BAR_INTERVAL = "1d"
+
+# Intraday mode (--intraday): same logic on closed 15-minute bars during market hours
+INTRADAY_WATCH_LIST = TSE_INTRADAY_LIST
+BARK_KEY = "****************"
+INTRADAY_PERIOD = "1mo"     # History used to warm up MACD and the windows
+INTRADAY_INTERVAL = "15m"
+BAR_SECONDS = 15 * 60       # Scan right after each 15-minute bar closes
+SETTLE_SECONDS = 20         # Delay after the bar boundary for the feed to publish the bar
+INTRADAY_STATE_FILE = state_path("bullish_divergence_intraday")
+
+
+def new_intraday_state():
+    """Fresh per-ticker streaming state for the intraday mode."""
+    return {
+        "macd": IncrementalMACD(),                  # MACD(12, 26, 9), fed one closed bar at a time
+        "tracker": DivergenceTracker(LOOKBACK_BARS),
+        "bars": 0,                                  # Closed bars fed since the last rebuild
+        "alert_date": None,                         # At most one push per ticker per day
+    }
+
+
+# Per-ticker streaming state: each new bar is one MACD update plus two deque pushes
+intraday_states = {ticker: new_intraday_state() for ticker in INTRADAY_WATCH_LIST}
+
+# Daily divergence windows per ticker: ticker -> (window anchor, DivergenceTracker)
+daily_trackers = {}
 
 # =================================================
 
-def detect_bullish_divergence_low(ticker):
+def detect_bullish_divergence_low(ticker, df):
     """
     Detect bullish divergence:
     - Current bar makes the lowest low within the last N bars
     - MACD histogram is rising
 
+    Args:
+        ticker: ticker symbol
+        df: daily OHLCV frame for this ticker (from the batched download)
     Returns:
         (bool: divergence_found, dict: details)
     """
     try:
-        # Download daily data
-        df = yf.download(ticker, period="3mo", interval="1d",
-                         progress=False, auto_adjust=True)
-
         if df.empty or len(df) < 30:
             return False, {"error": "Insufficient data"}
 
-        close = df['Close'].iloc[:, 0] if isinstance(df['Close'], pd.DataFrame) else df['Close']
-        low = df['Low'].iloc[:, 0] if isinstance(df['Low'], pd.DataFrame) else df['Low']
+        with latency.span("indicator", ticker):
+            close = indicator_cache.column(ticker, df, 'Close')
+            low = indicator_cache.column(ticker, df, 'Low')
 
-        # MACD calculation
-        ema12 = close.ewm(span=12, adjust=False).mean()
-        ema26 = close.ewm(span=26, adjust=False).mean()
-        dif = ema12 - ema26
-        dea = dif.ewm(span=9, adjust=False).mean()
-        macd_hist = (dif - dea) * 2
+            # MACD calculation (memoized per bar, shared with other strategies)
+            dif, dea = indicator_cache.macd(ticker, df)
+            macd_hist = (dif - dea) * 2
 
-        # Recent window
-        recent_low = low.iloc[-(LOOKBACK_BARS + 1):]
-        recent_hist = macd_hist.iloc[-(LOOKBACK_BARS + 1):]
-        recent_close = close.iloc[-(LOOKBACK_BARS + 1):]
-        recent_dates = df.index[-(LOOKBACK_BARS + 1):]
+        with latency.span("state", ticker):
+            result = sync_daily_tracker(ticker, df, low, macd_hist)
 
-        current_low = float(recent_low.iloc[-1])
-        current_hist = float(recent_hist.iloc[-1])
-        current_close = float(recent_close.iloc[-1])
-        current_date = recent_dates[-1].strftime('%Y-%m-%d')
+        current_low = result["low"]
+        current_hist = result["hist"]
+        current_close = float(close.iloc[-1])
+        current_date = df.index[-1].strftime('%Y-%m-%d')
 
         # Condition 1: lowest low in window
-        min_low = float(recent_low.min())
+        min_low = result["min_low"]
         if current_low != min_low:
             return False, {"error": f"Not lowest low (min={min_low:.2f})"}
 
         # Condition 2: MACD histogram rising
-        prev_hist_min = float(recent_hist.iloc[:-1].min())
-        prev_hist_min_idx = recent_hist.iloc[:-1].idxmin()
-        prev_hist_min_date = prev_hist_min_idx.strftime('%Y-%m-%d')
-
-        if current_hist <= prev_hist_min:
+        prev_hist_min = result["prev_hist_min"]
+        if not result["found"]:
             return False, {"error": "Histogram not rising"}
+        prev_hist_min_date = result["prev_hist_ts"].strftime('%Y-%m-%d')
 
         current_dif = float(dif.iloc[-1])
         current_dea = float(dea.iloc[-1])
@@ -95,6 +123,169 @@ def detect_bullish_divergence_low(ticker):
         return False, {"error": str(e)}
 
 
+def sync_daily_tracker(ticker, df, low, hist):
+    """
+    Bring a ticker's daily divergence tracker up to the last bar of `df`.
+
+    While the download window starts at the same bar, the MACD histogram
+    of past bars doesn't change, so the forming bar is revised and newer
+    bars are appended in O(1). When the window starts elsewhere (the first
+    poll of a new day), the EMAs are seeded from a different bar and the
+    last LOOKBACK_BARS + 1 bars are fed to a fresh tracker.
+
+    Returns: result dict of the tracker's last update
+    """
+    index = df.index
+    lows = low.to_numpy(dtype=float)
+    hists = hist.to_numpy(dtype=float)
+    anchor = (index[0], lows[0])
+
+    entry = daily_trackers.get(ticker)
+    if entry is not None and entry[0] == anchor and entry[1].stamps[-1] in index:
+        tracker = entry[1]
+        pos = index.get_loc(tracker.stamps[-1])
+        result = tracker.revise(lows[pos], hists[pos], index[pos])
+        start = pos + 1
+    else:
+        tracker = DivergenceTracker(LOOKBACK_BARS)
+        daily_trackers[ticker] = (anchor, tracker)
+        start = len(df) - (LOOKBACK_BARS + 1)
+
+    for i in range(start, len(df)):
+        result = tracker.update(lows[i], hists[i], index[i])
+    return result
+
+
+def find_divergences(ticker, df, lookback=None):
+    """
+    Evaluate the divergence condition on every bar of a long history in
+    amortized O(1) per bar (e.g. to backtest LOOKBACK_BARS).
+
+    Args:
+        ticker: ticker symbol
+        df: OHLCV frame (daily or intraday)
+        lookback: window length (default LOOKBACK_BARS)
+    Returns:
+        DataFrame indexed by signal bar with low, hist, prev_hist_min and
+        prev_hist_date columns (bars before the 30th are not evaluated,
+        as in detect_bullish_divergence_low)
+    """
+    lookback = lookback or LOOKBACK_BARS
+    columns = ["low", "hist", "prev_hist_min", "prev_hist_date"]
+    if df.empty or len(df) < 30:
+        return pd.DataFrame(columns=columns)
+
+    low = indicator_cache.column(ticker, df, 'Low').to_numpy(dtype=float)
+    dif, dea = indicator_cache.macd(ticker, df)
+    hist = ((dif - dea) * 2).to_numpy(dtype=float)
+
+    tracker = DivergenceTracker(lookback)
+    rows, stamps = [], []
+    for i, ts in enumerate(df.index):
+        result = tracker.update(low[i], hist[i], ts)
+        if result["found"] and i >= 29:
+            rows.append((result["low"], result["hist"], result["prev_hist_min"], result["prev_hist_ts"]))
+            stamps.append(ts)
+
+    return pd.DataFrame(rows, columns=columns, index=pd.Index(stamps, name=df.index.name))
+
+
+def restore_intraday_state():
+    """
+    Reload the intraday MACD engines and divergence windows from the last snapshot.
+    Returns: number of tickers restored
+    """
+    saved = load_snapshot(INTRADAY_STATE_FILE).get("intraday_states", {})
+    compatible = {ticker: state for ticker, state in saved.items()
+                  if state.get("tracker") is not None and state["tracker"].lookback == LOOKBACK_BARS}
+    return restore_ticker_states(intraday_states, compatible)
+
+
+def persist_intraday_state():
+    """Atomically snapshot the intraday state after a scan."""
+    try:
+        save_snapshot(INTRADAY_STATE_FILE, intraday_states=intraday_states)
+    except Exception as e:
+        print(f"  State_Save_Failed_{type(e).__name__}_{str(e)[:60]}")
+
+
+def evaluate_intraday(ticker, df):
+    """
+    Feed a ticker's newly closed 15-minute bars into its streaming state and
+    check the newest bar for a bullish divergence.
+    Shared by run_intraday_watcher and the unified daemon (radar_daemon.py).
+
+    Only bars after the last one fed are processed. If that bar is no longer
+    in the frame (first scan, restart after a gap, revised history), MACD
+    and the divergence windows are rebuilt from the downloaded history
+    without alerting on past bars. The alert date survives the rebuild, so
+    a divergence already pushed today is not pushed again.
+
+    Returns: (str: status_text, alert) where alert is (title, body) or None
+    """
+    try:
+        df = drop_incomplete_bar(df, BAR_SECONDS)
+        if df.empty:
+            return "Data_Insufficient", None
+
+        state = intraday_states[ticker]
+        index = df.index
+        last_ts = state["macd"].last_ts
+        if last_ts is not None and last_ts in index:
+            start = index.get_loc(last_ts) + 1
+        else:
+            fresh = new_intraday_state()
+            state.update(macd=fresh["macd"], tracker=fresh["tracker"], bars=0)
+            start = 0
+        if start == len(df):
+            return f"Unchanged_Bar_{last_ts:%H:%M}", None
+
+        low = df["Low"].to_numpy(dtype=float)
+        close = df["Close"].to_numpy(dtype=float)
+        with latency.span("state", ticker):
+            for i in range(start, len(df)):
+                dif, dea = state["macd"].update(close[i], index[i])
+                result = state["tracker"].update(low[i], (dif - dea) * 2, index[i])
+        state["bars"] += len(df) - start
+
+        if state["bars"] < 30:
+            return "Data_Insufficient", None
+        if result["low"] != result["min_low"]:
+            return f"Not_Lowest_Low_Min={result['min_low']:.2f}", None
+        if not result["found"]:
+            return f"Hist_Not_Rising_Hist={result['hist']:.3f}", None
+
+        status_text = (f"SIGNAL_Divergence_Low={result['low']:.2f}_Hist={result['hist']:.3f}"
+                       f"_PrevMin={result['prev_hist_min']:.3f}@{result['prev_hist_ts']:%H:%M}")
+        bar_date = index[-1].date()
+        if start == 0 or state["alert_date"] == bar_date:
+            return status_text, None  # Warm-up bar or already alerted today
+
+        state["alert_date"] = bar_date
+        msg_body = f"{ticker}_Bullish_Divergence_15m_Low_{result['low']:.2f}"
+        return status_text, ("Divergence_Alert", msg_body)
+
+    except Exception as e:
+        return f"Err_{type(e).__name__}_{str(e)}", None
+
+
+def evaluate(ticker, df):
+    """
+    Evaluate one ticker's daily bars for the unified daemon (radar_daemon.py)
+
+    Returns:
+        (str: status text, None) - this scanner only reports, it never pushes
+    """
+    has_div, data = detect_bullish_divergence_low(ticker, df)
+
+    if "error" in data:
+        return f"⚪ {data['error']}", None
+    if has_div:
+        return (f"✅ Bullish divergence Low={data['low']:.2f} "
+                f"Hist={data['hist']:.3f} (+{data['hist_improvement_pct']:.1f}%)"), None
+    return "⚪ No divergence", None
+
+
 def run_scanner():
     print("=" * 80)
     print(f" Daily MACD Bullish Divergence Scanner")
@@ -106,9 +297,10 @@ def run_scanner():
 
     results = []
 
-    for ticker in WATCH_LIST:
+    # Fetch concurrently and analyze each ticker as its bars arrive
+    for ticker, df in iter_bars(WATCH_LIST, period=BAR_PERIOD, interval=BAR_INTERVAL):
         print(f"Analyzing {ticker:<8}...", end=" ")
-        has_div, data = detect_bullish_divergence_low(ticker)
+        has_div, data = detect_bullish_divergence_low(ticker, df)
 
         if "error" in data:
             print(f"⚪ {data['error']}")
@@ -140,11 +332,89 @@ def run_scanner():
         print("No candidates found")
 
     print("\n" + "=" * 80)
+    print(format_summary(latency.end_scan(STRATEGY["name"])))
+
+
+def run_intraday_watcher():
+    """
+    Intraday loop: evaluate closed 15-minute bars during market hours and push alerts.
+    """
+    print("=" * 80)
+    print(f" Intraday MACD Bullish Divergence Watcher ({INTRADAY_INTERVAL}, lookback {LOOKBACK_BARS} bars)")
+    print("=" * 80)
+
+    restored = restore_intraday_state()
+    if restored:
+        print(f" Restored state for {restored} tickers from {INTRADAY_STATE_FILE}")
+
+    notifier = BarkDispatcher(BARK_KEY)
+    metrics.start_server()
+
+    try:
+        while True:
+            open_status, status_msg = is_market_open()
+            current_time_str = clock.now().strftime('%Y-%m-%d %H:%M:%S')
+
+            if not open_status:
+                # Market is closed, sleep until the next session opens
+                next_open = tse.next_open()
+                sys.stdout.write(f"\r[{current_time_str}] {status_msg}... Sleeping until {next_open:%Y-%m-%d %H:%M} JST ")
+                sys.stdout.flush()
+                sleep_until_open()
+                continue
+
+            print(f"\n[{current_time_str}] {status_msg} - Scanning...")
+
+            for ticker, df in iter_bars(INTRADAY_WATCH_LIST, period=INTRADAY_PERIOD, interval=INTRADAY_INTERVAL):
+                status_text, alert = evaluate_intraday(ticker, df)
+                print(f"  > {ticker}: {status_text}")
+
+                if alert:
+                    notifier.send(ticker, *alert)
+                    print(f"!!! [PUSH_QUEUED] {ticker} !!!")
+
+            persist_intraday_state()
+            print(format_summary(latency.end_scan(INTRADAY_STRATEGY["name"])))
+            print("-" * 80)
+            sleep_until_next_bar(BAR_SECONDS, SETTLE_SECONDS)
+    finally:
+        # Deliver (or dead-letter) pushes still queued when the loop stops
+        notifier.close()
+
+
+# Plug-in descriptors for radar_daemon.py
+STRATEGY = {
+    "name": "bullish_divergence",
+    "watch_list": WATCH_LIST,
+    "period": BAR_PERIOD,
+    "interval": BAR_INTERVAL,
+    "evaluate": evaluate,
+}
+
+INTRADAY_STRATEGY = {
+    "name": "bullish_divergence_15m",
+    "watch_list": INTRADAY_WATCH_LIST,
+    "period": INTRADAY_PERIOD,
+    "interval": INTRADAY_INTERVAL,
+    "poll_seconds": BAR_SECONDS,
+    "settle_seconds": SETTLE_SECONDS,
+    "evaluate": evaluate_intraday,
+    "restore_state": restore_intraday_state,
+    "persist_state": persist_intraday_state,
+}
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MACD bullish divergence scanner")
+    parser.add_argument("--intraday", action="store_true",
+                        help="watch 15-minute bars continuously during market hours and push alerts")
+    args = parser.parse_args()
+
     try:
-        run_scanner()
+        if args.intraday:
+            run_intraday_watcher()
+        else:
+            run_scanner()
     except KeyboardInterrupt:
         print("\nProcess stopped by user")
     except Exception as e:
@@ -1,20 +1,31 @@
 # -*- coding: utf-8 -*-
-import yfinance as yf
+import numpy as np
 import pandas as pd
-import requests
-import time
 import sys
-from datetime import datetime
+
+import clock
+from indicators import IncrementalMACD
+from latency import format_summary, latency
+from market_data import iter_bars
+import metrics
+from notifier import BarkDispatcher
+from scheduler import BarChangeTracker, PriorityPoller, drop_incomplete_bar, sleep_until_next_bar
+from state_store import state_path, save_snapshot, load_snapshot, restore_ticker_states
+from tse_calendar import is_market_open, sleep_until_open, tse
+from watchlists import TSE_INTRADAY_LIST
 
 # ================= CONFIGURATION =================
 # Watchlist: 13 stocks from Tokyo Stock Exchange
-WATCH_LIST = [
-    "6723.T", "9432.T", "7011.T", "7203.T", "8058.T", 
-    "8306.T", "9501.T", "285A.T", "6758.T", "9434.T", 
-    "2760.T", "9984.T", "8035.T"
-]
+WATCH_LIST = TSE_INTRADAY_LIST
 BARK_KEY = "***********************"  # Push notification service key
-CHECK_INTERVAL = 120  # Check every 120 seconds
+BAR_PERIOD = "1mo"    # History window downloaded per scan
+BAR_INTERVAL = "15m"  # 15-minute candles
+BAR_SECONDS = 15 * 60  # Scan right after each 15-minute bar closes
+SETTLE_SECONDS = 20   # Delay after the bar boundary for the feed to publish the bar
+STAGE_LOOKBACK = 100  # Bars of DIF/DEA history kept for stage detection
+RETRACE_RATIO = 0.5   # Alert when DEA falls back to this fraction of the stage-3 DIF peak
+PRIORITY_POLLING = True  # Poll tickers far from stage 3 less often (see poll_every)
+STATE_FILE = state_path("macd_full_breakout")  # Snapshot for warm restarts
 
 # State Dictionary: 4-stage state machine for each ticker
 ticker_states = {
@@ -26,83 +37,85 @@ ticker_states = {
         "stage2_confirmed": False,  # Mark if we've seen DIF>0 in this cycle
     } for ticker in WATCH_LIST
 }
+
+# Streaming MACD(12, 26, 9) per ticker, only new/revised bars are fed each scan
+macd_engines = {ticker: IncrementalMACD(history=STAGE_LOOKBACK) for ticker in WATCH_LIST}
+
+# Latest closed bar seen per ticker (unchanged bars are not re-evaluated)
+bar_tracker = BarChangeTracker()
 # =================================================
 
-def is_market_open():
+def restore_state():
     """
-    Check if Tokyo Stock Exchange is currently open.
-    Returns: (bool: is_open, str: status_message)
+    Reload stages, DIF peaks, alert dates and MACD engines from the last snapshot.
+    Returns: number of tickers restored
     """
-    now = datetime.now()
-    if now.weekday() >= 5: 
-        return False, "Weekend"
-    
-    current_time = now.strftime("%H:%M")
-    # Tokyo Stock Exchange trading hours (JST)
-    if "09:00" <= current_time <= "11:30": 
-        return True, "Morning_Session"
-    if "11:30" < current_time < "12:30": 
-        return False, "Lunch_Break"
-    if "12:30" <= current_time <= "15:30": 
-        return True, "Afternoon_Session"
-    
-    return False, "Market_Closed"
+    snapshot = load_snapshot(STATE_FILE)
+    restored = restore_ticker_states(ticker_states, snapshot.get("ticker_states"))
+    for ticker, engine in snapshot.get("macd_engines", {}).items():
+        if ticker in macd_engines:
+            macd_engines[ticker] = engine
+    return restored
+
+def persist_state():
+    """Atomically snapshot the state machine after a scan."""
+    try:
+        save_snapshot(STATE_FILE, ticker_states=ticker_states, macd_engines=macd_engines)
+    except Exception as e:
+        print(f"  State_Save_Failed_{type(e).__name__}_{str(e)}")
+
+def find_zero_crosses_up(dif):
+    """
+    Indices i where DIF crosses zero from below (dif[i-1] < 0 < dif[i]).
+    Vectorized sign-change detection over a NumPy array.
+    """
+    return np.flatnonzero(np.diff(np.sign(dif)) == 2) + 1
 
 def detect_current_stage(current_dif, current_dea, dif_series, dea_series):
     """
     Detect which stage the ticker should be in based on current conditions.
     This is used for initial stage determination when program starts.
+    Only the last STAGE_LOOKBACK bars of history are inspected.
     
     Returns: (detected_stage, historical_max_dif)
     """
+    dif = np.asarray(dif_series, dtype=float)
+    dea = np.asarray(dea_series, dtype=float)
+    # First bar of the lookback window (bar `lo` only serves as the previous value)
+    lo = max(0, len(dif) - STAGE_LOOKBACK)
+
     # Check if both DIF and DEA are above zero
     if current_dif > 0 and current_dea > 0:
-        # Check historical data to confirm underwater GC happened
-        # Look back to find if there was a period where DEA < DIF < 0
-        underwater_gc_found = False
-        dif_crossed_zero_idx = None
-        
-        for i in range(len(dif_series) - 1, max(0, len(dif_series) - 100), -1):
-            dif_val = dif_series.iloc[i]
-            dea_val = dea_series.iloc[i]
-            
-            # If we go back to negative territory
-            if dif_val < 0:
-                if dea_val < dif_val:  # Found underwater GC
-                    underwater_gc_found = True
-                break
-            
-            # Track if DIF crossed zero from below
-            if i > 0 and dif_series.iloc[i-1] < 0 and dif_val > 0:
-                dif_crossed_zero_idx = i
-        
-        # If both conditions met, we're in Stage 3
-        if underwater_gc_found and dif_crossed_zero_idx is not None:
-            # Find max DIF from the point where both lines crossed zero
-            # Find when DEA crossed zero
-            dea_crossed_zero_idx = None
-            for i in range(dif_crossed_zero_idx, len(dea_series)):
-                if dea_series.iloc[i] > 0:
-                    dea_crossed_zero_idx = i
-                    break
-            
-            # Calculate max DIF from DEA zero cross to now
-            if dea_crossed_zero_idx is not None:
-                max_dif = dif_series.iloc[dea_crossed_zero_idx:].max()
-                return 3, float(max_dif)
-            else:
-                return 2, 0.0  # DEA hasn't crossed yet
-        else:
+        # Most recent bar where DIF was still negative
+        below = np.flatnonzero(dif[lo + 1:] < 0)
+        if below.size == 0:
             return 0, 0.0  # Direct bullish without underwater setup
+        last_neg_idx = lo + 1 + below[-1]
+
+        # Underwater GC at that bar: DEA < DIF < 0
+        if not dea[last_neg_idx] < dif[last_neg_idx]:
+            return 0, 0.0
+
+        # DIF crossed zero from below after that bar
+        crosses = find_zero_crosses_up(dif[last_neg_idx:])
+        if crosses.size == 0:
+            return 0, 0.0
+        dif_crossed_zero_idx = last_neg_idx + crosses[0]
+
+        # Find when DEA crossed zero, then max DIF from there to now
+        dea_above = np.flatnonzero(dea[dif_crossed_zero_idx:] > 0)
+        if dea_above.size == 0:
+            return 2, 0.0  # DEA hasn't crossed yet
+        dea_crossed_zero_idx = dif_crossed_zero_idx + dea_above[0]
+        return 3, float(np.nanmax(dif[dea_crossed_zero_idx:]))
     
     # Check if DIF > 0 but DEA < 0 (Stage 2 territory)
     elif current_dif > 0 and current_dea < 0:
         # Check if there was underwater GC before
-        for i in range(len(dif_series) - 1, max(0, len(dif_series) - 100), -1):
-            dif_val = dif_series.iloc[i]
-            dea_val = dea_series.iloc[i]
-            if dif_val < 0 and dea_val < dif_val:
-                return 2, 0.0  # Found underwater GC, now in Stage 2
+        window_dif = dif[lo + 1:]
+        window_dea = dea[lo + 1:]
+        if np.any((window_dif < 0) & (window_dea < window_dif)):
+            return 2, 0.0  # Found underwater GC, now in Stage 2
         return 0, 0.0  # No underwater setup found
     
     # Check for underwater golden cross (Stage 1)
@@ -112,130 +125,207 @@ def detect_current_stage(current_dif, current_dea, dif_series, dea_series):
     # Default: waiting for setup
     return 0, 0.0
 
-def get_mac_status(ticker):
+def advance_stage(state, today, current_dif, current_dea, dif_history, dea_history, retrace_ratio=None):
+    """
+    Advance one ticker's 4-stage state machine by one bar.
+
+    Shared by the live watcher and the parameter sweep, which replays
+    history through it with each bar's date as `today`.
+
+    Args:
+        state: the ticker's state dict (mutated in place)
+        today: date of the bar, used to alert at most once per day
+        current_dif, current_dea: MACD values of the bar
+        dif_history, dea_history: recent DIF/DEA arrays ending with this bar
+        retrace_ratio: DEA/peak-DIF ratio that fires the alert (default RETRACE_RATIO)
+    Returns: (str: status_text, bool: should_alert)
+    """
+    if retrace_ratio is None:
+        retrace_ratio = RETRACE_RATIO
+
+    # Initialize stage on first run
+    if state["stage"] is None:
+        detected_stage, historical_max = detect_current_stage(current_dif, current_dea, dif_history, dea_history)
+        state["stage"] = detected_stage
+        
+        if state["stage"] == 3:
+            # Use historical max DIF instead of current value
+            state["max_dif"] = historical_max
+            state["stage1_confirmed"] = True
+            state["stage2_confirmed"] = True
+        elif state["stage"] == 2:
+            state["stage1_confirmed"] = True
+        elif state["stage"] == 1:
+            state["stage1_confirmed"] = True
+
+    current_stage = state["stage"]
+
+    # ========== 4-STAGE STATE MACHINE ==========
+    
+    # Global reset condition: if DIF drops below zero from any stage
+    if current_dif < 0:
+        state["stage"] = 0
+        state["max_dif"] = 0.0
+        state["alert_date"] = None
+        state["stage1_confirmed"] = False
+        state["stage2_confirmed"] = False
+        return f"Stage0_Reset_DIF_Below_Zero_DIF={current_dif:.3f}", False
+    
+    # Stage 0 → Stage 1: Detect underwater golden cross (DEA < DIF < 0)
+    if current_stage == 0:
+        if current_dea < current_dif < 0:
+            state["stage"] = 1
+            state["stage1_confirmed"] = True
+            return f"Stage1_Underwater_GoldCross_DIF={current_dif:.3f}", False
+        return f"Stage0_Waiting_DIF={current_dif:.3f}_DEA={current_dea:.3f}", False
+    
+    # Stage 1 → Stage 2: DIF breaks above zero
+    elif current_stage == 1:
+        if current_dif > 0:
+            state["stage"] = 2
+            state["stage2_confirmed"] = True
+            return f"Stage2_DIF_Crossed_Zero_DIF={current_dif:.3f}", False
+        elif current_dif < current_dea:
+            # Death cross underwater, reset
+            state["stage"] = 0
+            state["stage1_confirmed"] = False
+            return f"Stage0_Reset_DIF_Below_DEA", False
+        return f"Stage1_Waiting_DIF_Cross_Zero_DIF={current_dif:.3f}", False
+    
+    # Stage 2 → Stage 3: DEA breaks above zero
+    elif current_stage == 2:
+        if current_dea > 0:
+            state["stage"] = 3
+            # Find max DIF from the latest DIF zero cross to now
+            lo = max(0, len(dif_history) - STAGE_LOOKBACK)
+            crosses = find_zero_crosses_up(dif_history[lo:])
+            
+            if crosses.size > 0:
+                dif_crossed_zero_idx = lo + crosses[-1]
+                state["max_dif"] = float(np.nanmax(dif_history[dif_crossed_zero_idx:]))
+            else:
+                state["max_dif"] = current_dif
+            
+            return f"Stage3_DEA_Crossed_Zero_DEA={current_dea:.3f}_MaxDIF={state['max_dif']:.3f}", False
+        return f"Stage2_Waiting_DEA_Cross_Zero_DEA={current_dea:.3f}", False
+    
+    # Stage 3: Track DIF peak, detect DEA retracement
+    elif current_stage == 3:
+        # Update DIF peak value
+        if current_dif > state["max_dif"]:
+            state["max_dif"] = current_dif
+        
+        # Check if DEA has retraced to RETRACE_RATIO of peak
+        if state["max_dif"] > 0:
+            retrace_threshold = state["max_dif"] * retrace_ratio
+            
+            # Trigger condition: DEA <= retrace threshold AND not alerted today
+            if current_dea <= retrace_threshold:
+                if state["alert_date"] != today:
+                    state["alert_date"] = today
+                    return f"SIGNAL_DEA_Retraced_{retrace_ratio * 100:.0f}pct_Peak={state['max_dif']:.3f}_DEA={current_dea:.3f}", True
+                else:
+                    return f"Stage3_Already_Alerted_Today", False
+        
+        return f"Stage3_Tracking_DIF={current_dif:.3f}_MaxDIF={state['max_dif']:.3f}_DEA={current_dea:.3f}", False
+    
+    return "Unknown_Stage", False
+
+def get_mac_status(ticker, df):
     """
     Analyze MACD status using 4-stage state machine.
     
     Stage 0: Waiting for underwater golden cross (DEA < DIF < 0)
     Stage 1: Underwater GC confirmed, waiting for DIF > 0
     Stage 2: DIF > 0, waiting for DEA > 0
-    Stage 3: Both above zero, track DIF peak and alert on 50% DEA retracement
+    Stage 3: Both above zero, track DIF peak and alert on RETRACE_RATIO DEA retracement
     
+    Args:
+        ticker: ticker symbol
+        df: 15-minute OHLCV frame for this ticker (from the batched download)
     Returns: (str: status_text, bool: should_alert)
     """
     global ticker_states
     try:
-        # Download 1 month of 15-minute candle data
-        df = yf.download(ticker, period="1mo", interval="15m", progress=False, auto_adjust=True)
         if df.empty or len(df) < 30:
             return "Data_Insufficient", False
 
-        # Calculate MACD indicators
+        # Update MACD incrementally (only bars newer than the last scan are fed)
         close_series = df['Close'].iloc[:, 0] if isinstance(df['Close'], pd.DataFrame) else df['Close']
-        ema12 = close_series.ewm(span=12, adjust=False).mean()
-        ema26 = close_series.ewm(span=26, adjust=False).mean()
-        dif_series = ema12 - ema26  # DIF line
-        dea_series = dif_series.ewm(span=9, adjust=False).mean()  # DEA is 9-period EMA of DIF
-        
-        current_dif = float(dif_series.iloc[-1])
-        current_dea = float(dea_series.iloc[-1])
-        
+        engine = macd_engines[ticker]
         state = ticker_states[ticker]
-        today = datetime.now().date()
 
-        # Initialize stage on first run
-        if state["stage"] is None:
-            detected_stage, historical_max = detect_current_stage(current_dif, current_dea, dif_series, dea_series)
-            state["stage"] = detected_stage
-            
-            if state["stage"] == 3:
-                # Use historical max DIF instead of current value
-                state["max_dif"] = historical_max
-                state["stage1_confirmed"] = True
-                state["stage2_confirmed"] = True
-            elif state["stage"] == 2:
-                state["stage1_confirmed"] = True
-            elif state["stage"] == 1:
-                state["stage1_confirmed"] = True
-
-        current_stage = state["stage"]
-
-        # ========== 4-STAGE STATE MACHINE ==========
-        
-        # Global reset condition: if DIF drops below zero from any stage
-        if current_dif < 0:
-            state["stage"] = 0
-            state["max_dif"] = 0.0
-            state["alert_date"] = None
-            state["stage1_confirmed"] = False
-            state["stage2_confirmed"] = False
-            return f"Stage0_Reset_DIF_Below_Zero_DIF={current_dif:.3f}", False
-        
-        # Stage 0 → Stage 1: Detect underwater golden cross (DEA < DIF < 0)
-        if current_stage == 0:
-            if current_dea < current_dif < 0:
-                state["stage"] = 1
-                state["stage1_confirmed"] = True
-                return f"Stage1_Underwater_GoldCross_DIF={current_dif:.3f}", False
-            return f"Stage0_Waiting_DIF={current_dif:.3f}_DEA={current_dea:.3f}", False
-        
-        # Stage 1 → Stage 2: DIF breaks above zero
-        elif current_stage == 1:
-            if current_dif > 0:
-                state["stage"] = 2
-                state["stage2_confirmed"] = True
-                return f"Stage2_DIF_Crossed_Zero_DIF={current_dif:.3f}", False
-            elif current_dif < current_dea:
-                # Death cross underwater, reset
-                state["stage"] = 0
-                state["stage1_confirmed"] = False
-                return f"Stage0_Reset_DIF_Below_DEA", False
-            return f"Stage1_Waiting_DIF_Cross_Zero_DIF={current_dif:.3f}", False
-        
-        # Stage 2 → Stage 3: DEA breaks above zero
-        elif current_stage == 2:
-            if current_dea > 0:
-                state["stage"] = 3
-                # Find max DIF from when DIF crossed zero to now
-                dif_crossed_zero_idx = None
-                for i in range(len(dif_series) - 1, max(0, len(dif_series) - 100), -1):
-                    if i > 0 and dif_series.iloc[i-1] < 0 and dif_series.iloc[i] > 0:
-                        dif_crossed_zero_idx = i
-                        break
-                
-                if dif_crossed_zero_idx is not None:
-                    state["max_dif"] = float(dif_series.iloc[dif_crossed_zero_idx:].max())
-                else:
-                    state["max_dif"] = current_dif
-                
-                return f"Stage3_DEA_Crossed_Zero_DEA={current_dea:.3f}_MaxDIF={state['max_dif']:.3f}", False
-            return f"Stage2_Waiting_DEA_Cross_Zero_DEA={current_dea:.3f}", False
-        
-        # Stage 3: Track DIF peak, detect DEA retracement
-        elif current_stage == 3:
-            # Update DIF peak value
-            if current_dif > state["max_dif"]:
-                state["max_dif"] = current_dif
-            
-            # Check if DEA has retraced to 50% of peak
-            if state["max_dif"] > 0:
-                retrace_threshold = state["max_dif"] * 0.5
-                
-                # Trigger condition: DEA <= 50% peak AND not alerted today
-                if current_dea <= retrace_threshold:
-                    if state["alert_date"] != today:
-                        state["alert_date"] = today
-                        return f"SIGNAL_DEA_Retraced_50pct_Peak={state['max_dif']:.3f}_DEA={current_dea:.3f}", True
-                    else:
-                        return f"Stage3_Already_Alerted_Today", False
-            
-            return f"Stage3_Tracking_DIF={current_dif:.3f}_MaxDIF={state['max_dif']:.3f}_DEA={current_dea:.3f}", False
+        # Bars since the last evaluation (more than one if the ticker was deferred or a scan was missed)
+        pending = 0
+        if state["stage"] is not None and engine.last_ts in close_series.index:
+            pending = len(close_series) - 1 - close_series.index.get_loc(engine.last_ts)
+
+        with latency.span("indicator", ticker):
+            current_dif, current_dea = engine.sync(close_series)
         
-        return "Unknown_Stage", False
+        with latency.span("state", ticker):
+            dif_history = np.fromiter(engine.dif_history, dtype=float)
+            dea_history = np.fromiter(engine.dea_history, dtype=float)
+            today = clock.now().date()
+
+            # Replay skipped bars one at a time so no stage transition is missed,
+            # each on its own date (the deferral may span midnight or a weekend)
+            signal = None
+            for back in range(min(pending, len(dif_history)) - 1, 0, -1):
+                end = len(dif_history) - back
+                bar_date = close_series.index[-1 - back].date()
+                status_text, is_triggered = advance_stage(
+                    state, bar_date, dif_history[end - 1], dea_history[end - 1],
+                    dif_history[:end], dea_history[:end]
+                )
+                if is_triggered and signal is None:
+                    signal = status_text
+
+            status_text, is_triggered = advance_stage(
+                state, today, current_dif, current_dea, dif_history, dea_history
+            )
+            if signal is not None:
+                return signal, True
+            return status_text, is_triggered
 
     except Exception as e:
         return f"Err_{type(e).__name__}_{str(e)}", False
 
+def poll_every(ticker):
+    """
+    Scan cycles (bars) a ticker can wait before its next poll.
+
+    The state machine moves at most one stage per bar and alerts from
+    stage 3 only, so a ticker in stage s cannot alert within the next
+    3 - s bars. Polling it every 4 - s bars, with the skipped bars replayed
+    by get_mac_status, never delays an alert.
+    """
+    stage = ticker_states[ticker]["stage"]
+    if not PRIORITY_POLLING or stage is None:
+        return 1
+    return 4 - stage
+
+def evaluate(ticker, df):
+    """
+    Evaluate one ticker's freshly fetched 15-minute bars.
+    Shared by run_radar and the unified daemon (radar_daemon.py).
+    
+    Returns: (str: status_text, alert) where alert is (title, body) or None
+    """
+    # Evaluate closed bars only; skip tickers whose last bar hasn't changed
+    df = drop_incomplete_bar(df, BAR_SECONDS)
+    if not bar_tracker.changed(ticker, df):
+        return f"Unchanged_Bar_Stage{ticker_states[ticker]['stage']}", None
+    
+    status_text, is_triggered = get_mac_status(ticker, df)
+    if not is_triggered:
+        return status_text, None
+    
+    # Bark push notification (iOS)
+    state = ticker_states[ticker]
+    msg_body = f"{ticker}_DEA_Retraced_{RETRACE_RATIO * 100:.0f}pct_Peak_{state['max_dif']:.3f}"
+    return status_text, ("Radar_Alert", msg_body)
+
 def run_radar():
     """
     Main monitoring loop: continuously scan watchlist and send alerts.
@@ -244,41 +334,71 @@ def run_radar():
     print(" Radar Guardian V4 (4-Stage Underwater Breakout Monitor)")
     print("=" * 60)
 
-    while True:
-        open_status, status_msg = is_market_open()
-        current_time_str = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    # Warm restart: no stage re-detection, no duplicate alerts
+    restored = restore_state()
+    if restored:
+        print(f" Restored state for {restored} tickers from {STATE_FILE}")
 
-        if not open_status:
-            # Market is closed, sleep for 10 minutes
-            sys.stdout.write(f"\r[{current_time_str}] {status_msg}... Sleeping ")
-            sys.stdout.flush()
-            time.sleep(600)
-            continue
+    # Pushes are delivered in the background so the scan never waits on Bark
+    notifier = BarkDispatcher(BARK_KEY)
+    metrics.start_server()
+    poller = PriorityPoller()
 
-        print(f"\n[{current_time_str}] {status_msg} - Scanning...")
-        
-        # Scan each ticker in watchlist
-        for ticker in WATCH_LIST:
-            sys.stdout.write(f"  > {ticker}: ")
-            sys.stdout.flush()
-            
-            status_text, is_triggered = get_mac_status(ticker)
-            sys.stdout.write(f"{status_text}\n")
-            
-            # Send push notification if signal triggered
-            if is_triggered:
-                try:
-                    # Bark push notification (iOS)
-                    state = ticker_states[ticker]
-                    msg_body = f"{ticker}_DEA_Retraced_50pct_Peak_{state['max_dif']:.3f}"
-                    url = f"https://api.day.app/{BARK_KEY}/Radar_Alert/{msg_body}"
-                    requests.get(url, timeout=5)
-                    print(f"!!! [PUSH_SENT] {ticker} !!!")
-                except:
-                    print(f"!!! [PUSH_FAILED] {ticker} !!!")
-
-        print("-" * 60)
-        time.sleep(CHECK_INTERVAL)
+    try:
+        while True:
+            open_status, status_msg = is_market_open()
+            current_time_str = clock.now().strftime('%Y-%m-%d %H:%M:%S')
+
+            if not open_status:
+                # Market is closed, sleep until the next session opens
+                next_open = tse.next_open()
+                sys.stdout.write(f"\r[{current_time_str}] {status_msg}... Sleeping until {next_open:%Y-%m-%d %H:%M} JST ")
+                sys.stdout.flush()
+                sleep_until_open()
+                continue
+
+            # Near-trigger tickers every bar, the rest every few bars
+            due = poller.due(WATCH_LIST)
+            print(f"\n[{current_time_str}] {status_msg} - Scanning {len(due)}/{len(WATCH_LIST)} tickers...")
+
+            # Fetch concurrently (cache top-ups) and scan each ticker as its bars arrive
+            for ticker, df in iter_bars(due, period=BAR_PERIOD, interval=BAR_INTERVAL):
+                sys.stdout.write(f"  > {ticker}: ")
+                sys.stdout.flush()
+                
+                status_text, alert = evaluate(ticker, df)
+                sys.stdout.write(f"{status_text}\n")
+                
+                # Send push notification if signal triggered (queued for background delivery)
+                if alert:
+                    notifier.send(ticker, *alert)
+                    print(f"!!! [PUSH_QUEUED] {ticker} !!!")
+                poller.schedule(ticker, poll_every(ticker))
+
+            poller.advance()
+            persist_state()
+            metrics.record_stages(STRATEGY["name"], ticker_states)
+            print(format_summary(latency.end_scan(STRATEGY["name"])))
+            print("-" * 60)
+            sleep_until_next_bar(BAR_SECONDS, SETTLE_SECONDS)
+    finally:
+        # Deliver (or dead-letter) pushes still queued when the loop stops
+        notifier.close()
+
+# Plug-in descriptor for radar_daemon.py
+STRATEGY = {
+    "name": "macd_full_breakout",
+    "watch_list": WATCH_LIST,
+    "period": BAR_PERIOD,
+    "interval": BAR_INTERVAL,
+    "poll_seconds": BAR_SECONDS,
+    "settle_seconds": SETTLE_SECONDS,
+    "evaluate": evaluate,
+    "restore_state": restore_state,
+    "persist_state": persist_state,
+    "states": ticker_states,
+    "poll_every": poll_every,
+}
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Three-Track Backtest
+
+Replays years of daily bars through the exact state machine used live by
+3_lines_method.py (advance_state), in simulated time: each bar's date is
+passed as `today`, so the 10/15/5-day timeouts behave as they would have.
+Every S1/S2/S3 transition is emitted with forward returns.
+
+Track conditions are computed for the whole universe at once on a
+(bars x tickers) matrix; the per-ticker replay then skips straight from
+one lower-band touch to the next while the machine sits in Stage 0.
+Indicators run over the full history rather than the live 3-month window,
+so EMA-based values can differ from a live scan in the last decimals.
+"""
+
+import argparse
+import importlib
+import time
+
+import numpy as np
+import pandas as pd
+
+from indicator_matrix import price_matrix, bollinger_matrix, rsi_matrix, macd_matrix
+from market_data import fetch_bars
+from watchlists import TSE_WATCH_LIST
+
+three_tracks = importlib.import_module("3_lines_method")
+
+# ================= CONFIGURATION =================
+BACKTEST_PERIOD = "10y"          # History replayed per ticker
+FORWARD_HORIZONS = (5, 10, 20)   # Forward returns (in bars) recorded per transition
+WARMUP_BARS = 50                 # Same minimum history as analyze_three_tracks
+CHUNK_TICKERS = 200              # Tickers per vectorized block (bounds memory)
+EVENTS_FILE = "backtest_three_tracks_events.csv"
+# =================================================
+
+
+def default_params():
+    """Live strategy parameters from 3_lines_method.py."""
+    return {
+        "boll_period": three_tracks.BOLL_PERIOD,
+        "boll_std": three_tracks.BOLL_STD,
+        "rsi_period": three_tracks.RSI_PERIOD,
+        "rsi_oversold": three_tracks.RSI_OVERSOLD,
+        "touch_timeout": three_tracks.TOUCH_TIMEOUT_DAYS,
+        "reversal_timeout": three_tracks.REVERSAL_TIMEOUT_DAYS,
+        "reset_days": three_tracks.SIGNAL_RESET_DAYS,
+    }
+
+
+def shift_down(x):
+    """Previous bar's value for every row (NaN for the first row)."""
+    prev = np.full(x.shape, np.nan)
+    prev[1:] = x[:-1]
+    return prev
+
+
+def compute_tracks(close, low, params, macd=None):
+    """
+    Evaluate the three tracks on every bar of a (bars x tickers) matrix.
+    Same conditions as track1_touch_lower_band / track2_rsi_reversal /
+    track3_macd_golden_cross evaluated on the last bar.
+
+    Args:
+        macd: optional precomputed macd_matrix(close); MACD does not depend
+              on params, so a parameter sweep computes it once
+    Returns: (touched, reversed, rsi, confirmed) matrices
+    """
+    _, _, lower_band = bollinger_matrix(close, params["boll_period"], params["boll_std"])
+    rsi = rsi_matrix(close, params["rsi_period"])
+    dif, dea, hist = macd if macd is not None else macd_matrix(close)
+    prev_rsi = shift_down(rsi)
+    prev_dif = shift_down(dif)
+    prev_dea = shift_down(dea)
+    prev_hist = shift_down(hist)
+
+    oversold = params["rsi_oversold"]
+    with np.errstate(invalid="ignore"):
+        touched = low <= lower_band
+        reversed = (prev_rsi < oversold) & (rsi >= oversold)
+        is_golden_cross = (prev_dif <= prev_dea) & (dif > dea)
+        histogram_turning_red = (prev_hist < 0) & (hist >= 0)
+
+    return touched, reversed, rsi, is_golden_cross | histogram_turning_red
+
+
+def replay_ticker(ticker, dates, close, touched, reversed, rsi, confirmed, params, start=0):
+    """
+    Run one ticker's bars through advance_state in simulated time.
+
+    Args:
+        dates: datetime.date per bar
+        close, touched, reversed, rsi, confirmed: 1-D arrays aligned with dates
+        start: first bar to evaluate (earlier bars are warm-up)
+    Returns: list of transition event dicts
+    """
+    state = {"stage": 0, "touch_date": None, "rsi_min": 100, "alert_date": None, "stage_history": []}
+    timeouts = {
+        "touch_timeout": params["touch_timeout"],
+        "reversal_timeout": params["reversal_timeout"],
+        "reset_days": params["reset_days"],
+    }
+    touch_idx = np.flatnonzero(touched)
+    n = len(dates)
+    events = []
+
+    i = start
+    while i < n:
+        if state["stage"] == 0:
+            # Stage 0 only moves on a touch: jump straight to the next one
+            k = np.searchsorted(touch_idx, i)
+            if k == len(touch_idx):
+                break
+            i = int(touch_idx[k])
+
+        prev_stage = state["stage"]
+        stage, _, should_alert = three_tracks.advance_state(
+            state, dates[i], bool(touched[i]), bool(reversed[i]), float(rsi[i]), bool(confirmed[i]),
+            **timeouts
+        )
+
+        if stage != prev_stage and stage > 0:
+            event = {
+                "ticker": ticker,
+                "date": dates[i],
+                "stage": stage,
+                "alert": should_alert,
+                "close": float(close[i]),
+            }
+            for h in FORWARD_HORIZONS:
+                event[f"ret_{h}"] = float(close[i + h] / close[i] - 1) if i + h < n else np.nan
+            events.append(event)
+        i += 1
+
+    return events
+
+
+def backtest_universe(frames, params=None):
+    """
+    Backtest every ticker in `frames` (dict of ticker -> daily OHLCV frame).
+    Returns: DataFrame of transition events
+    """
+    params = params or default_params()
+    tickers = [t for t, df in frames.items() if len(df) >= WARMUP_BARS]
+    events = []
+
+    for offset in range(0, len(tickers), CHUNK_TICKERS):
+        chunk = tickers[offset:offset + CHUNK_TICKERS]
+        chunk, close = price_matrix(frames, "Close", chunk)
+        _, low = price_matrix(frames, "Low", chunk)
+        touched, reversed, rsi, confirmed = compute_tracks(close, low, params)
+
+        n_rows = close.shape[0]
+        for j, ticker in enumerate(chunk):
+            dates = frames[ticker].index.date
+            top = n_rows - len(dates)  # Rows above this are padding
+            events.extend(replay_ticker(
+                ticker, dates, close[top:, j], touched[top:, j], reversed[top:, j],
+                rsi[top:, j], confirmed[top:, j], params, start=WARMUP_BARS - 1
+            ))
+
+    columns = ["ticker", "date", "stage", "alert", "close"] + [f"ret_{h}" for h in FORWARD_HORIZONS]
+    return pd.DataFrame(events, columns=columns)
+
+
+def summarize(events):
+    """
+    Per-stage transition counts, mean forward returns and hit rates (share > 0).
+    Returns: DataFrame indexed by stage
+    """
+    rows = []
+    for stage in (1, 2, 3):
+        subset = events[events["stage"] == stage]
+        row = {"stage": f"S{stage}", "transitions": len(subset)}
+        for h in FORWARD_HORIZONS:
+            returns = subset[f"ret_{h}"].dropna()
+            row[f"mean_ret_{h}"] = returns.mean() if len(returns) else np.nan
+            row[f"hit_rate_{h}"] = (returns > 0).mean() if len(returns) else np.nan
+        rows.append(row)
+    return pd.DataFrame(rows).set_index("stage")
+
+
+def run_backtest():
+    parser = argparse.ArgumentParser(description="Replay the Three-Track state machine over history")
+    parser.add_argument("--period", default=BACKTEST_PERIOD, help="history to replay (default 10y)")
+    parser.add_argument("--tickers", default=None, help="comma-separated tickers (default: TSE watchlist)")
+    parser.add_argument("--out", default=EVENTS_FILE, help="CSV file for transition events")
+    args = parser.parse_args()
+
+    tickers = args.tickers.split(",") if args.tickers else TSE_WATCH_LIST
+
+    print("=" * 80)
+    print(f" Three-Track Backtest | {len(tickers)} tickers | {args.period} daily bars")
+    print("=" * 80)
+
+    started = time.perf_counter()
+    frames = fetch_bars(tickers, period=args.period, interval="1d")
+    loaded = time.perf_counter()
+
+    events = backtest_universe(frames)
+    finished = time.perf_counter()
+
+    total_bars = sum(len(df) for df in frames.values())
+    print(f"Loaded {total_bars} bars in {loaded - started:.1f}s, "
+          f"replayed in {finished - loaded:.1f}s")
+    print("-" * 80)
+    print(summarize(events).to_string(float_format=lambda v: f"{v:.4f}"))
+    print("-" * 80)
+
+    events.to_csv(args.out, index=False)
+    print(f"{len(events)} transitions written to {args.out}")
+
+
+if __name__ == "__main__":
+    try:
+        run_backtest()
+    except KeyboardInterrupt:
+        print("\nBacktest stopped by user")
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+Columnar on-disk store for OHLCV bars.
+
+Each ticker and interval gets its own directory holding raw little-endian
+arrays and a small JSON header:
+
+    <root>/<interval>/<ticker>/
+        index.<gen>.i8     int64 nanoseconds (UTC when the bars carry a timezone)
+        fields.<gen>.f8    float64 (columns x rows): one contiguous row per field
+        meta.json          {"generation", "rows", "columns", "tz", "last"}
+
+Both arrays are opened with np.memmap using the shape from meta.json, so
+loading years of history is a page-cache lookup with no parsing and no
+copy, and every process reading the same ticker shares the same pages.
+
+Writes go to a new generation of files and then replace meta.json, so a
+reader always sees a complete set. Concurrent writers (the daemon next to
+a standalone watcher, or two fetches of one ticker) each claim their own
+generation number with O_EXCL and write meta through their own temp file;
+both arrays and meta are fsync'd before the rename, as in state_store.
+Generation numbers come from the nanosecond clock, so a removed generation
+is never reused under a reader still holding its meta.json.
+The rename happens under a per-ticker lock file, after comparing "last"
+(the newest bar's timestamp) with the committed frame: a writer whose
+bars end earlier drops its own generation instead of rolling the data
+back. The replaced generation is removed after the commit, and files left
+behind by crashed writers (or still mapped by a reader when the OS refused
+to delete them) are swept once older than ORPHAN_SECONDS.
+"""
+
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+META_FILE = "meta.json"
+LOCK_FILE = "commit.lock"
+LOCK_STALE_SECONDS = 30  # A commit lock held this long was left by a crashed writer
+ORPHAN_SECONDS = 3600    # Uncommitted array and temp files older than this are swept
+
+
+def ticker_dir(root, ticker, interval):
+    """Directory holding one ticker's arrays for one interval."""
+    return os.path.join(root, interval, ticker)
+
+
+def read_meta(path):
+    """meta.json of a ticker directory, or None if missing or unreadable."""
+    try:
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def open_bars(root, ticker, interval):
+    """
+    Memory-map one ticker's arrays read-only.
+
+    Returns: dict with "index" (int64 ns), one array per field and "tz",
+    or None if nothing is stored
+    """
+    path = ticker_dir(root, ticker, interval)
+    meta = read_meta(path)
+    if not meta or not meta["rows"]:
+        return None
+
+    gen, rows, columns = meta["generation"], meta["rows"], meta["columns"]
+    try:
+        index = np.memmap(os.path.join(path, f"index.{gen}.i8"), dtype="<i8", mode="r", shape=(rows,))
+        fields = np.memmap(os.path.join(path, f"fields.{gen}.f8"), dtype="<f8", mode="r",
+                           shape=(len(columns), rows))
+    except (OSError, ValueError):
+        return None  # Generation replaced between reading meta and opening files
+
+    bars = {"tz": meta["tz"], "index": index}
+    for i, col in enumerate(columns):
+        bars[col] = fields[i]
+    return bars
+
+
+def read_frame(root, ticker, interval, columns=None):
+    """
+    Load one ticker's bars as a DataFrame backed by the memory-mapped arrays.
+    The frame is read-only; derive new frames instead of writing into it.
+
+    Returns: DataFrame (empty if nothing is stored)
+    """
+    bars = open_bars(root, ticker, interval)
+    if bars is None:
+        return pd.DataFrame()
+
+    index = pd.DatetimeIndex(bars["index"].view("datetime64[ns]"))
+    if bars["tz"]:
+        index = index.tz_localize("UTC").tz_convert(bars["tz"])
+    names = [col for col in bars if col not in ("tz", "index")]
+    if columns is not None:
+        names = [col for col in columns if col in names]
+    return pd.DataFrame({col: bars[col] for col in names}, index=index, copy=False)
+
+
+def claim_generation(path, gen):
+    """
+    Reserve the first generation number >= `gen` that no other writer holds.
+    Returns: (generation, open binary file for its index array)
+    """
+    while True:
+        try:
+            flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+            fd = os.open(os.path.join(path, f"index.{gen}.i8"), flags)
+            return gen, os.fdopen(fd, "wb")
+        except FileExistsError:
+            gen += 1
+
+
+@contextmanager
+def commit_lock(path):
+    """
+    Hold a ticker directory's commit lock (a file created with O_EXCL).
+    A lock older than LOCK_STALE_SECONDS is broken.
+    """
+    lock = os.path.join(path, LOCK_FILE)
+    while True:
+        try:
+            fd = os.open(lock, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock) > LOCK_STALE_SECONDS:
+                    os.remove(lock)
+                    continue
+            except OSError:
+                continue  # Released in the meantime
+            time.sleep(0.005)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(lock)
+
+
+def write_synced(f, array):
+    """Write an array to an open file and flush it to disk."""
+    array.tofile(f)
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def write_frame(root, ticker, interval, df):
+    """
+    Store one ticker's bars as a new generation of array files.
+    Nothing changes if the committed bars already end on a later bar.
+    """
+    path = ticker_dir(root, ticker, interval)
+    os.makedirs(path, exist_ok=True)
+
+    index = df.index
+    tz = str(index.tz) if index.tz is not None else None
+    if tz:
+        index = index.tz_convert("UTC").tz_localize(None)
+    stamps = index.as_unit("ns").asi8.astype("<i8")
+    last = int(stamps[-1]) if len(stamps) else None
+
+    columns = [str(col) for col in df.columns]
+    gen, f = claim_generation(path, time.time_ns())
+    with f:
+        write_synced(f, stamps)
+    with open(os.path.join(path, f"fields.{gen}.f8"), "wb") as f:
+        write_synced(f, df.to_numpy(dtype="<f8").T.copy())
+
+    fd, tmp_path = tempfile.mkstemp(prefix=META_FILE + ".", suffix=".tmp", dir=path)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"generation": gen, "rows": len(df), "columns": columns, "tz": tz, "last": last}, f)
+        f.flush()
+        os.fsync(f.fileno())
+
+    with commit_lock(path):
+        current = read_meta(path)
+        committed_last = current.get("last") if current else None
+        replaced = current["generation"] if current else None
+        stale = committed_last is not None and (last is None or committed_last > last)
+
+        if stale or not os.path.exists(os.path.join(path, f"index.{gen}.i8")):
+            # Bars ending later are already committed (or ours were swept): keep theirs
+            for name in (tmp_path, f"index.{gen}.i8", f"fields.{gen}.f8"):
+                try:
+                    os.remove(os.path.join(path, name))
+                except FileNotFoundError:
+                    pass
+            kept, replaced = replaced, None
+        else:
+            # meta.json is the commit point: readers switch to the new generation here
+            os.replace(tmp_path, os.path.join(path, META_FILE))
+            kept = gen
+
+        remove_stale(path, kept, replaced)
+
+
+def remove_stale(path, committed, replaced=None):
+    """
+    Delete the `replaced` generation's files, and uncommitted generations
+    and meta temp files older than ORPHAN_SECONDS (left by crashed writers).
+    Generations being written by other writers are younger than that.
+    """
+    cutoff = time.time() - ORPHAN_SECONDS
+    for name in os.listdir(path):
+        parts = name.split(".")
+        if len(parts) == 3 and parts[1].isdigit():
+            if int(parts[1]) == committed:
+                continue
+            replaced_now = int(parts[1]) == replaced
+        elif name.endswith(".tmp"):
+            replaced_now = False
+        else:
+            continue
+        file_path = os.path.join(path, name)
+        try:
+            if replaced_now or os.path.getmtime(file_path) < cutoff:
+                os.remove(file_path)
+        except OSError:
+            pass  # Still mapped by a reader (Windows) or removed by another writer
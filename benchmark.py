@@ -0,0 +1,465 @@
+# -*- coding: utf-8 -*-
+"""
+Throughput benchmark for the indicators and strategies.
+
+For each watchlist size (default 40, 400 and 4,000 tickers) on synthetic
+bars, or on a bar_store recording (--data), it measures:
+    indicators   bars/second of calculate_rsi, the MACD blocks (pandas,
+                 vectorized matrix, streaming), track1_touch_lower_band and
+                 the streaming RSI / Bollinger / divergence trackers
+    strategies   tickers/second of each strategy's per-scan evaluation,
+                 cold (first scan, full history) and warm (one new bar),
+                 with the peak traced memory of the cold pass
+    scanners     tickers/second of full run_scanner passes (fetch through
+                 the replay provider, cache, screen, report)
+plus the cold-start (import) time of each strategy module.
+
+Results are printed and saved as JSON under bench_results/, and
+--compare prints the ratio against an earlier result file.
+
+Usage: python benchmark.py [--sizes 40,400,4000] [--data recordings] [--label v2] [--compare old.json]
+"""
+
+import argparse
+import contextlib
+import copy
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import bar_store
+import clock
+import state_store
+
+# ================= CONFIGURATION =================
+DEFAULT_SIZES = [40, 400, 4000]
+DAILY_BARS = 250        # About one year of daily bars per ticker
+INTRADAY_BARS = 400     # About three weeks of 15-minute bars per ticker
+STREAMING_SAMPLE = 200  # Tickers fed bar by bar to the streaming indicators (rate is per bar)
+COLD_START_RUNS = 3     # Import timings per module (the median is reported)
+END_DATE = "2026-09-30" # Last synthetic trading day
+SEED = 7
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_results")
+STRATEGY_MODULES = ["MACD_full_breakout_watcher", "3_lines_method", "rsi_macd_low_finder", "Bullish_Divergence_finder"]
+# =================================================
+
+
+def trading_days(count):
+    """The last `count` TSE trading days up to END_DATE."""
+    from tse_calendar import tse
+
+    days = []
+    day = pd.Timestamp(END_DATE).date()
+    while len(days) < count:
+        tse.ensure(day)
+        if day in tse.sessions:
+            days.append(day)
+        day -= timedelta(days=1)
+    return days[::-1]
+
+
+def bar_index(bars, interval):
+    """Timestamps of the last `bars` synthetic bars (daily: naive dates, 15m: JST session bars)."""
+    if interval == "1d":
+        return pd.DatetimeIndex(trading_days(bars))
+
+    from tse_calendar import tse
+
+    stamps = []
+    for day in trading_days(bars // 10 + 2):
+        for _, opens, closes in tse.sessions[day]:
+            t = opens
+            while t < closes:
+                stamps.append(t)
+                t += timedelta(minutes=15)
+    return pd.DatetimeIndex(stamps[-bars:]).tz_convert("Asia/Tokyo")
+
+
+def synthetic_frames(tickers, bars, interval, seed=SEED):
+    """
+    Random-walk OHLCV frames, deterministic for a given seed.
+    Returns: dict of ticker -> DataFrame
+    """
+    rng = np.random.default_rng(seed)
+    index = bar_index(bars, interval)
+    shape = (len(tickers), len(index))
+    close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.015, shape), axis=1))
+    spread = np.abs(rng.normal(0, 0.008, shape))
+    opens = close * (1 + rng.normal(0, 0.004, shape))
+    volume = rng.integers(100_000, 1_000_000, shape).astype(float)
+
+    frames = {}
+    for i, ticker in enumerate(tickers):
+        frames[ticker] = pd.DataFrame({
+            "Open": opens[i],
+            "High": np.maximum(opens[i], close[i]) * (1 + spread[i]),
+            "Low": np.minimum(opens[i], close[i]) * (1 - spread[i]),
+            "Close": close[i],
+            "Volume": volume[i],
+        }, index=index)
+    return frames
+
+
+def recorded_frames(data_dir, tickers, interval, bars):
+    """
+    Frames from a bar_store recording, cycled through to cover `tickers`.
+    Returns: dict of ticker -> DataFrame (last `bars` bars of each recording)
+    """
+    root = os.path.join(data_dir, interval)
+    names = sorted(os.listdir(root)) if os.path.isdir(root) else []
+    recordings = [bar_store.read_frame(data_dir, name, interval).copy() for name in names]
+    recordings = [df.iloc[-bars:] for df in recordings if len(df) >= 60]
+    if not recordings:
+        raise ValueError(f"No {interval} recordings with at least 60 bars in {data_dir}")
+    return {ticker: recordings[i % len(recordings)] for i, ticker in enumerate(tickers)}
+
+
+def timed(fn):
+    """Run fn() once. Returns: (seconds, result)"""
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def peak_memory(fn):
+    """Run fn() under tracemalloc. Returns: peak traced memory in MB"""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def rate(count, seconds):
+    return round(count / seconds, 1) if seconds > 0 else None
+
+
+class Harness:
+    """
+    Strategy modules with their per-ticker state rebuilt for a synthetic watchlist.
+    """
+
+    def __init__(self):
+        self.macd = importlib.import_module("MACD_full_breakout_watcher")
+        self.three = importlib.import_module("3_lines_method")
+        self.rsi_macd = importlib.import_module("rsi_macd_low_finder")
+        self.bullish = importlib.import_module("Bullish_Divergence_finder")
+        self.cache = importlib.import_module("indicator_cache").indicator_cache
+        self.latency = importlib.import_module("latency").latency
+        self.market_data = importlib.import_module("market_data")
+
+        # Fresh-state templates, taken before anything is evaluated
+        self.macd_template = copy.deepcopy(next(iter(self.macd.ticker_states.values())))
+        self.three_template = copy.deepcopy(next(iter(self.three.ticker_states.values())))
+
+    def reset(self, tickers):
+        """Give every strategy empty state for `tickers`."""
+        from indicators import BollingerBank, IncrementalMACD, IncrementalRSI
+        from scheduler import BarChangeTracker
+
+        m, t, b = self.macd, self.three, self.bullish
+        m.ticker_states = {x: copy.deepcopy(self.macd_template) for x in tickers}
+        m.macd_engines = {x: IncrementalMACD(history=m.STAGE_LOOKBACK) for x in tickers}
+        m.bar_tracker = BarChangeTracker()
+
+        t.ticker_states = {x: copy.deepcopy(self.three_template) for x in tickers}
+        t.rsi_engines = {x: IncrementalRSI(t.RSI_PERIOD, mode=t.RSI_SMOOTHING, history=10, anchored=True)
+                         for x in tickers}
+        t.bollinger = BollingerBank(tickers, t.BOLL_PERIOD, t.BOLL_STD)
+        t.bar_tracker = BarChangeTracker()
+
+        b.intraday_states = {x: b.new_intraday_state() for x in tickers}
+        b.daily_trackers = {}
+
+        self.cache.frames.clear()
+        with self.latency.lock:
+            self.latency.spans = []
+
+
+def bench_indicators(harness, daily):
+    """
+    Bars/second of each indicator over the daily frames.
+    Returns: dict of indicator -> bars/second
+    """
+    from indicator_matrix import macd_matrix, price_matrix, rsi_matrix
+    from indicators import BollingerBank, DivergenceTracker, IncrementalMACD, IncrementalRSI, calculate_rsi
+
+    tickers = list(daily)
+    total = sum(len(df) for df in daily.values())
+    sample = tickers[:STREAMING_SAMPLE]
+    closes = {x: daily[x]["Close"] for x in tickers}
+    results = {}
+
+    seconds, _ = timed(lambda: [calculate_rsi(closes[x]) for x in tickers])
+    results["calculate_rsi"] = rate(total, seconds)
+
+    def pandas_macd():
+        for x in tickers:
+            ema_fast = closes[x].ewm(span=12, adjust=False).mean()
+            ema_slow = closes[x].ewm(span=26, adjust=False).mean()
+            dif = ema_fast - ema_slow
+            dif.ewm(span=9, adjust=False).mean()
+    seconds, _ = timed(pandas_macd)
+    results["macd_pandas"] = rate(total, seconds)
+
+    _, close = price_matrix(daily, "Close", tickers)
+    seconds, _ = timed(lambda: macd_matrix(close))
+    results["macd_matrix"] = rate(close.size, seconds)
+    seconds, _ = timed(lambda: rsi_matrix(close))
+    results["rsi_matrix"] = rate(close.size, seconds)
+
+    # Streaming engines, one bar at a time on a sample of tickers
+    _, sample_close = price_matrix(daily, "Close", sample)
+    _, sample_low = price_matrix(daily, "Low", sample)
+    sample_hist = macd_matrix(sample_close)[2]
+    sample_bars = sample_close.size
+
+    def streaming(factory, feed):
+        for j in range(len(sample)):
+            engine = factory()
+            for i in range(len(sample_close)):
+                feed(engine, i, j)
+    seconds, _ = timed(lambda: streaming(IncrementalMACD, lambda e, i, j: e.update(sample_close[i, j])))
+    results["macd_streaming"] = rate(sample_bars, seconds)
+    seconds, _ = timed(lambda: streaming(IncrementalRSI, lambda e, i, j: e.update(sample_close[i, j])))
+    results["rsi_streaming"] = rate(sample_bars, seconds)
+    seconds, _ = timed(lambda: streaming(DivergenceTracker,
+                                         lambda e, i, j: e.update(sample_low[i, j], sample_hist[i, j])))
+    results["divergence_streaming"] = rate(sample_bars, seconds)
+
+    # All tickers advance together, one vectorized update per bar
+    bank = BollingerBank(tickers)
+    seconds, _ = timed(lambda: [bank.update(row) for row in close])
+    results["bollinger_bank"] = rate(close.size, seconds)
+
+    # Full track 1 as the live scanner calls it (bands synced from scratch per ticker)
+    harness.reset(tickers)
+    seconds, _ = timed(lambda: [harness.three.track1_touch_lower_band(x, daily[x]) for x in tickers])
+    results["track1_touch_lower_band"] = rate(total, seconds)
+    return results
+
+
+def bench_strategies(harness, daily, intraday):
+    """
+    Tickers/second per strategy: a cold scan on all but the last bar, then a
+    warm scan that adds the last bar. Peak memory is traced on a second cold scan.
+    Returns: dict of strategy -> metrics
+    """
+    tickers = list(daily)
+    h = harness
+    strategies = {
+        "macd_full_breakout": (intraday, lambda x, df: h.macd.evaluate(x, df)),
+        "three_tracks": (daily, lambda x, df: h.three.evaluate(x, df)),
+        "bullish_divergence": (daily, lambda x, df: h.bullish.detect_bullish_divergence_low(x, df)),
+        "bullish_divergence_15m": (intraday, lambda x, df: h.bullish.evaluate_intraday(x, df)),
+    }
+
+    results = {}
+    for name, (frames, evaluate) in strategies.items():
+        cold = {x: df.iloc[:-1] for x, df in frames.items()}
+
+        def scan(batch):
+            for x in tickers:
+                evaluate(x, batch[x])
+
+        h.reset(tickers)
+        cold_seconds, _ = timed(lambda: scan(cold))
+        warm_seconds, _ = timed(lambda: scan(frames))
+        h.reset(tickers)
+        peak = peak_memory(lambda: scan(cold))
+        results[name] = {
+            "tickers_per_s_cold": rate(len(tickers), cold_seconds),
+            "tickers_per_s_warm": rate(len(tickers), warm_seconds),
+            "peak_mb": round(peak, 1),
+        }
+
+    # Vectorized screen: one pass over the whole watchlist
+    h.reset(tickers)
+    seconds, _ = timed(lambda: h.rsi_macd.screen_tickers(daily, tickers))
+    peak = peak_memory(lambda: h.rsi_macd.screen_tickers(daily, tickers))
+    results["rsi_macd_low"] = {"tickers_per_s_cold": rate(len(tickers), seconds), "peak_mb": round(peak, 1)}
+    return results
+
+
+def bench_scanners(harness, daily, work_dir):
+    """
+    Tickers/second of full run_scanner passes over a replay recording:
+    first with an empty bar cache, then with the cache warm.
+    Returns: dict of scanner -> metrics
+    """
+    from data_providers import ReplayProvider
+
+    tickers = list(daily)
+    recording = os.path.join(work_dir, f"recording_{len(tickers)}")
+    for x, df in daily.items():
+        bar_store.write_frame(recording, x, "1d", df)
+
+    md = harness.market_data
+    previous_provider = md.set_provider(ReplayProvider(recording))
+    previous_clock = clock.install(clock.SimulatedClock(pd.Timestamp(END_DATE) + pd.Timedelta(hours=16)))
+    results = {}
+    try:
+        for name, module in (("rsi_macd_low", harness.rsi_macd), ("bullish_divergence", harness.bullish)):
+            md.CACHE_DIR = os.path.join(work_dir, f"cache_{name}_{len(tickers)}")
+            module.WATCH_LIST = tickers
+            harness.reset(tickers)
+            with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+                cold_seconds, _ = timed(module.run_scanner)
+                warm_seconds, _ = timed(module.run_scanner)
+            results[name] = {
+                "tickers_per_s_cold_cache": rate(len(tickers), cold_seconds),
+                "tickers_per_s_warm_cache": rate(len(tickers), warm_seconds),
+            }
+    finally:
+        md.set_provider(previous_provider)
+        clock.install(previous_clock)
+    return results
+
+
+def cold_start():
+    """
+    Median seconds to import each strategy module in a fresh interpreter,
+    net of the interpreter's own startup.
+    Returns: dict of module -> seconds
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    def run(code):
+        samples = []
+        for _ in range(COLD_START_RUNS):
+            seconds, _ = timed(lambda: subprocess.run([sys.executable, "-c", code], cwd=here, check=True,
+                                                      stdout=subprocess.DEVNULL))
+            samples.append(seconds)
+        return float(np.median(samples))
+
+    baseline = run("pass")
+    return {
+        module: round(run(f"import importlib; importlib.import_module({module!r})") - baseline, 3)
+        for module in STRATEGY_MODULES
+    }
+
+
+def git_version():
+    """Short commit hash of the working tree, or None outside git."""
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results):
+    print("=" * 80)
+    print(f" Benchmark {results['label']} ({results['version']}) | Python {results['python']}")
+    print("=" * 80)
+    print(" Cold start (import, s): " + ", ".join(f"{m}={s:.2f}" for m, s in results["cold_start_s"].items()))
+    for size, section in results["sizes"].items():
+        print(f"\n {size} tickers")
+        print("  Indicators (bars/s): " + ", ".join(f"{k}={v:,.0f}" for k, v in section["indicators"].items()))
+        for name, metrics in section["strategies"].items():
+            print(f"  {name:<24} " + " | ".join(f"{k}={v:,}" for k, v in metrics.items()))
+        for name, metrics in section["scanners"].items():
+            print(f"  run_scanner {name:<12} " + " | ".join(f"{k}={v:,}" for k, v in metrics.items()))
+    print("=" * 80)
+
+
+def compare(results, baseline):
+    """Print new/old ratios for every metric present in both result files."""
+    print(f"\n Compared with {baseline['label']} ({baseline['version']}): ratio > 1 is faster / larger")
+    for size, section in results["sizes"].items():
+        old = baseline["sizes"].get(size)
+        if not old:
+            continue
+        for group in ("indicators", "strategies", "scanners"):
+            for name, value in section[group].items():
+                before = old.get(group, {}).get(name)
+                if before is None:
+                    continue
+                pairs = value.items() if isinstance(value, dict) else [("bars_per_s", value)]
+                for metric, new_value in pairs:
+                    old_value = before.get(metric) if isinstance(before, dict) else before
+                    if new_value and old_value:
+                        print(f"  {size:>5} {group:<10} {name:<24} {metric:<26} x{new_value / old_value:.2f}")
+
+
+def run_benchmark(sizes, data_dir=None, label=None):
+    """
+    Run every benchmark for each watchlist size.
+    Returns: results dict (as saved to JSON)
+    """
+    work_dir = tempfile.mkdtemp(prefix="bench_")
+    # Latency logs and snapshot paths are fixed at import; keep them out of state/
+    state_store.STATE_DIR = os.path.join(work_dir, "state")
+    harness = Harness()
+    notifier = importlib.import_module("notifier")
+    notifier.DRY_RUN = True
+
+    version = git_version()
+    results = {
+        "label": label or version or datetime.now().strftime("%Y%m%d_%H%M%S"),
+        "version": version,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "data": data_dir or "synthetic",
+        "config": {"daily_bars": DAILY_BARS, "intraday_bars": INTRADAY_BARS, "streaming_sample": STREAMING_SAMPLE},
+        "cold_start_s": cold_start(),
+        "sizes": {},
+    }
+
+    for size in sizes:
+        tickers = [f"{1000 + i}.T" for i in range(size)]
+        if data_dir:
+            daily = recorded_frames(data_dir, tickers, "1d", DAILY_BARS)
+            intraday = recorded_frames(data_dir, tickers, "15m", INTRADAY_BARS)
+        else:
+            daily = synthetic_frames(tickers, DAILY_BARS, "1d")
+            intraday = synthetic_frames(tickers, INTRADAY_BARS, "15m", seed=SEED + 1)
+
+        print(f"[{datetime.now():%H:%M:%S}] {size} tickers...")
+        results["sizes"][str(size)] = {
+            "indicators": bench_indicators(harness, daily),
+            "strategies": bench_strategies(harness, daily, intraday),
+            "scanners": bench_scanners(harness, daily, work_dir),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Indicator and scan throughput benchmark")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated watchlist sizes")
+    parser.add_argument("--data", help="bar_store recording to use instead of synthetic bars")
+    parser.add_argument("--label", help="name of this run (default: git commit)")
+    parser.add_argument("--out", help=f"result file (default: {RESULTS_DIR}/<label>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    try:
+        results = run_benchmark([int(s) for s in args.sizes.split(",")], args.data, args.label)
+        print_results(results)
+
+        out = args.out or os.path.join(RESULTS_DIR, f"{results['label']}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved {out}")
+
+        if args.compare:
+            with open(args.compare, encoding="utf-8") as f:
+                compare(results, json.load(f))
+    except KeyboardInterrupt:
+        print("\nProcess stopped by user")
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Process-wide clock used by the watchers, the scheduler and the calendar.
+
+Live runs use the system clock. A replay installs a SimulatedClock
+instead: now() returns simulated JST time and sleep() advances it
+immediately, so a trading week of scans runs as fast as the bars can be
+evaluated. Sleeping past the simulated end raises ClockStopped, which
+ends the otherwise endless watcher loops.
+"""
+
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+JST = ZoneInfo("Asia/Tokyo")
+
+
+class ClockStopped(Exception):
+    """Raised when a simulated clock is advanced past its end."""
+
+
+class SystemClock:
+    """Wall-clock time in JST."""
+
+    def now(self):
+        return datetime.now(JST)
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class SimulatedClock:
+    """
+    Clock that only moves when slept on.
+    Args:
+        start: first simulated instant (naive = JST)
+        end: optional last instant; sleeping past it raises ClockStopped
+    """
+
+    def __init__(self, start, end=None):
+        self.current = as_jst(start)
+        self.end = as_jst(end) if end is not None else None
+
+    def now(self):
+        return self.current
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.current += timedelta(seconds=seconds)
+        if self.end is not None and self.current > self.end:
+            raise ClockStopped(f"Simulated clock passed {self.end:%Y-%m-%d %H:%M}")
+
+
+def as_jst(moment):
+    """Datetime (or pandas Timestamp) as an aware JST datetime; naive values are taken as JST."""
+    if hasattr(moment, "to_pydatetime"):
+        moment = moment.to_pydatetime()
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=JST)
+    return moment.astimezone(JST)
+
+
+# The active clock; replace with install()
+current = SystemClock()
+
+
+def install(new_clock):
+    """
+    Make `new_clock` the process-wide clock.
+    Returns: the previously installed clock
+    """
+    global current
+    previous, current = current, new_clock
+    return previous
+
+
+def now():
+    """Current time (JST, timezone-aware) on the active clock."""
+    return current.now()
+
+
+def sleep(seconds):
+    """Sleep on the active clock."""
+    current.sleep(seconds)
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Pluggable upstream bar sources for market_data.
+
+A provider answers two calls, with the semantics of yfinance:
+    download_batch(tickers, period, interval, start=None) -> dict of ticker -> DataFrame
+    download_ticker(ticker, period, interval, start=None) -> DataFrame
+Intraday frames keep their exchange timezone, daily frames are tz-naive,
+and columns are Open/High/Low/Close/Volume.
+
+YahooProvider is the live source. ReplayProvider serves recorded bars
+from a bar_store directory (a copy of bar_cache/ is a recording) and
+only returns bars that have closed at the active clock's current time,
+so a SimulatedClock replays history bar by bar, deterministically.
+"""
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+import bar_store
+import clock
+
+# ================= CONFIGURATION =================
+FETCH_TIMEOUT = 10  # Seconds before an upstream request is abandoned
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+DAILY_CLOSE = pd.Timedelta(hours=15, minutes=30)  # Replayed daily bars are published at the close (JST)
+# =================================================
+
+
+def period_offset(period):
+    """
+    Convert a yfinance period string ("5d", "1mo", "3mo", "1y") to a DateOffset.
+    """
+    if period.endswith("mo"):
+        return pd.DateOffset(months=int(period[:-2]))
+    if period.endswith("wk"):
+        return pd.DateOffset(weeks=int(period[:-2]))
+    if period.endswith("d"):
+        return pd.DateOffset(days=int(period[:-1]))
+    if period.endswith("y"):
+        return pd.DateOffset(years=int(period[:-1]))
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def split_batch(data, tickers):
+    """
+    Slice a batched yf.download result into per-ticker OHLCV frames.
+
+    Args:
+        data: DataFrame returned by yf.download(..., group_by="ticker")
+        tickers: tickers that were requested
+    Returns:
+        dict of ticker -> DataFrame (empty if the ticker returned no bars)
+    """
+    frames = {}
+    is_multi = isinstance(data.columns, pd.MultiIndex)
+    available = set(data.columns.get_level_values(0)) if is_multi else set()
+
+    for ticker in tickers:
+        if is_multi and ticker in available:
+            df = data[ticker]
+        elif not is_multi and len(tickers) == 1:
+            df = data
+        else:
+            df = pd.DataFrame()
+
+        # Rows where this ticker has no bar at all (failed or not yet listed)
+        frames[ticker] = df.dropna(how="all")
+
+    return frames
+
+
+class YahooProvider:
+    """
+    Live bars from Yahoo Finance.
+    """
+
+    def download_batch(self, tickers, period, interval, start=None):
+        """
+        Download OHLCV bars for a whole watchlist in one request.
+
+        Args:
+            tickers: list of ticker symbols
+            period: yfinance period string (e.g. "3mo"), ignored when start is given
+            interval: yfinance interval string (e.g. "1d", "15m")
+            start: only fetch bars from this timestamp onwards
+        Returns:
+            dict of ticker -> DataFrame with Open/High/Low/Close/Volume columns
+        """
+        tickers = list(tickers)
+        if not tickers:
+            return {}
+
+        window = {"start": start} if start is not None else {"period": period}
+        data = yf.download(
+            tickers,
+            interval=interval,
+            group_by="ticker",
+            progress=False,
+            auto_adjust=True,
+            threads=True,
+            timeout=FETCH_TIMEOUT,
+            **window
+        )
+
+        return split_batch(data, tickers)
+
+    def download_ticker(self, ticker, period, interval, start=None):
+        """
+        Download OHLCV bars for one ticker (used by the concurrent path).
+
+        Index and columns match a slice of download_batch: intraday bars keep
+        their exchange timezone, daily and longer bars are tz-naive.
+        """
+        window = {"start": start} if start is not None else {"period": period}
+        df = yf.Ticker(ticker).history(
+            interval=interval,
+            auto_adjust=True,
+            timeout=FETCH_TIMEOUT,
+            **window
+        )
+        if df.empty:
+            return pd.DataFrame()
+
+        df = df[[col for col in OHLCV_COLUMNS if col in df.columns]]
+        if not interval.endswith(("m", "h")) and df.index.tz is not None:
+            df.index = df.index.tz_localize(None)
+        return df
+
+
+class ReplayProvider:
+    """
+    Recorded bars served under the active clock.
+
+    Each ticker's recording is loaded into memory once. A bar is visible
+    once it has closed: intraday bars at start + interval, daily bars at
+    DAILY_CLOSE JST on their date. The still-forming bar is never served.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.recordings = {}
+
+    def recording(self, ticker, interval):
+        """
+        (frame, int64 ns instant each bar is published) for one ticker.
+        """
+        key = (ticker, interval)
+        if key not in self.recordings:
+            # Copy out of the memory map so the recording can't change under a replay
+            df = bar_store.read_frame(self.root, ticker, interval).copy()
+            if df.empty:
+                published = np.empty(0, dtype=np.int64)
+            elif interval.endswith(("m", "h")):
+                published = (df.index + pd.Timedelta(interval.replace("m", "min"))).as_unit("ns").asi8
+            else:
+                published = (df.index + DAILY_CLOSE).tz_localize(clock.JST).as_unit("ns").asi8
+            self.recordings[key] = (df, published)
+        return self.recordings[key]
+
+    def download_ticker(self, ticker, period, interval, start=None):
+        df, published = self.recording(ticker, interval)
+        visible = df.iloc[:np.searchsorted(published, pd.Timestamp(clock.now()).value, side="right")]
+        if visible.empty:
+            return pd.DataFrame()
+
+        if start is not None:
+            start = pd.Timestamp(start)
+            if visible.index.tz is not None and start.tzinfo is None:
+                start = start.tz_localize(visible.index.tz)
+            return visible[visible.index >= start]
+        return visible[visible.index >= visible.index[-1] - period_offset(period)]
+
+    def download_batch(self, tickers, period, interval, start=None):
+        return {ticker: self.download_ticker(ticker, period, interval, start=start) for ticker in tickers}
+
+
+def record(tickers, period, interval, root, provider=None):
+    """
+    Save live bars as a replay recording (bar_store layout under `root`).
+    Returns: number of tickers recorded
+    """
+    frames = (provider or YahooProvider()).download_batch(tickers, period, interval)
+    recorded = 0
+    for ticker, df in frames.items():
+        if not df.empty:
+            bar_store.write_frame(root, ticker, interval, df)
+            recorded += 1
+    return recorded
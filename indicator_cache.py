@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Per-frame memoization of indicator series.
+
+Values are keyed by (ticker, frame, indicator, params). A frame is
+identified by its window (length, first and last timestamp) plus a hash
+of its contents, so a revised in-progress bar, a split/dividend
+adjustment or a backfilled bar in mid-frame all invalidate it. Close
+extraction, SMA/std, RSI and MACD are therefore computed at most once per
+bar, no matter how many tracks or strategies read them. The latest frame
+of each window is kept, for up to MAX_WINDOWS windows per ticker, so
+strategies trimming the same bars to different periods don't evict each
+other.
+"""
+
+import pandas as pd
+
+from indicators import calculate_rsi
+
+# ================= CONFIGURATION =================
+MAX_WINDOWS = 4  # Frames kept per ticker (one per distinct window)
+# =================================================
+
+
+def frame_window(df):
+    """Window of a bar frame: (length, first ts, last ts)."""
+    if df.empty:
+        return (0,)
+    return (len(df), df.index[0], df.index[-1])
+
+
+def frame_hash(df):
+    """Hash of a frame's index and column values (raw bytes, no per-row hashing)."""
+    columns = (df[col].to_numpy().tobytes() for col in df.columns)
+    return hash((df.index.asi8.tobytes(), *columns))
+
+
+class IndicatorCache:
+    """
+    Memoized indicator series for the latest frames of each ticker.
+    """
+
+    def __init__(self):
+        # ticker -> {window: (frame, content hash, {(indicator, params): value})}, oldest window first
+        self.frames = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, ticker, df, indicator, params, compute):
+        """
+        Return the cached value for (ticker, frame, indicator, params),
+        calling compute() only on a miss.
+        """
+        window = frame_window(df)
+        windows = self.frames.setdefault(ticker, {})
+        entry = windows.pop(window, None)
+        # The same frame object is only hashed once (frames are never modified in place)
+        if entry is None or entry[0] is not df:
+            content = frame_hash(df)
+            if entry is None or entry[1] != content:
+                # New, revised or adjusted bars: drop everything computed on the old frame
+                entry = (df, content, {})
+            else:
+                entry = (df, content, entry[2])
+        windows[window] = entry
+        if len(windows) > MAX_WINDOWS:
+            del windows[next(iter(windows))]
+
+        values = entry[2]
+        slot = (indicator, params)
+        if slot in values:
+            self.hits += 1
+        else:
+            self.misses += 1
+            values[slot] = compute()
+        return values[slot]
+
+    def column(self, ticker, df, field):
+        """OHLCV column as a Series (handles single-ticker MultiIndex frames)."""
+        def compute():
+            col = df[field]
+            return col.iloc[:, 0] if isinstance(col, pd.DataFrame) else col
+        return self.get(ticker, df, "column", (field,), compute)
+
+    def sma(self, ticker, df, period, field="Close"):
+        """Simple moving average: rolling(period).mean()"""
+        return self.get(ticker, df, "sma", (field, period),
+                        lambda: self.column(ticker, df, field).rolling(window=period).mean())
+
+    def rolling_std(self, ticker, df, period, field="Close"):
+        """Rolling sample standard deviation: rolling(period).std()"""
+        return self.get(ticker, df, "std", (field, period),
+                        lambda: self.column(ticker, df, field).rolling(window=period).std())
+
+    def rsi(self, ticker, df, period):
+        """RSI series (calculate_rsi)"""
+        return self.get(ticker, df, "rsi", (period,),
+                        lambda: calculate_rsi(self.column(ticker, df, "Close"), period))
+
+    def ema(self, ticker, df, span, field="Close"):
+        """ewm(span=span, adjust=False).mean()"""
+        return self.get(ticker, df, "ema", (field, span),
+                        lambda: self.column(ticker, df, field).ewm(span=span, adjust=False).mean())
+
+    def macd(self, ticker, df, fast=12, slow=26, signal=9):
+        """
+        MACD lines.
+        Returns: (dif, dea) series
+        """
+        def compute():
+            dif = self.ema(ticker, df, fast) - self.ema(ticker, df, slow)
+            dea = dif.ewm(span=signal, adjust=False).mean()
+            return dif, dea
+        return self.get(ticker, df, "macd", (fast, slow, signal), compute)
+
+
+# Shared by every strategy loaded in the same process
+indicator_cache = IndicatorCache()
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorized indicators over a (bars x tickers) price matrix.
+
+Every function works on a 2-D float array with one column per ticker, so a
+whole universe is computed in one pass instead of one pandas call per ticker.
+Rows are bar positions aligned on the latest bar (row -1 is every ticker's
+most recent bar); shorter histories are NaN-padded at the top. Columns are
+independent, so each column gives the same numbers as the per-ticker pandas
+code in the scanners.
+"""
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def price_matrix(frames, field="Close", tickers=None):
+    """
+    Stack one OHLCV field of many tickers into a (bars x tickers) matrix.
+
+    Args:
+        frames: dict of ticker -> DataFrame
+        field: column to stack (e.g. "Close", "Low")
+        tickers: column order (default: frames order, empty frames skipped)
+    Returns:
+        (list: tickers, ndarray: matrix aligned on the latest bar)
+    """
+    if tickers is None:
+        tickers = [t for t, df in frames.items() if not df.empty]
+
+    columns = []
+    for ticker in tickers:
+        col = frames[ticker][field]
+        col = col.iloc[:, 0] if isinstance(col, pd.DataFrame) else col
+        columns.append(col.to_numpy(dtype=float))
+
+    n_bars = max((len(c) for c in columns), default=0)
+    matrix = np.full((n_bars, len(columns)), np.nan)
+    for j, col in enumerate(columns):
+        if len(col):
+            matrix[n_bars - len(col):, j] = col
+
+    return list(tickers), matrix
+
+
+def ewm_matrix(x, span):
+    """
+    Column-wise ewm(span=span, adjust=False).mean().
+    Same recurrence as pandas, so each column matches it bit-for-bit.
+    """
+    alpha = 1.0 / (1.0 + (span - 1) / 2.0)
+    old_wt_factor = 1.0 - alpha
+
+    out = np.empty_like(x, dtype=float)
+    weighted = x[0].astype(float)
+    old_wt = np.ones(x.shape[1])
+    out[0] = weighted
+
+    for i in range(1, x.shape[0]):
+        cur = x[i]
+        has_value = weighted == weighted
+        is_obs = cur == cur
+
+        old_wt = np.where(has_value, old_wt * old_wt_factor, old_wt)
+        with np.errstate(invalid="ignore"):
+            blended = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+        update = has_value & is_obs & (weighted != cur)
+        weighted = np.where(update, blended, weighted)
+        old_wt = np.where(has_value & is_obs, 1.0, old_wt)
+        # First observation of a column seeds the average
+        weighted = np.where(~has_value & is_obs, cur, weighted)
+        out[i] = weighted
+
+    return out
+
+
+def macd_matrix(close, fast=12, slow=26, signal=9):
+    """
+    MACD for every column.
+    Returns: (dif, dea, histogram) with histogram = dif - dea
+    """
+    dif = ewm_matrix(close, fast) - ewm_matrix(close, slow)
+    dea = ewm_matrix(dif, signal)
+    return dif, dea, dif - dea
+
+
+def rolling_mean_matrix(x, window):
+    """Column-wise rolling(window).mean(); NaN until the window is full."""
+    out = np.full(x.shape, np.nan)
+    if x.shape[0] >= window:
+        out[window - 1:] = sliding_window_view(x, window, axis=0).mean(axis=-1)
+    return out
+
+
+def rolling_std_matrix(x, window):
+    """Column-wise rolling(window).std() (sample std, ddof=1)."""
+    out = np.full(x.shape, np.nan)
+    if x.shape[0] >= window:
+        out[window - 1:] = sliding_window_view(x, window, axis=0).std(axis=-1, ddof=1)
+    return out
+
+
+def rsi_matrix(close, period=14):
+    """
+    Column-wise RSI with the same simple-moving-average definition as
+    indicators.calculate_rsi.
+    """
+    delta = np.full(close.shape, np.nan)
+    delta[1:] = close[1:] - close[:-1]
+
+    with np.errstate(invalid="ignore"):
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = -np.where(delta < 0, delta, 0.0)
+    # Padding rows carry no bar (the first real bar still counts as 0 change)
+    missing = np.isnan(close)
+    gain[missing] = np.nan
+    loss[missing] = np.nan
+
+    avg_gain = rolling_mean_matrix(gain, period)
+    avg_loss = rolling_mean_matrix(loss, period)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+
+def bollinger_matrix(close, period=20, num_std=2):
+    """
+    Bollinger bands for every column.
+    Returns: (sma, upper_band, lower_band)
+    """
+    sma = rolling_mean_matrix(close, period)
+    std = rolling_std_matrix(close, period)
+    return sma, sma + num_std * std, sma - num_std * std
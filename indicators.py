@@ -0,0 +1,701 @@
+# -*- coding: utf-8 -*-
+"""
+Indicator engines shared by the scanners.
+
+calculate_rsi is the shared pandas RSI used by the scanners. The classes
+keep per-ticker state between scans so a new (or revised) bar costs O(1)
+instead of recomputing the whole series with pandas.
+"""
+
+import math
+from collections import deque
+
+import numpy as np
+
+
+def calculate_rsi(prices, period=14):
+    """
+    Calculate RSI indicator (simple moving average of gains and losses)
+    Args:
+        prices: price series
+        period: RSI period (default 14)
+    Returns:
+        RSI series
+    """
+    delta = prices.diff()
+    gain = delta.where(delta > 0, 0).rolling(window=period).mean()
+    loss = -delta.where(delta < 0, 0).rolling(window=period).mean()
+
+    rs = gain / loss
+    rsi = 100 - (100 / (1 + rs))
+    return rsi
+
+
+class EMA:
+    """
+    Exponential moving average matching pandas ewm(span=N, adjust=False).mean().
+
+    Uses the same recurrence as pandas (including the normalisation by
+    old_wt + new_wt), so replaying a series reproduces pandas bit-for-bit.
+    """
+
+    def __init__(self, span):
+        com = (span - 1) / 2.0
+        self.alpha = 1.0 / (1.0 + com)
+        self.old_wt_factor = 1.0 - self.alpha
+        self.value = math.nan
+        self.old_wt = 1.0
+
+    def update(self, x):
+        """Feed one observation and return the new EMA value."""
+        weighted = self.value
+        if weighted != weighted:  # No observation yet
+            if x == x:
+                self.value = x
+            return self.value
+
+        self.old_wt *= self.old_wt_factor
+        if x == x:
+            if weighted != x:
+                weighted = self.old_wt * weighted + self.alpha * x
+                weighted /= (self.old_wt + self.alpha)
+            self.old_wt = 1.0
+            self.value = weighted
+        return self.value
+
+    def get_state(self):
+        return (self.value, self.old_wt)
+
+    def set_state(self, state):
+        self.value, self.old_wt = state
+
+
+class IncrementalMACD:
+    """
+    Stateful MACD(12, 26, 9) for one ticker.
+
+    update() appends a closed bar, revise() replaces the last bar (the
+    in-progress candle) and sync() catches up with a close series that
+    shares timestamps with what was already fed. All three are O(1) per bar.
+    The last `history` DIF/DEA values are kept for lookback checks.
+    """
+
+    def __init__(self, fast=12, slow=26, signal=9, history=100):
+        self.ema_fast = EMA(fast)
+        self.ema_slow = EMA(slow)
+        self.ema_signal = EMA(signal)
+        self.dif_history = deque(maxlen=history)
+        self.dea_history = deque(maxlen=history)
+        self.last_ts = None
+        self.dif = math.nan
+        self.dea = math.nan
+        self._prev_state = None
+        self._prev_dropped = None
+
+    def reset(self):
+        """Drop all state (next bar starts a fresh series)."""
+        for ema in (self.ema_fast, self.ema_slow, self.ema_signal):
+            ema.set_state((math.nan, 1.0))
+        self.dif_history.clear()
+        self.dea_history.clear()
+        self.last_ts = None
+        self.dif = math.nan
+        self.dea = math.nan
+        self._prev_state = None
+        self._prev_dropped = None
+
+    def update(self, close, ts=None):
+        """
+        Append a new bar.
+        Returns: (dif, dea)
+        """
+        self._prev_state = (
+            self.ema_fast.get_state(),
+            self.ema_slow.get_state(),
+            self.ema_signal.get_state(),
+            self.dif,
+            self.dea,
+        )
+        full = len(self.dif_history) == self.dif_history.maxlen
+        self._prev_dropped = (self.dif_history[0], self.dea_history[0]) if full else None
+
+        self.dif = self.ema_fast.update(close) - self.ema_slow.update(close)
+        self.dea = self.ema_signal.update(self.dif)
+        self.dif_history.append(self.dif)
+        self.dea_history.append(self.dea)
+        self.last_ts = ts
+        return self.dif, self.dea
+
+    def revise(self, close):
+        """
+        Replace the last bar (e.g. the in-progress candle got a new close).
+        Returns: (dif, dea)
+        """
+        if self._prev_state is None:
+            raise ValueError("No bar to revise")
+
+        fast, slow, signal, self.dif, self.dea = self._prev_state
+        self.ema_fast.set_state(fast)
+        self.ema_slow.set_state(slow)
+        self.ema_signal.set_state(signal)
+        self.dif_history.pop()
+        self.dea_history.pop()
+        if self._prev_dropped is not None:
+            self.dif_history.appendleft(self._prev_dropped[0])
+            self.dea_history.appendleft(self._prev_dropped[1])
+
+        return self.update(close, self.last_ts)
+
+    def sync(self, close_series):
+        """
+        Catch up with a close series indexed by bar timestamp.
+
+        The bar at the last timestamp already fed is revised and only newer
+        bars are appended. If that timestamp is no longer in the series, the
+        whole series is replayed.
+        Returns: (dif, dea)
+        """
+        index = close_series.index
+        values = close_series.to_numpy(dtype=float)
+
+        if self.last_ts is not None and self.last_ts in index:
+            pos = index.get_loc(self.last_ts)
+            self.revise(float(values[pos]))
+            start = pos + 1
+        else:
+            self.reset()
+            start = 0
+
+        for i in range(start, len(values)):
+            self.update(float(values[i]), index[i])
+
+        return self.dif, self.dea
+
+
+def ieee_divide(a, b):
+    """a / b with numpy semantics for zero divisors (+-inf or NaN, no exception)."""
+    if b == 0:
+        if a != a or a == 0:
+            return math.nan
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+class RollingMean:
+    """
+    Streaming rolling(window).mean() over a ring buffer of the last `window` values.
+
+    Replays pandas' own arithmetic: Kahan-compensated running sums with
+    separate compensation for adds and removes, the count of negative
+    values (which clamps results of the wrong sign to zero) and the run of
+    identical values (which returns that value exactly). Fed the same
+    series from the same first value, results are bit-for-bit identical.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.buffer = [math.nan] * window
+        self.pos = 0
+        self.count = 0
+        self.nobs = 0
+        self.sum = 0.0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.neg_ct = 0
+        self.same_run = 0
+        self.prev = math.nan
+
+    def update(self, x):
+        """Push one value (dropping the oldest once the window is full) and return the mean."""
+        if self.count >= self.window:
+            self._remove(self.buffer[self.pos])
+        elif self.count == 0:
+            self.prev = x  # pandas seeds the run check with the first value
+        self.buffer[self.pos] = x
+        self.pos = (self.pos + 1) % self.window
+        self.count += 1
+        self._add(x)
+        return self.mean()
+
+    def _add(self, x):
+        if x != x:
+            return
+        self.nobs += 1
+        y = x - self.comp_add
+        t = self.sum + y
+        self.comp_add = t - self.sum - y
+        self.sum = t
+        if math.copysign(1.0, x) < 0:
+            self.neg_ct += 1
+
+        if x == self.prev:
+            self.same_run += 1
+        else:
+            self.same_run = 1
+        self.prev = x
+
+    def _remove(self, x):
+        if x != x:
+            return
+        self.nobs -= 1
+        y = -x - self.comp_remove
+        t = self.sum + y
+        self.comp_remove = t - self.sum - y
+        self.sum = t
+        if math.copysign(1.0, x) < 0:
+            self.neg_ct -= 1
+
+    def mean(self):
+        if self.nobs < self.window or self.nobs == 0:
+            return math.nan
+        if self.same_run >= self.nobs:
+            return self.prev
+        result = self.sum / self.nobs
+        if self.neg_ct == 0 and result < 0:
+            return 0.0
+        if self.neg_ct == self.nobs and result > 0:
+            return 0.0
+        return result
+
+    def get_state(self):
+        """Scalar state plus the ring slot the next update overwrites (O(1) snapshot)."""
+        return (self.buffer[self.pos], self.pos, self.count, self.nobs, self.sum,
+                self.comp_add, self.comp_remove, self.neg_ct, self.same_run, self.prev)
+
+    def set_state(self, state):
+        (slot, self.pos, self.count, self.nobs, self.sum,
+         self.comp_add, self.comp_remove, self.neg_ct, self.same_run, self.prev) = state
+        self.buffer[self.pos] = slot
+
+
+class WilderMean:
+    """
+    Wilder smoothing: the simple mean of the first `period` values, then
+    avg = (avg * (period - 1) + x) / period.
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self.count = 0
+        self.value = 0.0
+
+    def update(self, x):
+        self.count += 1
+        if self.count <= self.period:
+            self.value += x
+            if self.count < self.period:
+                return math.nan
+            self.value /= self.period
+        else:
+            self.value = (self.value * (self.period - 1) + x) / self.period
+        return self.value
+
+    def get_state(self):
+        return (self.count, self.value)
+
+    def set_state(self, state):
+        self.count, self.value = state
+
+
+class IncrementalRSI:
+    """
+    Stateful RSI for one ticker, O(1) per bar.
+
+    mode="sma" averages gains and losses with RollingMean and matches
+    calculate_rsi bit-for-bit when fed the same series (including the
+    zero gain / -0.0 loss pandas assigns to the first bar).
+    mode="wilder" uses Wilder smoothing, starting from the first price change.
+
+    update(), revise() and sync() work as in IncrementalMACD. The last
+    `history` RSI values are kept for lookback checks.
+
+    The rolling sums carry rounding from every bar fed since the start, so
+    an engine that has run longer than a sliding download window differs
+    from calculate_rsi over that window in the last bits. With
+    anchored=True, sync() replays the series whenever its first bar
+    changes (once a day for a daily window), and the values are exactly
+    those of calculate_rsi over the series passed in.
+    """
+
+    def __init__(self, period=14, mode="sma", history=100, anchored=False):
+        if mode not in ("sma", "wilder"):
+            raise ValueError(f"Unknown RSI mode: {mode}")
+        self.period = period
+        self.mode = mode
+        self.anchored = anchored
+        self.first_ts = None
+        averager = RollingMean if mode == "sma" else WilderMean
+        self.avg_gain = averager(period)
+        self.avg_loss = averager(period)
+        self.history = deque(maxlen=history)
+        self.prev_close = math.nan
+        self.last_ts = None
+        self.value = math.nan
+        self._prev_state = None
+        self._prev_dropped = None
+
+    def reset(self):
+        """Drop all state (next bar starts a fresh series)."""
+        self.__init__(self.period, self.mode, self.history.maxlen, self.anchored)
+
+    def update(self, close, ts=None):
+        """
+        Append a new bar.
+        Returns: RSI of the bar
+        """
+        self._prev_state = (
+            self.avg_gain.get_state(),
+            self.avg_loss.get_state(),
+            self.prev_close,
+            self.value,
+        )
+        full = len(self.history) == self.history.maxlen
+        self._prev_dropped = self.history[0] if full else None
+
+        delta = close - self.prev_close
+        if self.mode == "wilder" and delta != delta:
+            self.value = math.nan  # No price change yet
+        else:
+            # Same as delta.where(delta > 0, 0) and -delta.where(delta < 0, 0)
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else -0.0
+            rs = ieee_divide(self.avg_gain.update(gain), self.avg_loss.update(loss))
+            self.value = 100 - (100 / (1 + rs))
+
+        self.prev_close = close
+        self.history.append(self.value)
+        self.last_ts = ts
+        return self.value
+
+    def revise(self, close):
+        """
+        Replace the last bar (e.g. the in-progress candle got a new close).
+        Returns: RSI of the bar
+        """
+        if self._prev_state is None:
+            raise ValueError("No bar to revise")
+
+        gain_state, loss_state, self.prev_close, self.value = self._prev_state
+        self.avg_gain.set_state(gain_state)
+        self.avg_loss.set_state(loss_state)
+        self.history.pop()
+        if self._prev_dropped is not None:
+            self.history.appendleft(self._prev_dropped)
+
+        return self.update(close, self.last_ts)
+
+    def sync(self, close_series):
+        """
+        Catch up with a close series indexed by bar timestamp.
+
+        The bar at the last timestamp already fed is revised and only newer
+        bars are appended. If that timestamp is no longer in the series (or,
+        when anchored, the series starts at a different bar), the whole
+        series is replayed.
+        Returns: RSI of the last bar
+        """
+        index = close_series.index
+        values = close_series.to_numpy(dtype=float)
+
+        same_start = not self.anchored or (len(index) > 0 and index[0] == self.first_ts)
+        if self.last_ts is not None and same_start and self.last_ts in index:
+            pos = index.get_loc(self.last_ts)
+            self.revise(float(values[pos]))
+            start = pos + 1
+        else:
+            self.reset()
+            self.first_ts = index[0] if len(index) else None
+            start = 0
+
+        for i in range(start, len(values)):
+            self.update(float(values[i]), index[i])
+
+        return self.value
+
+
+class BollingerBank:
+    """
+    Rolling Bollinger bands (SMA +- num_std * sample std) for many tickers,
+    O(1) per bar.
+
+    Struct-of-arrays layout: a (period x tickers) ring buffer plus per-ticker
+    valid count, running mean and sum of squared deviations (M2). A bar
+    leaving the window is removed and the new one added with Welford's
+    updates, and each ticker's mean/M2 are recomputed exactly from its
+    buffer whenever its ring wraps, so rounding error cannot build up.
+
+    update() advances any subset of tickers in one vectorized step,
+    revise() replaces their last bar, and sync() catches one ticker up with
+    its close series. NaN closes are skipped; bands are NaN until the window
+    holds `period` valid values, as with rolling(period).
+    """
+
+    def __init__(self, tickers, period=20, num_std=2):
+        self.tickers = list(tickers)
+        self.columns = {ticker: j for j, ticker in enumerate(self.tickers)}
+        self.period = period
+        self.num_std = num_std
+        n = len(self.tickers)
+        self.buffer = np.full((period, n), np.nan)
+        self.pos = np.zeros(n, dtype=np.int64)
+        self.count = np.zeros(n, dtype=np.int64)   # Bars fed (valid or not)
+        self.nobs = np.zeros(n, dtype=np.int64)    # Valid values in the window
+        self.mean = np.zeros(n)
+        self.m2 = np.zeros(n)
+        self.last_ts = [None] * n
+        # State of each ticker before its last update, for revise()
+        self._prev = {name: np.zeros(n, dtype=getattr(self, name).dtype)
+                      for name in ("pos", "count", "nobs", "mean", "m2")}
+        self._prev_slot = np.full(n, np.nan)
+        self._has_prev = np.zeros(n, dtype=bool)
+
+    def _select(self, idx):
+        return np.arange(len(self.tickers)) if idx is None else np.atleast_1d(np.asarray(idx, dtype=np.int64))
+
+    def update(self, values, idx=None):
+        """
+        Append one bar for each ticker column in `idx` (default: all).
+        Returns: (sma, upper, lower) arrays for those columns
+        """
+        idx = self._select(idx)
+        x = np.broadcast_to(np.asarray(values, dtype=float), idx.shape)
+        pos = self.pos[idx]
+
+        for name, prev in self._prev.items():
+            prev[idx] = getattr(self, name)[idx]
+        self._prev_slot[idx] = self.buffer[pos, idx]
+        self._has_prev[idx] = True
+
+        old = self.buffer[pos, idx]
+        nobs = self.nobs[idx]
+        mean = self.mean[idx]
+        m2 = self.m2[idx]
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # Remove the bar leaving the window
+            leaving = (self.count[idx] >= self.period) & ~np.isnan(old)
+            remaining = nobs - leaving
+            delta = old - mean
+            removed_mean = np.where(remaining > 0, mean - delta / remaining, 0.0)
+            removed_m2 = np.where(remaining > 0, m2 - delta * (old - removed_mean), 0.0)
+            mean = np.where(leaving, removed_mean, mean)
+            m2 = np.where(leaving, removed_m2, m2)
+            nobs = remaining
+
+            # Add the new bar
+            entering = ~np.isnan(x)
+            nobs = nobs + entering
+            delta = x - mean
+            added_mean = mean + delta / nobs
+            mean = np.where(entering, added_mean, mean)
+            m2 = np.where(entering, m2 + delta * (x - added_mean), m2)
+
+        self.buffer[pos, idx] = x
+        self.pos[idx] = (pos + 1) % self.period
+        self.count[idx] += 1
+        self.nobs[idx] = nobs
+        self.mean[idx] = mean
+        self.m2[idx] = np.maximum(m2, 0.0)
+
+        wrapped = idx[self.pos[idx] == 0]
+        if wrapped.size:
+            self._recompute(wrapped)
+        return self.bands(idx)
+
+    def _recompute(self, idx):
+        """Exact mean/M2 from the buffer (run once per `period` bars per ticker)."""
+        window = self.buffer[:, idx]
+        valid = ~np.isnan(window)
+        nobs = valid.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(nobs > 0, np.where(valid, window, 0.0).sum(axis=0) / nobs, 0.0)
+            m2 = np.where(valid, (window - mean) ** 2, 0.0).sum(axis=0)
+        self.nobs[idx] = nobs
+        self.mean[idx] = mean
+        self.m2[idx] = m2
+
+    def revise(self, values, idx=None):
+        """
+        Replace the last bar of each ticker column in `idx` (the forming candle).
+        Returns: (sma, upper, lower) arrays for those columns
+        """
+        idx = self._select(idx)
+        if not self._has_prev[idx].all():
+            raise ValueError("No bar to revise")
+        for name, prev in self._prev.items():
+            getattr(self, name)[idx] = prev[idx]
+        self.buffer[self.pos[idx], idx] = self._prev_slot[idx]
+        return self.update(values, idx)
+
+    def bands(self, idx=None):
+        """
+        Current bands for each ticker column in `idx` (default: all).
+        Returns: (sma, upper, lower) arrays, NaN where the window is not full
+        """
+        idx = self._select(idx)
+        ready = self.nobs[idx] >= self.period
+        sma = np.where(ready, self.mean[idx], np.nan)
+        std = np.where(ready, np.sqrt(self.m2[idx] / max(self.period - 1, 1)), np.nan)
+        return sma, sma + self.num_std * std, sma - self.num_std * std
+
+    def reset(self, idx):
+        """Forget the history of the ticker columns in `idx`."""
+        idx = self._select(idx)
+        self.buffer[:, idx] = np.nan
+        for name in ("pos", "count", "nobs", "mean", "m2"):
+            getattr(self, name)[idx] = 0
+        self._has_prev[idx] = False
+        for j in idx:
+            self.last_ts[j] = None
+
+    def sync(self, ticker, close_series):
+        """
+        Catch one ticker up with a close series indexed by bar timestamp,
+        revising the last bar already fed and appending newer ones (the
+        whole series is replayed if that bar is no longer in it).
+        Returns: (sma, upper, lower) of the last bar
+        """
+        j = self.columns[ticker]
+        index = close_series.index
+        values = close_series.to_numpy(dtype=float)
+
+        last_ts = self.last_ts[j]
+        if last_ts is not None and last_ts in index:
+            pos = index.get_loc(last_ts)
+            self.revise(values[pos], j)
+            start = pos + 1
+        else:
+            self.reset(j)
+            start = 0
+
+        for i in range(start, len(values)):
+            self.update(values[i], j)
+        if len(values):
+            self.last_ts[j] = index[-1]
+
+        sma, upper, lower = self.bands(j)
+        return float(sma[0]), float(upper[0]), float(lower[0])
+
+
+class SlidingMin:
+    """
+    Minimum and its position over the last `window` values, amortized O(1)
+    per push.
+
+    A monotonic deque holds (position, value) pairs with non-decreasing
+    values; a new value pops every larger value off the back, and the front
+    leaves once it falls out of the window. Equal values are kept, so ties
+    resolve to the earliest position, as Series.idxmin does. NaN values
+    occupy a position but are never the minimum. undo() reverts the last
+    push (used to revise a forming bar).
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.items = deque()
+        self.count = 0
+        self._undo = None
+
+    def push(self, x):
+        popped = []
+        appended = x == x
+        if appended:
+            while self.items and self.items[-1][1] > x:
+                popped.append(self.items.pop())
+            self.items.append((self.count, x))
+        evicted = None
+        if self.items and self.items[0][0] <= self.count - self.window:
+            evicted = self.items.popleft()
+        self.count += 1
+        self._undo = (appended, popped, evicted)
+
+    def undo(self):
+        if self._undo is None:
+            raise ValueError("No push to undo")
+        appended, popped, evicted = self._undo
+        self.count -= 1
+        if evicted is not None:
+            self.items.appendleft(evicted)
+        if appended:
+            self.items.pop()
+        self.items.extend(reversed(popped))
+        self._undo = None
+
+    def min(self):
+        """Smallest value in the window (NaN if none)."""
+        return self.items[0][1] if self.items else math.nan
+
+    def argmin(self):
+        """Position (0-based count of pushes) of the earliest minimum, or None."""
+        return self.items[0][0] if self.items else None
+
+
+class DivergenceTracker:
+    """
+    Bullish divergence check on every bar in amortized O(1).
+
+    A bar qualifies when its low is the lowest of the last lookback + 1
+    lows and its MACD histogram is above the minimum histogram of the
+    previous `lookback` bars (the conditions of detect_bullish_divergence_low).
+    """
+
+    def __init__(self, lookback=10):
+        self.lookback = lookback
+        self.lows = SlidingMin(lookback + 1)
+        self.hists = SlidingMin(lookback)
+        self.stamps = deque(maxlen=lookback + 1)
+        self.count = 0
+        self.prev_hist = math.nan
+        self._prev = None
+
+    def update(self, low, hist, ts=None):
+        """
+        Feed one closed bar.
+        Returns: dict with found, low, min_low, hist, prev_hist_min and
+        prev_hist_ts (found is False until lookback + 1 bars were fed)
+        """
+        pushed_hist = self.count > 0
+        if pushed_hist:
+            self.hists.push(self.prev_hist)  # Previous bar joins the comparison window
+        self.lows.push(low)
+        dropped = self.stamps[0] if len(self.stamps) == self.stamps.maxlen else None
+        self.stamps.append(ts)
+        self._prev = (pushed_hist, self.prev_hist, dropped)
+        self.count += 1
+        self.prev_hist = hist
+
+        min_low = self.lows.min()
+        prev_hist_min = self.hists.min()
+        pos = self.hists.argmin()
+        prev_hist_ts = None
+        if pos is not None:
+            prev_hist_ts = self.stamps[pos - (self.count - len(self.stamps))]
+
+        found = (
+            self.count > self.lookback
+            and low == min_low
+            and not hist <= prev_hist_min
+            and pos is not None
+        )
+        return {
+            "found": found,
+            "low": low,
+            "min_low": min_low,
+            "hist": hist,
+            "prev_hist_min": prev_hist_min,
+            "prev_hist_ts": prev_hist_ts,
+        }
+
+    def revise(self, low, hist, ts=None):
+        """Replace the last bar fed (e.g. the forming candle)."""
+        if self._prev is None:
+            raise ValueError("No bar to revise")
+        pushed_hist, self.prev_hist, dropped = self._prev
+        self.lows.undo()
+        if pushed_hist:
+            self.hists.undo()
+        self.stamps.pop()
+        if dropped is not None:
+            self.stamps.appendleft(dropped)
+        self.count -= 1
+        return self.update(low, hist, ts)
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Latency spans for the scan hot path.
+
+Each stage of a ticker's evaluation is timed with a span:
+    fetch      upstream download (per ticker, or per batch with no ticker)
+    indicator  indicator computation
+    state      state machine / condition evaluation
+    push       Bark delivery (timed on the dispatcher thread)
+
+At the end of a scan, end_scan() reduces the spans to per-stage
+p50/p95/max and the slowest tickers, appends a readable line to the
+latency log and one JSON object per scan to the metrics file, and starts
+a fresh scan. Recording is thread-safe.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+import metrics
+from state_store import STATE_DIR
+
+# ================= CONFIGURATION =================
+LATENCY_LOG = os.path.join(STATE_DIR, "latency.log")
+LATENCY_METRICS_FILE = os.path.join(STATE_DIR, "latency_metrics.jsonl")
+SLOWEST_TICKERS = 5  # Tickers listed per scan, by total time across stages
+# =================================================
+
+
+class LatencyRecorder:
+    """
+    Collects (stage, ticker, seconds) spans for the current scan.
+    """
+
+    def __init__(self, log_file=LATENCY_LOG, metrics_file=LATENCY_METRICS_FILE):
+        self.log_file = log_file
+        self.metrics_file = metrics_file
+        self.lock = threading.Lock()
+        self.spans = []
+        self.scan_started = time.perf_counter()
+
+    @contextmanager
+    def span(self, stage, ticker=None):
+        """Time the enclosed block as one span of `stage` for `ticker`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, ticker, time.perf_counter() - start)
+
+    def record(self, stage, ticker, seconds):
+        with self.lock:
+            self.spans.append((stage, ticker, seconds))
+        metrics.stage_duration.observe(seconds, stage=stage)
+
+    def summarize(self, name):
+        """
+        Reduce the current scan's spans.
+        Returns: dict with per-stage count/p50/p95/max/total (ms) and the slowest tickers
+        """
+        with self.lock:
+            spans = list(self.spans)
+            duration = time.perf_counter() - self.scan_started
+
+        by_stage = {}
+        by_ticker = {}
+        for stage, ticker, seconds in spans:
+            by_stage.setdefault(stage, []).append(seconds)
+            if ticker is not None:
+                stages = by_ticker.setdefault(ticker, {})
+                stages[stage] = stages.get(stage, 0.0) + seconds
+
+        stages = {}
+        for stage, values in by_stage.items():
+            ms = np.asarray(values) * 1000
+            stages[stage] = {
+                "count": len(ms),
+                "p50_ms": round(float(np.percentile(ms, 50)), 3),
+                "p95_ms": round(float(np.percentile(ms, 95)), 3),
+                "max_ms": round(float(ms.max()), 3),
+                "total_ms": round(float(ms.sum()), 3),
+            }
+
+        slowest = sorted(by_ticker.items(), key=lambda item: sum(item[1].values()), reverse=True)
+        return {
+            "scan": name,
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "duration_s": round(duration, 3),
+            "tickers": len(by_ticker),
+            "stages": stages,
+            "slowest_tickers": [
+                {
+                    "ticker": ticker,
+                    "total_ms": round(sum(times.values()) * 1000, 3),
+                    "stages_ms": {stage: round(t * 1000, 3) for stage, t in times.items()},
+                }
+                for ticker, times in slowest[:SLOWEST_TICKERS]
+            ],
+        }
+
+    def end_scan(self, name):
+        """
+        Close the current scan: write the log line and metrics record, then reset.
+        Returns: the summary dict
+        """
+        summary = self.summarize(name)
+        with self.lock:
+            self.spans = []
+            self.scan_started = time.perf_counter()
+        metrics.scans_completed.inc(scan=name)
+
+        try:
+            os.makedirs(os.path.dirname(self.metrics_file), exist_ok=True)
+            with open(self.metrics_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(summary) + "\n")
+            os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
+            with open(self.log_file, "a", encoding="utf-8") as f:
+                f.write(format_summary(summary) + "\n")
+        except OSError as e:
+            print(f"  Latency_Write_Failed_{type(e).__name__}")
+        return summary
+
+
+def format_summary(summary):
+    """One log line: per-stage p50/p95/max and the slowest tickers."""
+    parts = [f"[{summary['finished_at']}] {summary['scan']} {summary['duration_s']:.1f}s"]
+    for stage, s in summary["stages"].items():
+        parts.append(f"{stage} p50={s['p50_ms']:.1f}ms p95={s['p95_ms']:.1f}ms "
+                     f"max={s['max_ms']:.1f}ms n={s['count']}")
+    if summary["slowest_tickers"]:
+        parts.append("slowest: " + ", ".join(
+            f"{t['ticker']} {t['total_ms']:.1f}ms" for t in summary["slowest_tickers"]))
+    return " | ".join(parts)
+
+
+# Shared by every watcher, market_data and the push dispatcher in the process
+latency = LatencyRecorder()
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""
+Shared market data access for the TSE scanners.
+
+All scripts fetch their whole watchlist with one batched download call
+instead of paying one round trip per ticker. Downloads go to a pluggable
+provider (data_providers.py): Yahoo Finance when live, recorded bars
+under a simulated clock for replays.
+
+Bars are also kept in an on-disk cache: the columnar, memory-mapped
+store in bar_store.py (one array per field per ticker and interval).
+Each poll only asks upstream for bars at or after the last cached
+timestamp and merges them in, and falls back to the cache when the
+download fails.
+
+iter_chunks walks a large universe (thousands of codes) one batch at a
+time through the same cache-aware path.
+
+iter_bars is the streaming variant: tickers are fetched on a bounded
+thread pool and each frame is yielded as soon as it arrives, so one slow
+ticker does not hold up the rest of the scan. A fetch that outlives its
+scan keeps running and is not submitted again until it has finished, so
+at most one request per ticker writes to the cache at a time.
+"""
+
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
+
+import numpy as np
+import pandas as pd
+
+import bar_store
+import clock
+from data_providers import FETCH_TIMEOUT, YahooProvider, period_offset
+from latency import latency
+import metrics
+
+# ================= CONFIGURATION =================
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bar_cache")
+FETCH_CONCURRENCY = 8  # Parallel upstream requests in iter_bars
+BATCH_CHUNK = 200  # Tickers per batched download in iter_chunks
+# =================================================
+
+# Upstream bar source (data_providers.py); replaced by set_provider()
+provider = YahooProvider()
+
+# (ticker, interval) -> future of an iter_bars fetch that has not finished yet
+in_flight = {}
+in_flight_lock = threading.RLock()
+
+
+def set_provider(new_provider):
+    """
+    Swap the upstream bar source (e.g. a ReplayProvider for offline runs).
+    Returns: the previous provider
+    """
+    global provider
+    previous, provider = provider, new_provider
+    return previous
+
+
+def download_batch(tickers, period, interval, start=None):
+    """
+    Download OHLCV bars for a whole watchlist in one request to the provider.
+
+    Args:
+        tickers: list of ticker symbols
+        period: yfinance period string (e.g. "3mo"), ignored when start is given
+        interval: yfinance interval string (e.g. "1d", "15m")
+        start: only fetch bars from this timestamp onwards
+    Returns:
+        dict of ticker -> DataFrame with Open/High/Low/Close/Volume columns
+    """
+    tickers = list(tickers)
+    if not tickers:
+        return {}
+    return provider.download_batch(tickers, period, interval, start=start)
+
+
+def download_ticker(ticker, period, interval, start=None):
+    """Download OHLCV bars for one ticker (used by the concurrent path)."""
+    return provider.download_ticker(ticker, period, interval, start=start)
+
+
+def load_cached(ticker, interval):
+    """
+    Load cached bars for one ticker from the columnar store (memory-mapped,
+    read-only).
+
+    Returns: DataFrame (empty if nothing is cached or the files are unreadable)
+    """
+    try:
+        return bar_store.read_frame(CACHE_DIR, ticker, interval)
+    except Exception:
+        return pd.DataFrame()
+
+
+def save_cached(ticker, interval, df):
+    """Write cached bars as a new generation of array files."""
+    bar_store.write_frame(CACHE_DIR, ticker, interval, df)
+
+
+def merge_bars(cached, fresh):
+    """
+    Merge newly fetched bars into the cached history.
+    Overlapping timestamps take the fresh values (the in-progress bar is revised).
+    Returns `cached` itself when the fresh bars are already its last bars.
+    """
+    if cached.empty:
+        return fresh
+    if fresh.empty:
+        return cached
+    columns = cached.columns.intersection(fresh.columns)
+    tail = cached[columns].iloc[-len(fresh):]
+    if tail.index.equals(fresh.index) and np.array_equal(
+            tail.to_numpy(dtype=float), fresh[columns].to_numpy(dtype=float), equal_nan=True):
+        return cached
+    merged = pd.concat([cached, fresh[cached.columns.intersection(fresh.columns)]])
+    merged = merged[~merged.index.duplicated(keep="last")]
+    return merged.sort_index()
+
+
+def fetch_bars(tickers, period, interval):
+    """
+    Return OHLCV bars for a watchlist, served from the local cache and topped
+    up with only the bars newer than the last cached timestamp.
+
+    Tickers without usable cache are fetched for the full period in one batch;
+    the rest share one incremental batch starting at the oldest last bar.
+    If upstream fails, the cached history is returned as-is.
+
+    Args:
+        tickers: list of ticker symbols
+        period: history window each scanner expects (e.g. "3mo")
+        interval: yfinance interval string (e.g. "1d", "15m")
+    Returns:
+        dict of ticker -> DataFrame trimmed to the requested period
+    """
+    tickers = list(tickers)
+    offset = period_offset(period)
+    now = pd.Timestamp(clock.now())
+
+    cached = {ticker: load_cached(ticker, interval) for ticker in tickers}
+    cold, warm = [], []
+    for ticker in tickers:
+        if can_top_up(cached[ticker], offset, now):
+            warm.append(ticker)
+        else:
+            cold.append(ticker)
+
+    fresh = {}
+    try:
+        if cold:
+            with latency.span("fetch"):
+                fresh.update(download_batch(cold, period=period, interval=interval))
+        if warm:
+            # Re-fetch from the oldest last bar so in-progress bars are revised
+            start = min(cached[ticker].index[-1] for ticker in warm)
+            with latency.span("fetch"):
+                fresh.update(download_batch(warm, period=period, interval=interval, start=start))
+    except Exception as e:
+        print(f"  [cache] Fetch_Failed_{type(e).__name__}, serving cached bars")
+
+    frames = {}
+    for ticker in tickers:
+        merged = merge_bars(cached[ticker], fresh.get(ticker, pd.DataFrame()))
+        if ticker in fresh and not fresh[ticker].empty:
+            if merged is not cached[ticker]:
+                save_cached(ticker, interval, merged)
+            metrics.bars_processed.inc(len(fresh[ticker]), interval=interval)
+        else:
+            metrics.fetch_errors.inc(ticker=ticker)
+        frames[ticker] = trim_to_period(merged, offset)
+
+    return frames
+
+
+def iter_chunks(tickers, period, interval, chunk_size=BATCH_CHUNK):
+    """
+    Fetch a large universe as a sequence of batched, cache-aware downloads.
+
+    Each chunk of `chunk_size` tickers goes through fetch_bars and is yielded
+    as soon as it is downloaded, so callers can screen and report chunk by
+    chunk instead of waiting for thousands of tickers.
+
+    Yields: (list of tickers, dict of ticker -> DataFrame)
+    """
+    tickers = list(tickers)
+    for offset in range(0, len(tickers), chunk_size):
+        chunk = tickers[offset:offset + chunk_size]
+        yield chunk, fetch_bars(chunk, period=period, interval=interval)
+
+
+def can_top_up(cached, offset, now):
+    """
+    True if cached bars are recent enough to be extended with an incremental
+    fetch (otherwise the full period is downloaded again).
+    """
+    if cached.empty:
+        return False
+    last_ts = cached.index[-1]
+    last_ts = last_ts.tz_convert("Asia/Tokyo") if last_ts.tzinfo else last_ts.tz_localize("Asia/Tokyo")
+    return last_ts >= now - offset
+
+
+def trim_to_period(df, offset):
+    """Keep only the bars within `offset` of the latest bar."""
+    if df.empty:
+        return df
+    return df[df.index >= df.index[-1] - offset]
+
+
+def fetch_ticker(ticker, period, interval):
+    """
+    Cache-aware fetch of one ticker: top up the cached bars with bars from
+    the last cached timestamp on, or download the full period.
+    Falls back to cached bars if upstream fails.
+
+    Returns: DataFrame trimmed to the requested period
+    """
+    offset = period_offset(period)
+    cached = load_cached(ticker, interval)
+
+    try:
+        with latency.span("fetch", ticker):
+            if can_top_up(cached, offset, pd.Timestamp(clock.now())):
+                fresh = download_ticker(ticker, period, interval, start=cached.index[-1])
+            else:
+                fresh = download_ticker(ticker, period, interval)
+    except Exception:
+        fresh = pd.DataFrame()
+
+    merged = merge_bars(cached, fresh)
+    if not fresh.empty:
+        if merged is not cached:
+            save_cached(ticker, interval, merged)
+        metrics.bars_processed.inc(len(fresh), interval=interval)
+    else:
+        metrics.fetch_errors.inc(ticker=ticker)
+    return trim_to_period(merged, offset)
+
+
+def iter_bars(tickers, period, interval, concurrency=FETCH_CONCURRENCY, timeout=FETCH_TIMEOUT):
+    """
+    Fetch a watchlist concurrently and yield frames as they arrive.
+
+    At most `concurrency` upstream requests are in flight, each bounded by
+    `timeout` seconds. Tickers still pending once every request has had its
+    time slot are served from the cache instead of blocking the scan.
+    Tickers whose fetch from an earlier scan is still running are not
+    fetched again; they are served from the cache right away.
+
+    Each fetch error is counted once: by fetch_ticker when a download
+    fails, or by release_in_flight when a fetch raised or was cancelled
+    (a late fetch that succeeds is not an error).
+
+    Yields: (ticker, DataFrame) in completion order
+    """
+    tickers = list(tickers)
+    if not tickers:
+        return
+
+    # Every ticker gets one timeout slot per wave of `concurrency` requests
+    deadline = timeout * (math.ceil(len(tickers) / concurrency) + 1)
+    offset = period_offset(period)
+
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    futures = {}
+    busy = []
+    with in_flight_lock:
+        for ticker in tickers:
+            key = (ticker, interval)
+            if key in in_flight:
+                busy.append(ticker)
+                continue
+            future = pool.submit(fetch_ticker, ticker, period, interval)
+            in_flight[key] = future
+            future.add_done_callback(lambda done, key=key: release_in_flight(key, done))
+            futures[future] = ticker
+    pending = set(futures.values())
+    try:
+        for ticker in busy:
+            yield ticker, trim_to_period(load_cached(ticker, interval), offset)
+        for future in as_completed(futures, timeout=deadline):
+            ticker = futures[future]
+            pending.discard(ticker)
+            try:
+                df = future.result()
+            except Exception:
+                df = trim_to_period(load_cached(ticker, interval), offset)
+            yield ticker, df
+    except TimeoutError:
+        # Stragglers are counted when they finish (see release_in_flight)
+        for ticker in [t for t in tickers if t in pending]:
+            yield ticker, trim_to_period(load_cached(ticker, interval), offset)
+    finally:
+        # Don't wait for stragglers; their results land in the cache for next scan
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def release_in_flight(key, future):
+    """Done-callback of an iter_bars fetch: the ticker may be fetched again."""
+    if future.cancelled() or future.exception() is not None:
+        metrics.fetch_errors.inc(ticker=key[0])
+    with in_flight_lock:
+        if in_flight.get(key) is future:
+            del in_flight[key]
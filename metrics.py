@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+Prometheus-style metrics for the long-running watchers.
+
+Counters, gauges and histograms live in one process-wide registry and are
+rendered in the Prometheus text exposition format. The HTTP endpoint is
+opt-in: set METRICS_PORT (or pass a port to start_server) and scrape
+http://<host>:<port>/metrics. Without it, recording costs a dict update
+and nothing is served.
+
+    radar_scans_completed_total{scan}          scans closed by latency.end_scan
+    radar_stage_duration_seconds{stage}        fetch / indicator / state / push spans
+    radar_fetch_errors_total{ticker}           failed or timed-out downloads
+    radar_bars_processed_total{interval}       bars downloaded and merged into the cache
+    radar_alerts_total{result}                 pushes sent / failed
+    radar_stage_tickers{strategy,stage}        tickers per state-machine stage
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ================= CONFIGURATION =================
+METRICS_HOST = "127.0.0.1"  # Bind address of the metrics endpoint
+METRICS_PORT = None         # e.g. 9108 to serve /metrics; None keeps the endpoint off
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# =================================================
+
+
+class Metric:
+    """
+    One metric family: a value (or histogram) per label combination.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.lock = threading.Lock()
+        self.series = {}
+        REGISTRY.append(self)
+
+    def key(self, labels):
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def format_labels(self, key, extra=None):
+        pairs = list(zip(self.labels, key))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in pairs) + "}"
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            for key, value in sorted(self.series.items()):
+                lines.append(f"{self.name}{self.format_labels(key)} {format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.series[key] = value
+
+    def clear(self, **labels):
+        """Drop every series whose labels match the given subset."""
+        match = [(self.labels.index(name), str(value)) for name, value in labels.items()]
+        with self.lock:
+            for key in [k for k in self.series if all(k[i] == v for i, v in match)]:
+                del self.series[key]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                series = self.series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            for key, (counts, total, count) in sorted(self.series.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets, counts):
+                    cumulative += n
+                    labels = self.format_labels(key, ("le", format_value(bound)))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                lines.append(f"{self.name}_bucket{self.format_labels(key, ('le', '+Inf'))} {count}")
+                lines.append(f"{self.name}_sum{self.format_labels(key)} {format_value(total)}")
+                lines.append(f"{self.name}_count{self.format_labels(key)} {count}")
+        return lines
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Every metric registers itself here on construction
+REGISTRY = []
+
+scans_completed = Counter("radar_scans_completed_total", "Scans completed", ["scan"])
+stage_duration = Histogram("radar_stage_duration_seconds", "Hot-path span duration by stage", ["stage"])
+fetch_errors = Counter("radar_fetch_errors_total", "Failed or timed-out downloads", ["ticker"])
+bars_processed = Counter("radar_bars_processed_total", "Bars downloaded and merged into the cache", ["interval"])
+alerts = Counter("radar_alerts_total", "Bark pushes by delivery result", ["result"])
+stage_tickers = Gauge("radar_stage_tickers", "Tickers in each state-machine stage", ["strategy", "stage"])
+
+
+def render():
+    """Every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def record_stages(strategy, states):
+    """
+    Publish stage occupancy for one strategy.
+    Args:
+        strategy: strategy name used as the label
+        states: dict of ticker -> state dict with a "stage" key
+    """
+    counts = {}
+    for state in states.values():
+        stage = state.get("stage")
+        counts[stage] = counts.get(stage, 0) + 1
+
+    stage_tickers.clear(strategy=strategy)
+    for stage, count in counts.items():
+        stage_tickers.set(count, strategy=strategy, stage="none" if stage is None else stage)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes would otherwise interleave with the scan output
+
+
+def start_server(port=None, host=METRICS_HOST):
+    """
+    Serve /metrics from a daemon thread if a port is configured.
+    Returns: the server, or None when the endpoint is disabled or the port is taken
+    """
+    port = port if port is not None else METRICS_PORT
+    if port is None:
+        return None
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError as e:
+        print(f"  Metrics_Server_Failed_{type(e).__name__} ({host}:{port})")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f" Metrics at http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Non-blocking Bark push notifications.
+
+Alerts are queued and delivered by a background thread over one keep-alive
+requests.Session, with exponential-backoff retries. Pushes that still fail
+are appended to a dead-letter log (JSON lines) instead of being dropped.
+The scan loop only enqueues and never waits for delivery; the watchers
+call close() on the way out, so pushes still queued or being retried when
+the process stops are delivered or dead-lettered too.
+
+BARK_SERVER can point at a local stub server for tests. With DRY_RUN set,
+pushes are only recorded in dry_run_log (replays and benchmarks).
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import clock
+from latency import latency
+import metrics
+
+# ================= CONFIGURATION =================
+BARK_SERVER = "https://api.day.app"  # Override with a local stub server for tests
+PUSH_TIMEOUT = 5        # Seconds per delivery attempt
+PUSH_RETRIES = 3        # Retries after the first attempt
+PUSH_BACKOFF = 1.0      # First retry delay in seconds, doubled each retry
+DEAD_LETTER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "state", "bark_dead_letter.jsonl")
+DRY_RUN = False         # Record pushes in dry_run_log instead of sending them
+SHUTDOWN_TIMEOUT = 10   # Seconds close() waits for queued pushes before dead-lettering them
+# =================================================
+
+# Pushes captured while DRY_RUN is set: dicts with at, ticker, title, body
+dry_run_log = []
+
+
+class BarkDispatcher:
+    """
+    Background delivery queue for Bark pushes.
+
+    send() returns immediately; a daemon worker thread performs the HTTP
+    request with retries and records the outcome via on_result(ticker, ok).
+    """
+
+    def __init__(self, bark_key, server=None, timeout=PUSH_TIMEOUT, retries=PUSH_RETRIES,
+                 backoff=PUSH_BACKOFF, dead_letter_file=DEAD_LETTER_FILE, on_result=None):
+        self.bark_key = bark_key
+        self.server = (server or BARK_SERVER).rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.dead_letter_file = dead_letter_file
+        self.on_result = on_result
+
+        # Keep-alive connection pool shared by every push
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.queue = queue.Queue()
+        self.stopping = threading.Event()
+        self.current = None  # Push being delivered by the worker
+        self.worker = threading.Thread(target=self._run, name="bark-dispatcher", daemon=True)
+        self.worker.start()
+
+    def push_url(self, title, body):
+        """Bark URL for one message (title and body are path segments)."""
+        return f"{self.server}/{self.bark_key}/{quote(title, safe='')}/{quote(body, safe='')}"
+
+    def send(self, ticker, title, body):
+        """Queue a push without blocking the caller."""
+        if DRY_RUN:
+            dry_run_log.append({"at": clock.now(), "ticker": ticker, "title": title, "body": body})
+            return
+        self.queue.put((ticker, title, body, datetime.now()))
+
+    def flush(self, timeout=None):
+        """
+        Wait until every queued push has been delivered or dead-lettered.
+        Returns: True if the queue drained within `timeout`
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def close(self, timeout=SHUTDOWN_TIMEOUT):
+        """
+        Deliver what is queued before the process exits.
+
+        Waits up to `timeout` seconds for the queue to drain. Pushes still
+        queued after that are dead-lettered, and the push being delivered
+        stops retrying and is dead-lettered as well.
+        Returns: True if every push was delivered within `timeout`
+        """
+        if self.flush(timeout):
+            return True
+
+        self.stopping.set()
+        while True:
+            try:
+                ticker, title, body, queued_at = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            self._dead_letter(ticker, title, body, queued_at, "Shutdown_Undelivered")
+            self.queue.task_done()
+
+        # The push in delivery gives up after its current attempt (connect + read timeouts)
+        if not self.flush(2 * self.timeout):
+            current = self.current
+            if current is not None:
+                self._dead_letter(*current, "Shutdown_In_Delivery")
+        return False
+
+    def _deliver(self, url):
+        """
+        Try one push with retries.
+        Returns: (bool: delivered, str: last error)
+        """
+        error = ""
+        for attempt in range(self.retries + 1):
+            # Backoff waits end early when the dispatcher is closed
+            if attempt and self.stopping.wait(self.backoff * (2 ** (attempt - 1))):
+                return False, f"Shutdown_After_{error}"
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+                if response.status_code == 200:
+                    return True, ""
+                error = f"HTTP_{response.status_code}"
+            except requests.RequestException as e:
+                error = f"{type(e).__name__}_{str(e)[:80]}"
+        return False, error
+
+    def _dead_letter(self, ticker, title, body, queued_at, error):
+        """Append an undeliverable push to the dead-letter log."""
+        record = {
+            "ticker": ticker,
+            "title": title,
+            "body": body,
+            "queued_at": queued_at.isoformat(),
+            "failed_at": datetime.now().isoformat(),
+            "error": error,
+        }
+        try:
+            os.makedirs(os.path.dirname(self.dead_letter_file), exist_ok=True)
+            with open(self.dead_letter_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"!!! [DEAD_LETTER_WRITE_FAILED] {ticker} {type(e).__name__} !!!")
+
+    def _run(self):
+        while True:
+            ticker, title, body, queued_at = self.queue.get()
+            self.current = (ticker, title, body, queued_at)
+            try:
+                with latency.span("push", ticker):
+                    ok, error = self._deliver(self.push_url(title, body))
+                metrics.alerts.inc(result="sent" if ok else "failed")
+                if ok:
+                    print(f"!!! [PUSH_SENT] {ticker} !!!")
+                else:
+                    print(f"!!! [PUSH_FAILED] {ticker} {error} !!!")
+                    self._dead_letter(ticker, title, body, queued_at, error)
+                if self.on_result:
+                    self.on_result(ticker, ok)
+            except Exception as e:
+                metrics.alerts.inc(result="failed")
+                print(f"!!! [PUSH_FAILED] {ticker} {type(e).__name__} !!!")
+            finally:
+                self.current = None
+                self.queue.task_done()
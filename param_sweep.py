@@ -0,0 +1,418 @@
+# -*- coding: utf-8 -*-
+"""
+Parallel Parameter Sweep
+
+Fans a grid of strategy parameters across a process pool and collects one
+row per combination: signal count, mean forward return and hit rate.
+
+Bars are fetched once, written as (bars x tickers) .npy matrices and
+memory-mapped read-only by every worker, so the processes share the same
+pages through the OS page cache instead of each holding a pickled copy.
+
+Strategies swept:
+    three_tracks   BOLL_PERIOD, BOLL_STD, RSI_PERIOD, RSI_OVERSOLD and the
+                   timeouts, replayed through advance_state (3_lines_method.py)
+    rsi_macd       RSI_PERIOD, RSI_THRESHOLD (rsi_macd_low_finder.py)
+    divergence     LOOKBACK_BARS (Bullish_Divergence_finder.py)
+    macd_breakout  RETRACE_RATIO, replayed through advance_stage on 15m bars
+                   (MACD_full_breakout_watcher.py)
+
+The screeners (rsi_macd, divergence) count a signal on the first bar of
+each run of matching bars, as a daily scan would first report it.
+"""
+
+import argparse
+import importlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+import backtest_three_tracks
+import Bullish_Divergence_finder
+import MACD_full_breakout_watcher
+import rsi_macd_low_finder
+from backtest_three_tracks import FORWARD_HORIZONS, compute_tracks, replay_ticker
+from indicator_matrix import price_matrix, macd_matrix, rsi_matrix
+from market_data import CACHE_DIR, fetch_bars
+from watchlists import TSE_WATCH_LIST
+
+three_tracks = importlib.import_module("3_lines_method")
+
+# ================= CONFIGURATION =================
+DAILY_PERIOD = "10y"      # History for the daily strategies
+INTRADAY_PERIOD = "60d"   # Yahoo serves at most 60 days of 15m bars
+SWEEP_WORKERS = os.cpu_count() or 1
+SHARED_DIR = os.path.join(CACHE_DIR, "sweep")  # Memory-mapped matrices shared with workers
+RESULTS_FILE = "param_sweep_results.csv"
+TOP_N = 5                 # Best combinations printed per strategy
+MIN_BARS = 50             # Tickers with less history are left out
+
+# Values tried per parameter; parameters not listed keep their live value
+DEFAULT_GRIDS = {
+    "three_tracks": {
+        "boll_period": [15, 20, 25, 30],
+        "boll_std": [1.5, 2.0, 2.5],
+        "rsi_period": [7, 14, 21],
+        "rsi_oversold": [20, 25, 30, 35],
+        "touch_timeout": [5, 10, 15],
+        "reversal_timeout": [10, 15],
+    },
+    "rsi_macd": {
+        "rsi_period": [7, 10, 14, 21],
+        "rsi_threshold": [25, 30, 35, 40, 45, 50],
+    },
+    "divergence": {
+        "lookback_bars": [5, 10, 15, 20, 30, 40],
+    },
+    "macd_breakout": {
+        "retrace_ratio": [0.3, 0.4, 0.5, 0.6, 0.7],
+    },
+}
+# =================================================
+
+# Matrices attached by each worker process (interval -> dict of arrays)
+_shared = {}
+_dates = {}
+_macd = {}
+
+
+def export_shared(frames, tickers, directory):
+    """
+    Write Close/Low matrices and bar timestamps as .npy files for the workers.
+
+    Rows are right-aligned on each ticker's latest bar (see price_matrix);
+    lengths.npy records how many rows at the bottom belong to each ticker.
+    Timestamps are stored as exchange-local wall-clock nanoseconds.
+    Returns: number of tickers exported
+    """
+    tickers = [t for t in tickers if len(frames.get(t, ())) >= MIN_BARS]
+    if not tickers:
+        return 0
+
+    tickers, close = price_matrix(frames, "Close", tickers)
+    _, low = price_matrix(frames, "Low", tickers)
+    stamps = np.zeros(close.shape, dtype=np.int64)
+    lengths = np.zeros(len(tickers), dtype=np.int64)
+
+    for j, ticker in enumerate(tickers):
+        index = frames[ticker].index
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        lengths[j] = len(index)
+        stamps[-len(index):, j] = index.as_unit("ns").asi8
+
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, "close.npy"), close)
+    np.save(os.path.join(directory, "low.npy"), low)
+    np.save(os.path.join(directory, "stamps.npy"), stamps)
+    np.save(os.path.join(directory, "lengths.npy"), lengths)
+    with open(os.path.join(directory, "tickers.json"), "w", encoding="utf-8") as f:
+        json.dump(tickers, f)
+    return len(tickers)
+
+
+def attach_shared(directory, intervals):
+    """Worker initializer: memory-map the exported matrices read-only."""
+    for interval in intervals:
+        path = os.path.join(directory, interval)
+        with open(os.path.join(path, "tickers.json"), encoding="utf-8") as f:
+            tickers = json.load(f)
+        _shared[interval] = {
+            "tickers": tickers,
+            "close": np.load(os.path.join(path, "close.npy"), mmap_mode="r"),
+            "low": np.load(os.path.join(path, "low.npy"), mmap_mode="r"),
+            "stamps": np.load(os.path.join(path, "stamps.npy"), mmap_mode="r"),
+            "lengths": np.load(os.path.join(path, "lengths.npy")),
+        }
+
+
+def bar_dates(interval, j):
+    """datetime.date per bar of ticker column j (cached per worker)."""
+    key = (interval, j)
+    if key not in _dates:
+        data = _shared[interval]
+        top = data["close"].shape[0] - int(data["lengths"][j])
+        days = np.asarray(data["stamps"][top:, j]).astype("datetime64[ns]").astype("datetime64[D]")
+        _dates[key] = days.astype(object)
+    return _dates[key]
+
+
+def shared_macd(interval):
+    """MACD(12, 26, 9) matrices of the shared closes (parameter-free, cached per worker)."""
+    if interval not in _macd:
+        _macd[interval] = macd_matrix(np.asarray(_shared[interval]["close"]))
+    return _macd[interval]
+
+
+def forward_returns(close):
+    """Forward return matrix per horizon (NaN where the horizon runs past the data)."""
+    returns = {}
+    for h in FORWARD_HORIZONS:
+        ret = np.full(close.shape, np.nan)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ret[:-h] = close[h:] / close[:-h] - 1
+        returns[h] = ret
+    return returns
+
+
+def signal_stats(returns):
+    """
+    Summary row for one combination.
+    Args:
+        returns: dict of horizon -> 1-D array of forward returns, one per signal
+    """
+    row = {"signals": len(returns[FORWARD_HORIZONS[0]])}
+    for h in FORWARD_HORIZONS:
+        values = returns[h][~np.isnan(returns[h])]
+        row[f"mean_ret_{h}"] = values.mean() if len(values) else np.nan
+        row[f"hit_rate_{h}"] = (values > 0).mean() if len(values) else np.nan
+    return row
+
+
+def valid_rows(data, start):
+    """Mask of rows at or after each ticker's `start`-th bar."""
+    n_rows = data["close"].shape[0]
+    first = n_rows - data["lengths"] + start
+    return np.arange(n_rows)[:, None] >= first[None, :]
+
+
+def onset_stats(data, matched):
+    """Stats for the first bar of each run of matching bars."""
+    close = np.asarray(data["close"])
+    onset = matched.copy()
+    onset[1:] &= ~matched[:-1]
+    onset &= valid_rows(data, MIN_BARS - 1)
+    returns = forward_returns(close)
+    return signal_stats({h: returns[h][onset] for h in FORWARD_HORIZONS})
+
+
+def sweep_three_tracks(params):
+    """S3 alerts of the Three-Track machine replayed over daily history."""
+    data = _shared["1d"]
+    close = np.asarray(data["close"])
+    low = np.asarray(data["low"])
+    touched, reversed, rsi, confirmed = compute_tracks(close, low, params, macd=shared_macd("1d"))
+
+    n_rows = close.shape[0]
+    returns = {h: [] for h in FORWARD_HORIZONS}
+    for j, ticker in enumerate(data["tickers"]):
+        top = n_rows - int(data["lengths"][j])
+        events = replay_ticker(
+            ticker, bar_dates("1d", j), close[top:, j], touched[top:, j], reversed[top:, j],
+            rsi[top:, j], confirmed[top:, j], params, start=MIN_BARS - 1
+        )
+        for event in events:
+            if event["alert"]:
+                for h in FORWARD_HORIZONS:
+                    returns[h].append(event[f"ret_{h}"])
+
+    return signal_stats({h: np.array(returns[h], dtype=float) for h in FORWARD_HORIZONS})
+
+
+def sweep_rsi_macd(params):
+    """RSI < threshold with DIF > DEA, as screen_tickers evaluates the last bar."""
+    data = _shared["1d"]
+    close = np.asarray(data["close"])
+    dif, dea, _ = shared_macd("1d")
+    rsi = rsi_matrix(close, params["rsi_period"])
+    with np.errstate(invalid="ignore"):
+        matched = (rsi < params["rsi_threshold"]) & (dif > dea)
+    return onset_stats(data, matched)
+
+
+def sweep_divergence(params):
+    """Lowest low of the window with the MACD histogram above its prior minimum."""
+    data = _shared["1d"]
+    close = np.asarray(data["close"])
+    low = np.asarray(data["low"])
+    lookback = params["lookback_bars"]
+    _, _, hist = shared_macd("1d")
+
+    matched = np.zeros(close.shape, dtype=bool)
+    if close.shape[0] > lookback:
+        window_low = sliding_window_view(low, lookback + 1, axis=0).min(axis=-1)
+        prev_hist_min = sliding_window_view(hist[:-1], lookback, axis=0).min(axis=-1)
+        with np.errstate(invalid="ignore"):
+            matched[lookback:] = (low[lookback:] == window_low) & (hist[lookback:] > prev_hist_min)
+    return onset_stats(data, matched)
+
+
+def sweep_macd_breakout(params):
+    """DEA retracement alerts of the 4-stage machine replayed over 15m history."""
+    data = _shared["15m"]
+    close = np.asarray(data["close"])
+    dif, dea, _ = shared_macd("15m")
+
+    n_rows = close.shape[0]
+    returns = forward_returns(close)
+    alerted = np.zeros(close.shape, dtype=bool)
+    for j in range(len(data["tickers"])):
+        top = n_rows - int(data["lengths"][j])
+        dates = bar_dates("15m", j)
+        d, e = dif[top:, j], dea[top:, j]
+        state = {"stage": None, "max_dif": 0.0, "alert_date": None,
+                 "stage1_confirmed": False, "stage2_confirmed": False}
+        for i in range(MIN_BARS - 1, len(d)):
+            _, should_alert = MACD_full_breakout_watcher.advance_stage(
+                state, dates[i], float(d[i]), float(e[i]), d[:i + 1], e[:i + 1],
+                retrace_ratio=params["retrace_ratio"]
+            )
+            alerted[top + i, j] = should_alert
+
+    return signal_stats({h: returns[h][alerted] for h in FORWARD_HORIZONS})
+
+
+STRATEGIES = {
+    "three_tracks": {
+        "interval": "1d",
+        "run": sweep_three_tracks,
+        "defaults": backtest_three_tracks.default_params,
+    },
+    "rsi_macd": {
+        "interval": "1d",
+        "run": sweep_rsi_macd,
+        "defaults": lambda: {
+            "rsi_period": rsi_macd_low_finder.RSI_PERIOD,
+            "rsi_threshold": rsi_macd_low_finder.RSI_THRESHOLD,
+        },
+    },
+    "divergence": {
+        "interval": "1d",
+        "run": sweep_divergence,
+        "defaults": lambda: {"lookback_bars": Bullish_Divergence_finder.LOOKBACK_BARS},
+    },
+    "macd_breakout": {
+        "interval": "15m",
+        "run": sweep_macd_breakout,
+        "defaults": lambda: {"retrace_ratio": MACD_full_breakout_watcher.RETRACE_RATIO},
+    },
+}
+
+
+def run_combo(name, params):
+    """Evaluate one parameter combination inside a worker."""
+    try:
+        row = STRATEGIES[name]["run"](params)
+        row["status"] = "OK"
+    except Exception as e:
+        row = {"status": f"Err_{type(e).__name__}_{str(e)}"}
+    return {"strategy": name, **params, **row}
+
+
+def build_combos(names, grids):
+    """
+    Expand each strategy's grid over its live defaults.
+    Returns: list of (strategy name, params dict)
+    """
+    combos = []
+    for name in names:
+        grid = grids.get(name, {})
+        keys = list(grid)
+        for values in itertools.product(*(grid[k] for k in keys)):
+            params = STRATEGIES[name]["defaults"]()
+            params.update(zip(keys, values))
+            combos.append((name, params))
+    return combos
+
+
+def parse_overrides(items, names):
+    """
+    Apply --set name=v1,v2 overrides to the default grids.
+    A name applies to every swept strategy that has that parameter.
+    """
+    grids = {name: dict(DEFAULT_GRIDS[name]) for name in names}
+    for item in items or []:
+        key, _, values = item.partition("=")
+        parsed = [float(v) if "." in v else int(v) for v in values.split(",") if v]
+        matched = False
+        for name in names:
+            if key in STRATEGIES[name]["defaults"]():
+                grids[name][key] = parsed
+                matched = True
+        if not matched:
+            raise SystemExit(f"Unknown parameter for {', '.join(names)}: {key}")
+    return grids
+
+
+def run_sweep():
+    parser = argparse.ArgumentParser(description="Sweep strategy parameters across a process pool")
+    parser.add_argument("--strategies", default=",".join(STRATEGIES),
+                        help="comma-separated strategies to sweep (default: all)")
+    parser.add_argument("--tickers", default=None, help="comma-separated tickers (default: TSE watchlist)")
+    parser.add_argument("--set", action="append", metavar="PARAM=V1,V2",
+                        help="override the values swept for one parameter (repeatable)")
+    parser.add_argument("--workers", type=int, default=SWEEP_WORKERS, help="worker processes")
+    parser.add_argument("--out", default=RESULTS_FILE, help="CSV file for the results table")
+    args = parser.parse_args()
+
+    names = [n for n in args.strategies.split(",") if n]
+    unknown = [n for n in names if n not in STRATEGIES]
+    if unknown:
+        raise SystemExit(f"Unknown strategies: {', '.join(unknown)}")
+    tickers = args.tickers.split(",") if args.tickers else TSE_WATCH_LIST
+    combos = build_combos(names, parse_overrides(args.set, names))
+    intervals = sorted({STRATEGIES[n]["interval"] for n in names})
+
+    print("=" * 80)
+    print(f" Parameter Sweep | {len(combos)} combinations | {len(tickers)} tickers | "
+          f"{args.workers} workers")
+    print("=" * 80)
+
+    started = time.perf_counter()
+    for interval in intervals:
+        period = DAILY_PERIOD if interval == "1d" else INTRADAY_PERIOD
+        frames = fetch_bars(tickers, period=period, interval=interval)
+        exported = export_shared(frames, tickers, os.path.join(SHARED_DIR, interval))
+        if not exported:
+            raise SystemExit(f"No {interval} history with at least {MIN_BARS} bars")
+        print(f"Shared {exported} tickers of {interval} bars ({period})")
+    loaded = time.perf_counter()
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=attach_shared,
+                             initargs=(SHARED_DIR, intervals)) as pool:
+        futures = [pool.submit(run_combo, name, params) for name, params in combos]
+        for done, future in enumerate(as_completed(futures), 1):
+            rows.append(future.result())
+            if done % 50 == 0 or done == len(futures):
+                print(f"  {done}/{len(futures)} combinations | {time.perf_counter() - loaded:.1f}s")
+    finished = time.perf_counter()
+
+    # strategy, parameters in grid order, then the stats columns
+    columns = ["strategy"]
+    for _, params in combos:
+        columns.extend(k for k in params if k not in columns)
+    columns.append("signals")
+    for h in FORWARD_HORIZONS:
+        columns.extend([f"mean_ret_{h}", f"hit_rate_{h}"])
+    columns.append("status")
+
+    mid = FORWARD_HORIZONS[len(FORWARD_HORIZONS) // 2]
+    results = pd.DataFrame(rows, columns=columns).sort_values(
+        ["strategy", f"mean_ret_{mid}"], ascending=[True, False], na_position="last"
+    )
+
+    print(f"Loaded in {loaded - started:.1f}s, swept in {finished - loaded:.1f}s")
+    for name in names:
+        subset = results[results["strategy"] == name].dropna(axis=1, how="all")
+        print("-" * 80)
+        print(f" {name} - top {TOP_N} by mean {mid}-bar return")
+        print(subset.head(TOP_N).drop(columns="strategy").to_string(
+            index=False, float_format=lambda v: f"{v:.4f}"))
+    print("-" * 80)
+
+    results.to_csv(args.out, index=False)
+    print(f"{len(results)} combinations written to {args.out}")
+
+
+if __name__ == "__main__":
+    try:
+        run_sweep()
+    except KeyboardInterrupt:
+        print("\nSweep stopped by user")
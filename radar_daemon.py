@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Unified Radar Daemon
+
+Runs every strategy script as a plug-in inside one long-running process.
+Strategies are grouped into one feed per bar interval, each feed fetches
+the union of their watchlists once per poll, and every strategy evaluates
+the same in-memory frames. A ticker watched by three daily strategies is
+downloaded once instead of three times.
+
+A strategy plug-in is any module exposing a STRATEGY dict with:
+    name, watch_list, period, interval, evaluate(ticker, df) -> (status, alert)
+and optionally poll_seconds, settle_seconds, restore_state, persist_state
+states (ticker -> state dict with a "stage", published as metrics) and
+poll_every(ticker) -> scan cycles until the ticker needs polling again.
+A feed polls each ticker as often as its most urgent strategy asks for.
+A module with several descriptors is listed as "module:ATTRIBUTE".
+"""
+
+import importlib
+import sys
+
+import pandas as pd
+
+import clock
+from latency import format_summary, latency
+from market_data import iter_bars, period_offset, trim_to_period
+import metrics
+from notifier import BarkDispatcher
+from scheduler import PriorityPoller, next_wake_time
+from tse_calendar import is_market_open, sleep_until_open, tse
+
+# ================= CONFIGURATION =================
+STRATEGY_MODULES = [
+    "MACD_full_breakout_watcher",
+    "3_lines_method",
+    "rsi_macd_low_finder",
+    "Bullish_Divergence_finder",
+    "Bullish_Divergence_finder:INTRADAY_STRATEGY",
+]
+BARK_KEY = "****************"
+DEFAULT_POLL_SECONDS = 120  # Poll cadence for feeds whose strategies don't set one
+# =================================================
+
+
+def load_strategies(module_names):
+    """
+    Import each strategy module and return its descriptor
+    (STRATEGY, or the attribute named after a colon).
+    """
+    strategies = []
+    for name in module_names:
+        module_name, _, attribute = name.partition(":")
+        strategies.append(getattr(importlib.import_module(module_name), attribute or "STRATEGY"))
+    return strategies
+
+
+def build_feeds(strategies):
+    """
+    Group strategies into one shared feed per bar interval.
+
+    A feed covers the union of its strategies' watchlists, the longest of
+    their history periods and the fastest of their poll cadences.
+    Returns: dict of interval -> feed dict
+    """
+    anchor = pd.Timestamp("2000-01-01")
+    feeds = {}
+
+    for strategy in strategies:
+        interval = strategy["interval"]
+        feed = feeds.setdefault(interval, {
+            "interval": interval,
+            "period": strategy["period"],
+            "tickers": [],
+            "poll_seconds": None,
+            "settle_seconds": 0,
+            "strategies": [],
+            "next_run": clock.now(),
+            "poller": PriorityPoller(),
+        })
+
+        for ticker in strategy["watch_list"]:
+            if ticker not in feed["tickers"]:
+                feed["tickers"].append(ticker)
+
+        # Longer period = earlier start when subtracted from the same anchor
+        if anchor - period_offset(strategy["period"]) < anchor - period_offset(feed["period"]):
+            feed["period"] = strategy["period"]
+
+        poll = strategy.get("poll_seconds")
+        if poll and (feed["poll_seconds"] is None or poll < feed["poll_seconds"]):
+            feed["poll_seconds"] = poll
+        feed["settle_seconds"] = max(feed["settle_seconds"], strategy.get("settle_seconds", 0))
+
+        feed["strategies"].append({
+            "strategy": strategy,
+            "tickers": set(strategy["watch_list"]),
+            "offset": period_offset(strategy["period"]),
+        })
+
+    for feed in feeds.values():
+        if feed["poll_seconds"] is None:
+            feed["poll_seconds"] = DEFAULT_POLL_SECONDS
+
+    return feeds
+
+
+def run_feed(feed, notifier):
+    """
+    Fetch one feed once and let every subscribed strategy evaluate each
+    ticker as its bars arrive.
+    Returns: number of alerts queued
+    """
+    alerts = 0
+    poller = feed["poller"]
+    if tse.closing():
+        poller.poll_all()
+    due = poller.due(feed["tickers"])
+    print(f"  Polling {len(due)}/{len(feed['tickers'])} tickers")
+
+    for ticker, df in iter_bars(due, period=feed["period"], interval=feed["interval"]):
+        every = None
+        for entry in feed["strategies"]:
+            if ticker not in entry["tickers"]:
+                continue
+            strategy = entry["strategy"]
+
+            # Each strategy sees its own history window, as when run standalone
+            status_text, alert = strategy["evaluate"](ticker, trim_to_period(df, entry["offset"]))
+            print(f"  [{strategy['name']}] {ticker:8s} | {status_text}")
+
+            if alert:
+                notifier.send(ticker, *alert)
+                alerts += 1
+                print(f"  !!! [PUSH_QUEUED] {strategy['name']} {ticker} !!!")
+
+            # Strategies without poll_every want every cycle
+            wait = strategy["poll_every"](ticker) if strategy.get("poll_every") else 1
+            every = wait if every is None else min(every, wait)
+        poller.schedule(ticker, every or 1)
+
+    poller.advance()
+    return alerts
+
+
+def run_daemon(module_names=None):
+    """
+    Main loop: poll each feed on its own cadence during market hours.
+    """
+    strategies = load_strategies(module_names or STRATEGY_MODULES)
+    feeds = build_feeds(strategies)
+
+    print("=" * 80)
+    print(" Unified Radar Daemon")
+    for feed in feeds.values():
+        names = ", ".join(entry["strategy"]["name"] for entry in feed["strategies"])
+        print(f"  Feed {feed['interval']:>4} | {len(feed['tickers'])} tickers | "
+              f"every {feed['poll_seconds']}s | {names}")
+    print("=" * 80)
+
+    # Warm restart for strategies that keep state
+    for strategy in strategies:
+        if strategy.get("restore_state"):
+            restored = strategy["restore_state"]()
+            if restored:
+                print(f" Restored state for {restored} tickers ({strategy['name']})")
+
+    notifier = BarkDispatcher(BARK_KEY)
+    metrics.start_server()
+
+    try:
+        while True:
+            open_status, status_msg = is_market_open()
+            current_time_str = clock.now().strftime('%Y-%m-%d %H:%M:%S')
+
+            if not open_status:
+                # Market is closed, sleep until the next session opens
+                next_open = tse.next_open()
+                sys.stdout.write(f"\r[{current_time_str}] {status_msg}... Sleeping until {next_open:%Y-%m-%d %H:%M} JST ")
+                sys.stdout.flush()
+                sleep_until_open()
+                for feed in feeds.values():
+                    feed["poller"].poll_all()
+                continue
+
+            for feed in feeds.values():
+                if feed["next_run"] > clock.now():
+                    continue
+
+                print(f"\n[{clock.now().strftime('%Y-%m-%d %H:%M:%S')}] {status_msg} - "
+                      f"Feed {feed['interval']} ({len(feed['tickers'])} tickers)")
+                run_feed(feed, notifier)
+                print(format_summary(latency.end_scan(f"feed_{feed['interval']}")))
+                feed["next_run"] = next_wake_time(clock.now(), feed["poll_seconds"], feed["settle_seconds"])
+
+            for strategy in strategies:
+                if strategy.get("persist_state"):
+                    strategy["persist_state"]()
+                if strategy.get("states") is not None:
+                    metrics.record_stages(strategy["name"], strategy["states"])
+
+            print("-" * 80)
+            next_run = min(feed["next_run"] for feed in feeds.values())
+            clock.sleep((next_run - clock.now()).total_seconds())
+    finally:
+        # Deliver (or dead-letter) pushes still queued when the loop stops
+        notifier.close()
+
+
+if __name__ == "__main__":
+    try:
+        run_daemon(sys.argv[1:] or None)
+    except KeyboardInterrupt:
+        print("\nProcess stopped by user")
+    except Exception as e:
+        print(f"\nCritical error: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Offline replay of the watchers over recorded bars.
+
+Installs a ReplayProvider (recorded bars from a bar_store directory, e.g.
+a copy of bar_cache/) and a SimulatedClock, then runs a watcher's own
+run_radar loop, or the unified daemon, from --start to --end. Market
+hours, bar boundaries and sleeps all follow the simulated clock, so days
+of 15-minute scans replay in seconds. Pushes are recorded instead of sent,
+and snapshots, the bar cache and latency logs go to a scratch directory.
+
+Usage: python replay_radar.py --data recordings --start 2026-10-01 --end 2026-10-09
+                              [--target MACD_full_breakout_watcher] [--record]
+Targets: MACD_full_breakout_watcher, 3_lines_method, Bullish_Divergence_finder
+(intraday watcher) or radar_daemon.
+"""
+
+import argparse
+import importlib
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+import clock
+import state_store
+
+# ================= CONFIGURATION =================
+DEFAULT_TARGET = "MACD_full_breakout_watcher"
+RECORD_PERIOD = "1mo"  # History saved by --record
+# =================================================
+
+# Entry point of each replayable target
+TARGETS = {
+    "MACD_full_breakout_watcher": "run_radar",
+    "3_lines_method": "run_radar",
+    "Bullish_Divergence_finder": "run_intraday_watcher",
+    "radar_daemon": "run_daemon",
+}
+
+
+def replay(target, data_dir, start, end, work_dir=None):
+    """
+    Run one target over recorded bars until the simulated clock reaches `end`.
+
+    Args:
+        target: module name from TARGETS
+        data_dir: bar_store directory holding the recording
+        start, end: simulated time range (naive = JST)
+        work_dir: scratch directory for cache, state and logs (default: new temp dir)
+    Returns:
+        dict with alerts (list of pushes), bars, scans, wall_seconds and work_dir
+    """
+    work_dir = work_dir or tempfile.mkdtemp(prefix="replay_")
+
+    # Snapshot and log paths are fixed when the watcher modules are imported,
+    # so point the state directory at the scratch area before importing them
+    state_store.STATE_DIR = os.path.join(work_dir, "state")
+    import market_data
+    import metrics
+    import notifier
+    from data_providers import ReplayProvider
+
+    if os.path.abspath(market_data.CACHE_DIR) == os.path.abspath(data_dir):
+        raise ValueError("Replay data must not be the live bar cache directory itself; copy it first")
+    market_data.CACHE_DIR = os.path.join(work_dir, "bar_cache")
+    market_data.set_provider(ReplayProvider(data_dir))
+    notifier.DRY_RUN = True
+    clock.install(clock.SimulatedClock(start, end))
+
+    bars_before = sum(metrics.bars_processed.series.values())
+    scans_before = sum(metrics.scans_completed.series.values())
+    started = time.perf_counter()
+    try:
+        getattr(importlib.import_module(target), TARGETS[target])()
+    except clock.ClockStopped:
+        pass
+
+    return {
+        "alerts": list(notifier.dry_run_log),
+        "bars": sum(metrics.bars_processed.series.values()) - bars_before,
+        "scans": sum(metrics.scans_completed.series.values()) - scans_before,
+        "wall_seconds": time.perf_counter() - started,
+        "work_dir": work_dir,
+    }
+
+
+def record_watchlist(target, data_dir):
+    """Save live bars of a target's watchlist as a recording."""
+    from data_providers import record
+
+    module = importlib.import_module(target)
+    strategies = [module.INTRADAY_STRATEGY] if target == "Bullish_Divergence_finder" else [module.STRATEGY]
+    for strategy in strategies:
+        count = record(strategy["watch_list"], RECORD_PERIOD, strategy["interval"], data_dir)
+        print(f"Recorded {count} tickers ({strategy['interval']}) to {data_dir}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded bars through a watcher")
+    parser.add_argument("--data", required=True, help="bar_store directory with the recorded bars")
+    parser.add_argument("--start", help="simulated start, JST (e.g. 2026-10-01)")
+    parser.add_argument("--end", help="simulated end, JST (e.g. 2026-10-09 16:00)")
+    parser.add_argument("--target", default=DEFAULT_TARGET, choices=sorted(TARGETS))
+    parser.add_argument("--record", action="store_true", help="record live bars into --data and exit")
+    args = parser.parse_args()
+
+    try:
+        if args.record:
+            record_watchlist(args.target, args.data)
+        else:
+            if not args.start or not args.end:
+                parser.error("--start and --end are required for a replay")
+            result = replay(args.target, args.data, pd.Timestamp(args.start), pd.Timestamp(args.end))
+
+            print("=" * 80)
+            print(f" Replay of {args.target}: {args.start} -> {args.end}")
+            print(f"  Scans: {result['scans']} | Bars: {result['bars']} | "
+                  f"Wall: {result['wall_seconds']:.1f}s | "
+                  f"{result['bars'] / max(result['wall_seconds'], 1e-9):,.0f} bars/s")
+            for alert in result["alerts"]:
+                print(f"  {alert['at']:%Y-%m-%d %H:%M} {alert['ticker']:8s} {alert['title']} {alert['body']}")
+            print(f"  Scratch files: {result['work_dir']}")
+            print("=" * 80)
+    except KeyboardInterrupt:
+        print("\nProcess stopped by user")
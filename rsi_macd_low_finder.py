@@ -1,82 +1,56 @@
 # -*- coding: utf-8 -*-
 
-import yfinance as yf
+import argparse
+import time
 import pandas as pd
 from datetime import datetime
 
+from indicator_cache import indicator_cache
+from indicator_matrix import price_matrix, macd_matrix, rsi_matrix
+from latency import format_summary, latency
+from market_data import fetch_bars, iter_chunks
+from watchlists import TSE_UNIVERSE_FILE, TSE_WATCH_LIST, load_universe
+
 # ================= CONFIGURATION =================
 
 # Tokyo Stock Exchange watch list
-WATCH_LIST = [
-    "6723.T", "9432.T", "7011.T", "7203.T", "8058.T", "8306.T", "9501.T", "285A.T",
-    "6758.T", "9434.T", "2760.T", "9984.T", "8035.T", "9503.T", "4324.T", "9433.T",
-    "7272.T", "6367.T", "6146.T", "6269.T", "6501.T", "8316.T", "5706.T", "5016.T",
-    "7974.T", "7013.T", "4063.T", "4502.T", "6762.T", "6361.T", "6503.T", "8053.T",
-    "7267.T", "6981.T", "6702.T", "8002.T", "4568.T", "9502.T", "1911.T", "5802.T"
-]
+WATCH_LIST = TSE_WATCH_LIST
 
 RSI_THRESHOLD = 40   # RSI threshold
 RSI_PERIOD = 14     # RSI calculation period
+BAR_PERIOD = "3mo"  # 3 months of daily bars is sufficient for indicators
+BAR_INTERVAL = "1d"
 
 # =================================================
 
-def calculate_rsi(prices, period=14):
-    """
-    Calculate RSI indicator
-    Args:
-        prices: price series
-        period: RSI period (default 14)
-    Returns:
-        RSI series
-    """
-    delta = prices.diff()
-    gain = delta.where(delta > 0, 0).rolling(window=period).mean()
-    loss = -delta.where(delta < 0, 0).rolling(window=period).mean()
-
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
-
-def analyze_ticker(ticker):
+def analyze_ticker(ticker, df):
     """
     Analyze RSI and MACD status for a single ticker
+    Args:
+        ticker: ticker symbol
+        df: daily OHLCV frame for this ticker (from the batched download)
     Returns:
         (bool: match or not, dict: detailed data)
     """
     try:
-        # Download daily data (3 months is sufficient for indicators)
-        df = yf.download(
-            ticker,
-            period="3mo",
-            interval="1d",
-            progress=False,
-            auto_adjust=True
-        )
-
         if df.empty or len(df) < 30:
             return False, {"error": "Insufficient data"}
 
-        # Get close price series
-        close = df['Close'].iloc[:, 0] if isinstance(df['Close'], pd.DataFrame) else df['Close']
+        # Close, MACD and RSI are memoized per bar and shared with other strategies
+        with latency.span("indicator", ticker):
+            close = indicator_cache.column(ticker, df, 'Close')
+            dif, dea = indicator_cache.macd(ticker, df)
+            rsi = indicator_cache.rsi(ticker, df, RSI_PERIOD)
 
-        # Calculate MACD
-        ema12 = close.ewm(span=12, adjust=False).mean()
-        ema26 = close.ewm(span=26, adjust=False).mean()
-        dif = ema12 - ema26
-        dea = dif.ewm(span=9, adjust=False).mean()
+        with latency.span("state", ticker):
+            # Latest values
+            current_rsi = float(rsi.iloc[-1])
+            current_dif = float(dif.iloc[-1])
+            current_dea = float(dea.iloc[-1])
+            current_price = float(close.iloc[-1])
 
-        # Calculate RSI
-        rsi = calculate_rsi(close, RSI_PERIOD)
-
-        # Latest values
-        current_rsi = float(rsi.iloc[-1])
-        current_dif = float(dif.iloc[-1])
-        current_dea = float(dea.iloc[-1])
-        current_price = float(close.iloc[-1])
-
-        # Condition: RSI < threshold AND DIF > DEA (bullish crossover)
-        is_match = current_rsi < RSI_THRESHOLD and current_dif > current_dea
+            # Condition: RSI < threshold AND DIF > DEA (bullish crossover)
+            is_match = current_rsi < RSI_THRESHOLD and current_dif > current_dea
 
         data = {
             "price": current_price,
@@ -92,6 +66,69 @@ def analyze_ticker(ticker):
         return False, {"error": str(e)}
 
 
+def screen_tickers(frames, tickers):
+    """
+    Evaluate the RSI + MACD condition for many tickers in one vectorized pass
+    Args:
+        frames: dict of ticker -> daily OHLCV frame
+        tickers: tickers to screen
+    Returns:
+        dict of ticker -> (bool: match or not, dict: detailed data),
+        same shape as analyze_ticker
+    """
+    results = {}
+    valid = []
+    for ticker in tickers:
+        df = frames.get(ticker, pd.DataFrame())
+        if df.empty or len(df) < 30:
+            results[ticker] = (False, {"error": "Insufficient data"})
+        else:
+            valid.append(ticker)
+
+    if not valid:
+        return results
+
+    # (bars x tickers) close matrix, row -1 is each ticker's latest bar
+    with latency.span("indicator"):
+        valid, close = price_matrix(frames, "Close", valid)
+        dif, dea, _ = macd_matrix(close)
+        rsi = rsi_matrix(close, RSI_PERIOD)
+
+    current_rsi = rsi[-1]
+    current_dif = dif[-1]
+    current_dea = dea[-1]
+    current_price = close[-1]
+
+    # Condition: RSI < threshold AND DIF > DEA (bullish crossover)
+    is_match = (current_rsi < RSI_THRESHOLD) & (current_dif > current_dea)
+
+    for j, ticker in enumerate(valid):
+        results[ticker] = (bool(is_match[j]), {
+            "price": float(current_price[j]),
+            "rsi": float(current_rsi[j]),
+            "dif": float(current_dif[j]),
+            "dea": float(current_dea[j]),
+            "diff": float(current_dif[j] - current_dea[j])  # crossover strength
+        })
+
+    return results
+
+
+def evaluate(ticker, df):
+    """
+    Evaluate one ticker's daily bars for the unified daemon (radar_daemon.py)
+    Returns:
+        (str: status text, None) - this scanner only reports, it never pushes
+    """
+    is_match, data = analyze_ticker(ticker, df)
+
+    if "error" in data:
+        return f"❌ {data['error']}", None
+    if is_match:
+        return f"✅ Match RSI={data['rsi']:.1f}, DIF-DEA={data['diff']:.3f}", None
+    return f"⚪ RSI={data['rsi']:.1f}, DIF-DEA={data['diff']:.3f}", None
+
+
 def run_scanner():
     """
     Run scanner and print results
@@ -105,10 +142,14 @@ def run_scanner():
 
     matches = []
 
+    # Fetch the whole watchlist in one batch, topped up from the local cache
+    frames = fetch_bars(WATCH_LIST, period=BAR_PERIOD, interval=BAR_INTERVAL)
+    screened = screen_tickers(frames, WATCH_LIST)
+
     for ticker in WATCH_LIST:
         print(f"Analyzing {ticker}...", end=" ")
 
-        is_match, data = analyze_ticker(ticker)
+        is_match, data = screened[ticker]
 
         if "error" in data:
             print(f"❌ {data['error']}")
@@ -120,7 +161,16 @@ def run_scanner():
         else:
             print(f"⚪ RSI={data['rsi']:.1f}, DIF-DEA={data['diff']:.3f}")
 
-    # Summary
+    print_matches(matches)
+    print(format_summary(latency.end_scan(STRATEGY["name"])))
+
+
+def print_matches(matches):
+    """
+    Print the summary table of matching tickers, lowest RSI first
+    Args:
+        matches: list of (ticker, data dict) from screen_tickers
+    """
     print("=" * 70)
     print(f"\n🎯 Found {len(matches)} matching stocks:\n")
 
@@ -146,9 +196,66 @@ def run_scanner():
     print("\n" + "=" * 70)
 
 
+def run_universe_scan(path=TSE_UNIVERSE_FILE):
+    """
+    Screen every code in a symbol file, one batched chunk at a time.
+    Each chunk is screened as soon as it is downloaded, and its matches
+    and a progress line are printed right away.
+    """
+    tickers = load_universe(path)
+
+    print("=" * 70)
+    print(f" RSI Low-Level MACD Bullish Crossover Universe Screen (RSI < {RSI_THRESHOLD}, DIF > DEA)")
+    print("=" * 70)
+    print(f"Scan time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Universe: {len(tickers)} codes from {path}")
+    print("-" * 70)
+
+    matches = []
+    screened_count = 0
+    failed = 0
+    started = time.perf_counter()
+
+    for chunk, frames in iter_chunks(tickers, period=BAR_PERIOD, interval=BAR_INTERVAL):
+        screened = screen_tickers(frames, chunk)
+        for ticker in chunk:
+            is_match, data = screened[ticker]
+            if "error" in data:
+                failed += 1
+            elif is_match:
+                matches.append((ticker, data))
+                print(f"✅ {ticker:<10} RSI={data['rsi']:.1f}, DIF-DEA={data['diff']:.3f}")
+
+        screened_count += len(chunk)
+        print(f"[{screened_count}/{len(tickers)}] {len(matches)} matches, "
+              f"{failed} without data | {time.perf_counter() - started:.1f}s")
+
+    print_matches(matches)
+    print(format_summary(latency.end_scan(f"{STRATEGY['name']}_universe")))
+
+
+# Plug-in descriptor for radar_daemon.py
+STRATEGY = {
+    "name": "rsi_macd_low",
+    "watch_list": WATCH_LIST,
+    "period": BAR_PERIOD,
+    "interval": BAR_INTERVAL,
+    "evaluate": evaluate,
+}
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RSI low-level MACD bullish crossover scanner")
+    parser.add_argument("--universe", nargs="?", const=TSE_UNIVERSE_FILE, default=None, metavar="SYMBOL_FILE",
+                        help="screen every code in a symbol file instead of WATCH_LIST "
+                             "(default file: tse_universe.txt)")
+    args = parser.parse_args()
+
     try:
-        run_scanner()
+        if args.universe:
+            run_universe_scan(args.universe)
+        else:
+            run_scanner()
     except KeyboardInterrupt:
         print("\n\nProgram interrupted by user")
     except Exception as e:
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Bar-aligned scheduling for the long-running watchers.
+
+Instead of sleeping a fixed interval, a watcher wakes right after the next
+bar boundary (plus a settle delay for the data feed to publish the bar) and
+skips tickers whose latest bar has not changed since the previous scan.
+PriorityPoller additionally spreads tickers that are far from an alert
+over several scans, so each scan only fetches what can still matter.
+"""
+
+from datetime import timedelta
+
+import pandas as pd
+
+import clock
+
+
+def next_wake_time(now, bar_seconds, settle_seconds=0):
+    """
+    Next instant that is `settle_seconds` after a bar boundary.
+
+    Boundaries are multiples of `bar_seconds` counted from midnight, so
+    15-minute bars wake at :00/:15/:30/:45 (+ settle).
+    """
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    elapsed = (now - midnight).total_seconds() - settle_seconds
+    next_boundary = (elapsed // bar_seconds + 1) * bar_seconds
+    return midnight + timedelta(seconds=next_boundary + settle_seconds)
+
+
+def sleep_until_next_bar(bar_seconds, settle_seconds=0):
+    """
+    Block until just after the next bar boundary.
+    Returns: the wake-up time
+    """
+    wake_at = next_wake_time(clock.now(), bar_seconds, settle_seconds)
+    clock.sleep((wake_at - clock.now()).total_seconds())
+    return wake_at
+
+
+def drop_incomplete_bar(df, bar_seconds, now=None):
+    """
+    Drop the last bar if it is still forming (bar start + interval > now).
+    Bars are labelled by their start time, as yfinance does.
+    """
+    if df.empty:
+        return df
+    last_ts = df.index[-1]
+    if now is None:
+        now = pd.Timestamp(clock.now())
+        now = now.tz_convert(last_ts.tz) if last_ts.tz is not None else now.tz_localize(None)
+    if last_ts + pd.Timedelta(seconds=bar_seconds) > now:
+        return df.iloc[:-1]
+    return df
+
+
+class BarChangeTracker:
+    """
+    Remembers the latest bar seen per ticker so unchanged bars can be skipped.
+    A bar counts as changed if its timestamp or any OHLCV value differs.
+    """
+
+    def __init__(self):
+        self.last_seen = {}
+
+    def changed(self, ticker, df):
+        """
+        Record the latest bar of `df` for `ticker`.
+        Returns: True if it differs from the previous call (or is the first)
+        """
+        if df.empty:
+            return True
+        signature = (df.index[-1], tuple(df.iloc[-1].tolist()))
+        if self.last_seen.get(ticker) == signature:
+            return False
+        self.last_seen[ticker] = signature
+        return True
+
+
+class PriorityPoller:
+    """
+    Decides which tickers to fetch on each scan cycle.
+
+    After a ticker is evaluated, the strategy says how many cycles it can
+    wait before the next poll (1 = every cycle). A ticker is due again once
+    that many cycles have passed; tickers never scheduled are always due.
+    """
+
+    def __init__(self):
+        self.cycle = 0
+        self.next_due = {}
+        self.every = {}
+
+    def due(self, tickers):
+        """
+        Tickers to poll this cycle, nearest-to-trigger (shortest interval) first.
+        """
+        due = [t for t in tickers if self.next_due.get(t, 0) <= self.cycle]
+        return sorted(due, key=lambda t: self.every.get(t, 1))
+
+    def schedule(self, ticker, every):
+        """Poll `ticker` again `every` cycles from now."""
+        every = max(1, int(every))
+        self.every[ticker] = every
+        self.next_due[ticker] = self.cycle + every
+
+    def advance(self):
+        """Close the current cycle."""
+        self.cycle += 1
+
+    def poll_all(self):
+        """Make every ticker due on the next cycle (first and last scan of a trading day)."""
+        self.next_due.clear()
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Crash-safe snapshots of the watchers' in-memory state.
+
+A snapshot is a pickled dict written to a temp file, fsync'd and renamed
+over the previous one, so a crash mid-write never leaves a torn file.
+The watchers save after every scan and reload at startup, which keeps
+stages, peaks and alert dates across restarts.
+"""
+
+import os
+import pickle
+from datetime import datetime
+
+SNAPSHOT_VERSION = 1
+STATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "state")
+
+
+def state_path(name):
+    """Snapshot file for one watcher."""
+    return os.path.join(STATE_DIR, f"{name}.pkl")
+
+
+def save_snapshot(path, **sections):
+    """
+    Atomically write named state sections (e.g. ticker_states=...) to disk.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    payload = {
+        "version": SNAPSHOT_VERSION,
+        "saved_at": datetime.now(),
+        "sections": sections,
+    }
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path):
+    """
+    Read a snapshot written by save_snapshot.
+
+    Returns: dict of section name -> value (empty if missing, unreadable
+    or written by an incompatible version)
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "rb") as f:
+            payload = pickle.load(f)
+    except Exception:
+        return {}
+
+    if not isinstance(payload, dict) or payload.get("version") != SNAPSHOT_VERSION:
+        return {}
+    return payload.get("sections", {})
+
+
+def restore_ticker_states(states, saved):
+    """
+    Merge saved per-ticker state into freshly initialised state.
+
+    Only tickers still on the watchlist are restored, and keys added since
+    the snapshot keep their defaults.
+    Returns: number of tickers restored
+    """
+    restored = 0
+    for ticker, saved_state in (saved or {}).items():
+        if ticker in states and isinstance(saved_state, dict):
+            states[ticker].update(saved_state)
+            restored += 1
+    return restored
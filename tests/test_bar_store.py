@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+bar_store round trips and generation handling.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import bar_store
+
+
+def bars(n, start="2024-01-04 09:00", freq="15min", tz="Asia/Tokyo", shift=0.0):
+    """n OHLCV bars from `start`."""
+    index = pd.date_range(start, periods=n, freq=freq, tz=tz).as_unit("ns")
+    close = np.linspace(1000, 1100, n) + shift
+    return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+                         "Volume": np.arange(n, dtype=float)}, index=index)
+
+
+def generation_files(root, ticker, interval):
+    """Files in a ticker directory, and the ones its committed generation needs."""
+    path = bar_store.ticker_dir(root, ticker, interval)
+    gen = bar_store.read_meta(path)["generation"]
+    return sorted(os.listdir(path)), sorted([bar_store.META_FILE, f"fields.{gen}.f8", f"index.{gen}.i8"])
+
+
+def test_round_trip_keeps_index_timezone_and_columns(tmp_path):
+    root = str(tmp_path)
+    intraday = bars(50)
+    daily = bars(30, start="2024-01-04", freq="B", tz=None)
+    daily.iloc[3, 0] = np.nan
+    bar_store.write_frame(root, "7203.T", "15m", intraday)
+    bar_store.write_frame(root, "7203.T", "1d", daily)
+
+    pd.testing.assert_frame_equal(bar_store.read_frame(root, "7203.T", "15m"), intraday, check_freq=False)
+    pd.testing.assert_frame_equal(bar_store.read_frame(root, "7203.T", "1d"), daily, check_freq=False)
+    subset = bar_store.read_frame(root, "7203.T", "1d", columns=["Close", "Low"])
+    assert list(subset.columns) == ["Close", "Low"]
+
+
+def test_missing_ticker_reads_empty(tmp_path):
+    assert bar_store.read_frame(str(tmp_path), "9999.T", "1d").empty
+
+
+def test_rewrite_replaces_the_previous_generation(tmp_path):
+    root = str(tmp_path)
+    bar_store.write_frame(root, "7203.T", "15m", bars(50))
+    newer = bars(51, shift=2.0)
+    bar_store.write_frame(root, "7203.T", "15m", newer)
+
+    pd.testing.assert_frame_equal(bar_store.read_frame(root, "7203.T", "15m"), newer, check_freq=False)
+    present, needed = generation_files(root, "7203.T", "15m")
+    assert present == needed
+
+
+def test_readers_see_complete_generations_while_a_writer_replaces_them(tmp_path):
+    root = str(tmp_path)
+    frames = [bars(40 + i, shift=float(i)) for i in range(6)]
+    bar_store.write_frame(root, "7203.T", "15m", frames[0])
+    errors = []
+
+    def write():
+        for _ in range(15):
+            for df in frames:
+                bar_store.write_frame(root, "7203.T", "15m", df)
+
+    def read():
+        for _ in range(300):
+            df = bar_store.read_frame(root, "7203.T", "15m")
+            # A complete generation of one of the frames (or nothing, mid-switch)
+            if not df.empty and not np.array_equal(df.to_numpy(), frames[len(df) - 40].to_numpy(), equal_nan=True):
+                errors.append(f"torn read of {len(df)} rows")
+
+    threads = [threading.Thread(target=write)] + [threading.Thread(target=read) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    pd.testing.assert_frame_equal(bar_store.read_frame(root, "7203.T", "15m"), frames[-1], check_freq=False)
+    present, needed = generation_files(root, "7203.T", "15m")
+    assert present == needed
+
+
+def test_concurrent_writers_keep_the_freshest_bars(tmp_path):
+    root = str(tmp_path)
+    frames = [bars(40 + i, shift=float(i)) for i in range(6)]
+    errors = []
+
+    def write(order):
+        try:
+            for _ in range(10):
+                for i in order:
+                    bar_store.write_frame(root, "7203.T", "15m", frames[i])
+        except Exception as e:
+            errors.append(repr(e))
+
+    def read():
+        for _ in range(200):
+            df = bar_store.read_frame(root, "7203.T", "15m")
+            if not df.empty and not np.array_equal(df.to_numpy(), frames[len(df) - 40].to_numpy(), equal_nan=True):
+                errors.append(f"torn read of {len(df)} rows")
+
+    orders = [range(6), range(5, -1, -1), [3, 0, 5, 1, 4, 2]]
+    threads = [threading.Thread(target=write, args=(order,)) for order in orders]
+    threads += [threading.Thread(target=read) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    pd.testing.assert_frame_equal(bar_store.read_frame(root, "7203.T", "15m"), frames[-1], check_freq=False)
+    present, needed = generation_files(root, "7203.T", "15m")
+    assert present == needed
+
+
+def test_straggler_with_older_bars_does_not_roll_back(tmp_path):
+    root = str(tmp_path)
+    newer = bars(51)
+    bar_store.write_frame(root, "7203.T", "15m", newer)
+    bar_store.write_frame(root, "7203.T", "15m", bars(50, shift=5.0))
+
+    pd.testing.assert_frame_equal(bar_store.read_frame(root, "7203.T", "15m"), newer, check_freq=False)
+    present, needed = generation_files(root, "7203.T", "15m")
+    assert present == needed
+
+    # A revision of the same last bar is committed
+    revised = bars(51, shift=1.0)
+    bar_store.write_frame(root, "7203.T", "15m", revised)
+    pd.testing.assert_frame_equal(bar_store.read_frame(root, "7203.T", "15m"), revised, check_freq=False)
+
+
+def test_leftovers_of_crashed_writers_are_swept_once_old(tmp_path):
+    root = str(tmp_path)
+    bar_store.write_frame(root, "7203.T", "15m", bars(50))
+    path = bar_store.ticker_dir(root, "7203.T", "15m")
+    crashed = ["index.7.i8", "fields.7.f8", "meta.json.old.tmp"]
+    in_progress = ["index.9.i8", "meta.json.new.tmp"]
+    for name in crashed + in_progress:
+        open(os.path.join(path, name), "wb").close()
+    old = time.time() - bar_store.ORPHAN_SECONDS - 60
+    for name in crashed:
+        os.utime(os.path.join(path, name), (old, old))
+
+    bar_store.write_frame(root, "7203.T", "15m", bars(51))
+
+    present, needed = generation_files(root, "7203.T", "15m")
+    assert present == sorted(needed + in_progress)
+
+
+def test_commit_waits_for_the_lock_and_breaks_a_stale_one(tmp_path):
+    root = str(tmp_path)
+    bar_store.write_frame(root, "7203.T", "15m", bars(50))
+    lock = os.path.join(bar_store.ticker_dir(root, "7203.T", "15m"), bar_store.LOCK_FILE)
+
+    # Held by a live writer: the commit waits until it is released
+    open(lock, "wb").close()
+    writer = threading.Thread(target=bar_store.write_frame, args=(root, "7203.T", "15m", bars(51)))
+    writer.start()
+    time.sleep(0.2)
+    assert len(bar_store.read_frame(root, "7203.T", "15m")) == 50
+    os.remove(lock)
+    writer.join(5)
+    assert len(bar_store.read_frame(root, "7203.T", "15m")) == 51
+
+    # Left by a crashed writer: broken after LOCK_STALE_SECONDS
+    open(lock, "wb").close()
+    old = time.time() - bar_store.LOCK_STALE_SECONDS - 1
+    os.utime(lock, (old, old))
+    bar_store.write_frame(root, "7203.T", "15m", bars(52))
+    assert len(bar_store.read_frame(root, "7203.T", "15m")) == 52
+    assert not os.path.exists(lock)
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+The daily divergence path (per-ticker DivergenceTracker) against the
+original stateless detector.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import Bullish_Divergence_finder as finder
+
+
+def stateless_divergence(df, lookback):
+    """The original detect_bullish_divergence_low on one download window."""
+    close, low = df["Close"], df["Low"]
+    dif = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    hist = (dif - dif.ewm(span=9, adjust=False).mean()) * 2
+    recent_low = low.iloc[-(lookback + 1):]
+    recent_hist = hist.iloc[-(lookback + 1):]
+
+    current_low = float(recent_low.iloc[-1])
+    min_low = float(recent_low.min())
+    if current_low != min_low:
+        return False, {"error": f"Not lowest low (min={min_low:.2f})"}
+    prev_hist_min = float(recent_hist.iloc[:-1].min())
+    if float(recent_hist.iloc[-1]) <= prev_hist_min:
+        return False, {"error": "Histogram not rising"}
+    return True, {"low": current_low, "hist": float(recent_hist.iloc[-1]), "prev_hist_min": prev_hist_min,
+                  "prev_hist_date": recent_hist.iloc[:-1].idxmin().strftime("%Y-%m-%d")}
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_daily_tracker_matches_stateless_detector(monkeypatch, seed):
+    monkeypatch.setattr(finder, "daily_trackers", {})
+    rng = np.random.default_rng(seed)
+    n, window = 220, 63
+    index = pd.bdate_range("2024-01-01", periods=n)
+    close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    low = np.round(close * (0.99 - np.abs(rng.normal(0, 0.01, n))))  # Rounded: ties in the window
+    history = pd.DataFrame({"Open": close, "High": close * 1.01, "Low": low, "Close": close, "Volume": 1e6},
+                           index=index)
+
+    found = 0
+    for end in range(window, n):
+        # The forming bar is revised during the day; the window slides by one bar each day
+        for step in (2, 1, 0):
+            df = history.iloc[end - window:end + 1].copy()
+            df.iloc[-1, df.columns.get_loc("Low")] += step * 5
+            df.iloc[-1, df.columns.get_loc("Close")] += step * 3
+
+            ok, details = finder.detect_bullish_divergence_low("TEST.T", df)
+            expected_ok, expected = stateless_divergence(df, finder.LOOKBACK_BARS)
+            assert ok == expected_ok
+            assert {key: details[key] for key in expected} == expected
+            found += ok
+
+    assert found
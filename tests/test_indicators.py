@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming indicator engines against the pandas calculations they replace.
+"""
+
+import importlib
+
+import numpy as np
+import pandas as pd
+
+from indicators import BollingerBank, DivergenceTracker, IncrementalMACD, IncrementalRSI, calculate_rsi
+
+three_lines = importlib.import_module("3_lines_method")
+
+
+def random_closes(n, seed=7):
+    """Random-walk daily closes."""
+    rng = np.random.default_rng(seed)
+    closes = 1000 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.Series(closes, index=pd.bdate_range("2024-01-01", periods=n))
+
+
+def macd_hist(close):
+    """MACD(12, 26, 9) histogram as computed by the original scanners."""
+    dif = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    return (dif - dif.ewm(span=9, adjust=False).mean()) * 2
+
+
+def baseline_divergence(low, hist, lookback):
+    """The original window check of detect_bullish_divergence_low on the last lookback + 1 bars."""
+    recent_low = low.iloc[-(lookback + 1):]
+    recent_hist = hist.iloc[-(lookback + 1):]
+    if float(recent_low.iloc[-1]) != float(recent_low.min()):
+        return False, None
+    if float(recent_hist.iloc[-1]) <= float(recent_hist.iloc[:-1].min()):
+        return False, None
+    return True, recent_hist.iloc[:-1].idxmin()
+
+
+def test_macd_matches_ewm_bit_for_bit():
+    close = random_closes(300)
+    dif = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    dea = dif.ewm(span=9, adjust=False).mean()
+
+    engine = IncrementalMACD(history=len(close))
+    for ts, value in close.items():
+        engine.update(float(value), ts)
+
+    assert np.array_equal(np.array(engine.dif_history), dif.to_numpy())
+    assert np.array_equal(np.array(engine.dea_history), dea.to_numpy())
+
+
+def test_macd_revisions_match_a_fresh_series():
+    close = random_closes(120)
+    engine = IncrementalMACD()
+    engine.sync(close.iloc[:100])
+    for i in range(100, len(close)):
+        forming = close.iloc[:i + 1].copy()
+        for factor in (0.99, 1.01, 1.0):  # In-progress bar revised during the day
+            forming.iloc[-1] = close.iloc[i] * factor
+            dif, dea = engine.sync(forming)
+
+        assert (dif, dea) == IncrementalMACD().sync(close.iloc[:i + 1])
+
+
+def test_rsi_matches_calculate_rsi_bit_for_bit():
+    close = random_closes(300)
+    expected = calculate_rsi(close, 14).to_numpy()
+
+    engine = IncrementalRSI(14, mode="sma", history=len(close))
+    engine.sync(close)
+
+    assert np.array_equal(np.array(engine.history), expected, equal_nan=True)
+
+
+def test_rsi_revisions_match_a_fresh_series():
+    close = random_closes(120)
+    engine = IncrementalRSI(14, mode="sma")
+    engine.sync(close.iloc[:100])
+    for i in range(100, len(close)):
+        forming = close.iloc[:i + 1].copy()
+        for factor in (0.99, 1.01, 1.0):
+            forming.iloc[-1] = close.iloc[i] * factor
+            value = engine.sync(forming)
+
+        assert value == calculate_rsi(close.iloc[:i + 1], 14).iloc[-1]
+
+
+def test_wilder_rsi_matches_reference_smoothing():
+    close = random_closes(200)
+    delta = np.diff(close.to_numpy())
+    gains, losses = np.clip(delta, 0, None), np.clip(-delta, 0, None)
+    avg_gain, avg_loss = gains[:14].mean(), losses[:14].mean()
+    expected = [100 - 100 / (1 + avg_gain / avg_loss)]
+    for gain, loss in zip(gains[14:], losses[14:]):
+        avg_gain = (avg_gain * 13 + gain) / 14
+        avg_loss = (avg_loss * 13 + loss) / 14
+        expected.append(100 - 100 / (1 + avg_gain / avg_loss))
+
+    engine = IncrementalRSI(14, mode="wilder", history=len(close))
+    engine.sync(close)
+
+    assert np.isnan(np.array(engine.history)[:14]).all()
+    np.testing.assert_allclose(np.array(engine.history)[14:], expected, rtol=1e-12)
+
+
+def test_anchored_rsi_matches_sliding_download_windows():
+    close = random_closes(200)
+    window = 63
+    engine = IncrementalRSI(14, mode="sma", history=10, anchored=True)
+
+    for end in range(window, len(close)):
+        frame = close.iloc[end - window:end + 1].copy()
+        for factor in (1.01, 0.99, 1.0):  # Forming bar revised during the day
+            frame.iloc[-1] = close.iloc[end] * factor
+            assert engine.sync(frame) == calculate_rsi(frame, 14).iloc[-1]
+
+
+def test_track2_reversal_at_exactly_30(monkeypatch):
+    # Gains sum to 3 and losses to 7 over the last 14 changes: RSI is exactly 30.0
+    deltas = [1, 1, -1, 1, -1, -1, 1, 1, -1, -1] * 3 + [-1, 1, -1, -1, 1, -1, -1, 1, -1, -1, -1, 0, 0, 0, 0]
+    closes = 1000.0 + np.concatenate([[0], np.cumsum(deltas)])
+    df = pd.DataFrame({"Close": closes}, index=pd.bdate_range("2024-01-01", periods=len(closes)))
+
+    expected = calculate_rsi(df["Close"], 14)
+    assert expected.iloc[-2] < 30 and expected.iloc[-1] == 30.0
+
+    ticker = three_lines.WATCH_LIST[0]
+    monkeypatch.setitem(three_lines.rsi_engines, ticker,
+                        IncrementalRSI(three_lines.RSI_PERIOD, mode="sma", history=10, anchored=True))
+
+    # Yesterday's download window, then today's starting one bar later
+    three_lines.track2_rsi_reversal(ticker, df.iloc[:-1])
+    is_reversed, rsi, _, _ = three_lines.track2_rsi_reversal(ticker, df.iloc[1:])
+
+    assert rsi == calculate_rsi(df["Close"].iloc[1:], 14).iloc[-1] == 30.0
+    assert is_reversed
+
+
+def test_bollinger_matches_rolling_std():
+    tickers = ["A", "B", "C"]
+    frames = {ticker: random_closes(250, seed=seed) for seed, ticker in enumerate(tickers)}
+    frames["C"].iloc[[30, 31, 90]] = np.nan  # Missing closes are skipped, as by rolling()
+
+    bank = BollingerBank(tickers, period=20, num_std=2)
+    for ticker, close in frames.items():
+        sma = close.rolling(20).mean()
+        std = close.rolling(20).std()
+        for end in range(20, len(close) + 1):
+            bands = bank.sync(ticker, close.iloc[:end])
+            i = end - 1
+            expected = (sma.iloc[i], sma.iloc[i] + 2 * std.iloc[i], sma.iloc[i] - 2 * std.iloc[i])
+            np.testing.assert_allclose(bands, expected, rtol=1e-10, equal_nan=True)
+
+
+def test_bollinger_revisions_match_a_fresh_bank():
+    close = random_closes(80)
+    bank = BollingerBank(["A"], period=20)
+    bank.sync("A", close.iloc[:60])
+    for i in range(60, len(close)):
+        forming = close.iloc[:i + 1].copy()
+        for factor in (0.97, 1.03, 1.0):
+            forming.iloc[-1] = close.iloc[i] * factor
+            bands = bank.sync("A", forming)
+
+        np.testing.assert_allclose(bands, BollingerBank(["A"], period=20).sync("A", close.iloc[:i + 1]), rtol=1e-10)
+
+
+def test_divergence_tracker_matches_baseline_detector():
+    lookback = 10
+    close = random_closes(400, seed=3)
+    low = (close * 0.99).round(0)  # Rounded lows produce ties in the window
+    hist = macd_hist(close)
+
+    tracker = DivergenceTracker(lookback)
+    found_any = False
+    for i, ts in enumerate(close.index):
+        result = tracker.update(float(low.iloc[i]), float(hist.iloc[i]), ts)
+        if i < lookback:
+            assert not result["found"]
+            continue
+
+        found, prev_hist_ts = baseline_divergence(low.iloc[:i + 1], hist.iloc[:i + 1], lookback)
+        assert result["found"] == found
+        if found:
+            found_any = True
+            assert result["prev_hist_ts"] == prev_hist_ts
+
+    assert found_any
+
+
+def test_divergence_tracker_revise_matches_fresh_feed():
+    lookback = 10
+    close = random_closes(60, seed=5)
+    low = (close * 0.99).round(0)
+    hist = macd_hist(close)
+
+    tracker = DivergenceTracker(lookback)
+    for i, ts in enumerate(close.index):
+        tracker.update(float(low.iloc[i]) + 50, float(hist.iloc[i]) - 1, ts)
+        result = tracker.revise(float(low.iloc[i]), float(hist.iloc[i]), ts)
+
+        fresh = DivergenceTracker(lookback)
+        for j in range(i + 1):
+            expected = fresh.update(float(low.iloc[j]), float(hist.iloc[j]), close.index[j])
+        assert result == expected
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Cache-aware fetching in market_data against a fake upstream.
+"""
+
+import pandas as pd
+import pytest
+
+import market_data
+
+
+def daily_bars(n):
+    """n daily OHLCV bars ending today."""
+    index = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=n).as_unit("ns")
+    close = pd.Series(range(n), index=index, dtype=float) + 1000
+    return pd.DataFrame({"Open": close, "High": close + 5, "Low": close - 5, "Close": close, "Volume": 1e6})
+
+
+class Upstream:
+    """Fake batched download serving `bars`, recording (tickers, start) of every call."""
+
+    def __init__(self):
+        self.bars = {}
+        self.calls = []
+        self.fail = False
+
+    def download_batch(self, tickers, period, interval, start=None):
+        self.calls.append((tuple(tickers), start))
+        if self.fail:
+            raise ConnectionError("upstream down")
+        return {ticker: self.slice(ticker, start) for ticker in tickers}
+
+    def download_ticker(self, ticker, period, interval, start=None):
+        return self.download_batch([ticker], period, interval, start=start)[ticker]
+
+    def slice(self, ticker, start):
+        df = self.bars[ticker]
+        return df[df.index >= start] if start is not None else df
+
+
+@pytest.fixture
+def upstream(tmp_path, monkeypatch):
+    fake = Upstream()
+    monkeypatch.setattr(market_data, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(market_data, "download_batch", fake.download_batch)
+    monkeypatch.setattr(market_data, "download_ticker", fake.download_ticker)
+    return fake
+
+
+def test_merge_bars_revises_overlap_and_appends():
+    full = daily_bars(30)
+    fresh = full.iloc[-2:].copy()
+    fresh.iloc[0, fresh.columns.get_loc("Close")] += 7  # The cached in-progress bar was revised
+
+    merged = market_data.merge_bars(full.iloc[:-1], fresh)
+
+    assert merged.index.equals(full.index)
+    assert merged["Close"].iloc[-2] == full["Close"].iloc[-2] + 7
+    assert merged["Close"].iloc[-1] == full["Close"].iloc[-1]
+
+
+def test_fetch_bars_tops_up_from_last_cached_bar(upstream):
+    full = daily_bars(40)
+    upstream.bars = {"7203.T": full.iloc[:-1]}
+    market_data.fetch_bars(["7203.T"], period="3mo", interval="1d")
+    assert upstream.calls == [(("7203.T",), None)]
+
+    upstream.bars = {"7203.T": full}
+    frames = market_data.fetch_bars(["7203.T"], period="3mo", interval="1d")
+
+    assert upstream.calls[-1] == (("7203.T",), full.index[-2])
+    pd.testing.assert_frame_equal(frames["7203.T"], full, check_freq=False)
+    pd.testing.assert_frame_equal(market_data.load_cached("7203.T", "1d"), full, check_freq=False)
+
+
+def test_fetch_bars_serves_cache_when_download_fails(upstream):
+    full = daily_bars(40)
+    upstream.bars = {"7203.T": full}
+    market_data.fetch_bars(["7203.T"], period="3mo", interval="1d")
+
+    upstream.fail = True
+    frames = market_data.fetch_bars(["7203.T"], period="3mo", interval="1d")
+
+    pd.testing.assert_frame_equal(frames["7203.T"], full, check_freq=False)
+
+
+def test_merge_bars_returns_cached_when_nothing_changed():
+    full = daily_bars(30)
+    assert market_data.merge_bars(full, full.iloc[-2:].copy()) is full
+
+
+@pytest.mark.parametrize("fetch", ["fetch_bars", "fetch_ticker"])
+def test_top_up_without_new_bars_keeps_cache_file(upstream, monkeypatch, fetch):
+    full = daily_bars(40)
+    upstream.bars = {"7203.T": full}
+    market_data.fetch_bars(["7203.T"], period="3mo", interval="1d")
+
+    saves = []
+    monkeypatch.setattr(market_data, "save_cached", lambda *args: saves.append(args))
+    if fetch == "fetch_bars":
+        def top_up():
+            return market_data.fetch_bars(["7203.T"], period="3mo", interval="1d")["7203.T"]
+    else:
+        def top_up():
+            return market_data.fetch_ticker("7203.T", period="3mo", interval="1d")
+
+    pd.testing.assert_frame_equal(top_up(), full, check_freq=False)
+    assert saves == []
+
+    revised = full.copy()
+    revised.iloc[-1, revised.columns.get_loc("Close")] += 1
+    upstream.bars = {"7203.T": revised}
+    pd.testing.assert_frame_equal(top_up(), revised, check_freq=False)
+    assert len(saves) == 1
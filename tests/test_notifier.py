@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+BarkDispatcher against a local HTTP stub standing in for the Bark server.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+import pytest
+
+from notifier import BarkDispatcher
+
+
+class StubBark(BaseHTTPRequestHandler):
+    """Answers with the next queued status (200 once they run out), after `delay` seconds."""
+
+    def do_GET(self):
+        self.server.requests.append(unquote(self.path))
+        time.sleep(self.server.delay)
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def bark():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubBark)
+    server.daemon_threads = True
+    server.requests, server.statuses, server.delay = [], [], 0
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def dispatcher(bark, tmp_path, results, **kwargs):
+    kwargs.setdefault("backoff", 0.01)
+    return BarkDispatcher("key", server=bark.url, dead_letter_file=str(tmp_path / "dead_letter.jsonl"),
+                          on_result=lambda ticker, ok: results.append((ticker, ok)), **kwargs)
+
+
+def dead_letters(tmp_path):
+    path = tmp_path / "dead_letter.jsonl"
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_push_is_delivered(bark, tmp_path):
+    results = []
+    notifier = dispatcher(bark, tmp_path, results)
+    notifier.send("7203.T", "Title", "Body 1/2")
+
+    assert notifier.flush(5)
+    assert results == [("7203.T", True)]
+    assert bark.requests == ["/key/Title/Body 1/2"]
+    assert dead_letters(tmp_path) == []
+
+
+def test_failed_push_is_retried_until_delivered(bark, tmp_path):
+    bark.statuses = [500, 503]
+    results = []
+    notifier = dispatcher(bark, tmp_path, results)
+    notifier.send("7203.T", "Title", "Body")
+
+    assert notifier.flush(5)
+    assert results == [("7203.T", True)]
+    assert len(bark.requests) == 3
+    assert dead_letters(tmp_path) == []
+
+
+def test_undeliverable_push_is_dead_lettered(bark, tmp_path):
+    bark.statuses = [500] * 3
+    results = []
+    notifier = dispatcher(bark, tmp_path, results, retries=2)
+    notifier.send("7203.T", "Title", "Body")
+
+    assert notifier.flush(5)
+    assert results == [("7203.T", False)]
+    assert len(bark.requests) == 3
+    [record] = dead_letters(tmp_path)
+    assert (record["ticker"], record["title"], record["body"], record["error"]) == ("7203.T", "Title", "Body", "HTTP_500")
+
+
+def test_close_dead_letters_pushes_it_cannot_deliver(bark, tmp_path):
+    bark.delay = 0.5  # Every attempt times out
+    results = []
+    notifier = dispatcher(bark, tmp_path, results, timeout=0.2, backoff=30)
+    for ticker in ("7203.T", "6758.T", "9984.T"):
+        notifier.send(ticker, "Title", ticker)
+
+    started = time.monotonic()
+    assert not notifier.close(timeout=0.1)
+    assert time.monotonic() - started < 5  # The 30-second backoff is cut short
+
+    records = dead_letters(tmp_path)
+    assert sorted(record["ticker"] for record in records) == ["6758.T", "7203.T", "9984.T"]
+    assert all(record["error"].startswith("Shutdown") for record in records)
+    assert notifier.queue.unfinished_tasks == 0
+
+
+def test_close_returns_once_everything_is_delivered(bark, tmp_path):
+    results = []
+    notifier = dispatcher(bark, tmp_path, results)
+    notifier.send("7203.T", "Title", "Body")
+
+    assert notifier.close()
+    assert results == [("7203.T", True)]
+    assert dead_letters(tmp_path) == []
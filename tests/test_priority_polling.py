@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Replays of priority polling against polling every ticker on every scan:
+both must raise the same alerts on the same scans.
+"""
+
+import copy
+import importlib
+from datetime import datetime, time as dt_time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import clock
+import MACD_full_breakout_watcher as macd
+from indicator_cache import indicator_cache
+from indicators import BollingerBank, IncrementalMACD, IncrementalRSI
+from scheduler import BarChangeTracker, PriorityPoller
+
+three_lines = importlib.import_module("3_lines_method")
+
+
+@pytest.fixture(autouse=True)
+def restore_clock(monkeypatch):
+    monkeypatch.setattr(clock, "current", clock.current)
+
+
+def trending_bars(seed, periods):
+    """Random walk with drifting stretches, so every strategy stage gets reached."""
+    rng = np.random.default_rng(seed)
+    drift = np.repeat(rng.normal(0, 0.003, periods // 30 + 1), 30)[:periods]
+    return 1000 * np.exp(np.cumsum(drift + rng.normal(0, 0.008, periods)))
+
+
+def intraday_frame(seed, days=40):
+    """15-minute bars of `days` sessions (20 bars each)."""
+    sessions = pd.bdate_range("2024-06-03", periods=days)
+    index = pd.DatetimeIndex([day + pd.Timedelta(hours=9, minutes=15 * k) for day in sessions for k in range(20)])
+    close = trending_bars(seed, len(index))
+    return pd.DataFrame({"Open": close, "High": close * 1.002, "Low": close * 0.998, "Close": close,
+                         "Volume": 1e5}, index=index.tz_localize("Asia/Tokyo"))
+
+
+def replay_macd(monkeypatch, ticker, df, priority):
+    """Feed the closed bars one scan at a time; skipped scans are caught up by get_mac_status."""
+    monkeypatch.setattr(macd, "PRIORITY_POLLING", priority)
+    monkeypatch.setitem(macd.ticker_states, ticker, copy.deepcopy(INITIAL_MACD_STATE))
+    monkeypatch.setitem(macd.macd_engines, ticker, IncrementalMACD(history=macd.STAGE_LOOKBACK))
+
+    alerts, polls, next_poll = [], 0, 0
+    for k in range(60, len(df) + 1):
+        if k < next_poll:
+            continue
+        polls += 1
+        clock.install(clock.SimulatedClock(df.index[k - 1] + pd.Timedelta(minutes=15)))
+        _, triggered = macd.get_mac_status(ticker, df.iloc[:k])
+        if triggered:
+            alerts.append(k)
+        next_poll = k + macd.poll_every(ticker)
+    return alerts, polls
+
+
+INITIAL_MACD_STATE = copy.deepcopy(next(iter(macd.ticker_states.values())))
+
+
+def test_macd_priority_polling_raises_the_same_alerts(monkeypatch):
+    ticker = macd.WATCH_LIST[0]
+    total_alerts = full_polls = priority_polls = 0
+    for seed in range(6):
+        df = intraday_frame(seed)
+        full, polls = replay_macd(monkeypatch, ticker, df, priority=False)
+        priority, fewer = replay_macd(monkeypatch, ticker, df, priority=True)
+
+        assert priority == full
+        total_alerts += len(full)
+        full_polls += polls
+        priority_polls += fewer
+
+    assert total_alerts
+    assert priority_polls < full_polls
+
+
+SCANS_PER_DAY = 6
+
+
+def three_lines_universe(tickers, days, window=63):
+    """
+    Per ticker and day, the opening price and the forming bar's path over
+    SCANS_PER_DAY scans (the last one is the final bar, seen on the closing scan).
+    """
+    rng = np.random.default_rng(11)
+    index = pd.bdate_range("2024-01-01", periods=days + window)
+    steps = rng.normal(0, 0.02 / np.sqrt(SCANS_PER_DAY), (len(tickers), len(index), SCANS_PER_DAY))
+    shocks = rng.random((len(tickers), len(index), 1)) < 0.04  # Occasional sell-offs
+    steps += shocks * rng.normal(-0.03, 0.02, (len(tickers), len(index), 1)) / SCANS_PER_DAY
+    paths = np.cumsum(steps, axis=2)
+    opens = 1000 * np.exp(np.concatenate([np.zeros((len(tickers), 1)), np.cumsum(paths[:, :-1, -1], axis=1)], axis=1))
+    prices = opens[:, :, None] * np.exp(paths)
+    return index, opens, prices
+
+
+def forming_frame(index, opens, prices, i, d, k, window=63):
+    """Download window of ticker i on day d as seen by scan k of that day."""
+    seen = prices[i, d - window:d + 1].copy()
+    seen[-1, k + 1:] = np.nan
+    open_ = opens[i, d - window:d + 1]
+    return pd.DataFrame({"Open": open_, "High": np.maximum(open_, np.nanmax(seen, axis=1)) * 1.002,
+                         "Low": np.minimum(open_, np.nanmin(seen, axis=1)) * 0.998,
+                         "Close": seen[np.arange(len(seen)), [SCANS_PER_DAY - 1] * window + [k]],
+                         "Volume": 1e6}, index=index[d - window:d + 1])
+
+
+def replay_three_lines(monkeypatch, tickers, days, priority):
+    """
+    Run the 3_lines scan loop over simulated sessions: every ticker on the
+    first and the closing scan of each day, poll_every in between.
+    Returns: (alerts, stage transitions, polls) as (ticker, day, scan) tuples
+    """
+    monkeypatch.setattr(three_lines, "PRIORITY_POLLING", priority)
+    monkeypatch.setattr(three_lines, "ticker_states", {
+        ticker: {"stage": 0, "touch_date": None, "rsi_min": 100, "alert_date": None, "stage_history": []}
+        for ticker in tickers})
+    monkeypatch.setattr(three_lines, "rsi_engines", {
+        ticker: IncrementalRSI(three_lines.RSI_PERIOD, mode=three_lines.RSI_SMOOTHING, history=10, anchored=True)
+        for ticker in tickers})
+    monkeypatch.setattr(three_lines, "bollinger", BollingerBank(tickers, three_lines.BOLL_PERIOD, three_lines.BOLL_STD))
+    monkeypatch.setattr(three_lines, "bar_tracker", BarChangeTracker())
+    indicator_cache.frames.clear()
+
+    index, opens, prices = three_lines_universe(tickers, days)
+    poller = PriorityPoller()
+    alerts, transitions, polls = [], [], 0
+    stages = {ticker: 0 for ticker in tickers}
+    for d in range(len(index) - days, len(index)):
+        poller.poll_all()  # Session open
+        for k in range(SCANS_PER_DAY):
+            minutes = 9 * 60 + 50 * k if k < SCANS_PER_DAY - 1 else 15 * 60 + 30
+            at = datetime.combine(index[d].date(), dt_time(minutes // 60, minutes % 60, 5))
+            clock.install(clock.SimulatedClock(at))
+            if three_lines.tse.closing():
+                poller.poll_all()
+            for ticker in poller.due(tickers):
+                polls += 1
+                _, alert = three_lines.evaluate(ticker, forming_frame(index, opens, prices, tickers.index(ticker), d, k))
+                scan = (ticker, str(index[d].date()), k)
+                if alert:
+                    alerts.append(scan)
+                stage = three_lines.ticker_states[ticker]["stage"]
+                if stage != stages[ticker]:
+                    transitions.append(scan + (stage,))
+                    stages[ticker] = stage
+                poller.schedule(ticker, three_lines.poll_every(ticker))
+            poller.advance()
+    return alerts, transitions, polls
+
+
+def test_three_lines_priority_polling_delays_no_transition(monkeypatch):
+    tickers = [f"{9000 + i}.T" for i in range(8)]
+    full, full_transitions, full_polls = replay_three_lines(monkeypatch, tickers, 70, priority=False)
+    priority, transitions, priority_polls = replay_three_lines(monkeypatch, tickers, 70, priority=True)
+
+    # Every stage change and alert lands on the same scan as with full polling
+    assert full
+    assert priority == full
+    assert transitions == full_transitions
+    assert priority_polls < full_polls
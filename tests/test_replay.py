@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Offline replay of a watcher's own run loop over a synthetic recording.
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import bar_store
+import clock
+import market_data
+import MACD_full_breakout_watcher as macd
+import notifier
+import state_store
+from data_providers import ReplayProvider
+from indicators import IncrementalMACD
+from latency import latency
+from replay_radar import replay
+from scheduler import BarChangeTracker
+
+# Holiday-free TSE sessions; the replay covers the last week of them
+SESSIONS = pd.bdate_range("2026-05-07", "2026-06-19")
+REPLAY_START, REPLAY_END = datetime(2026, 6, 15, 8, 0), datetime(2026, 6, 19, 16, 0)
+TICKERS = macd.WATCH_LIST[:3]
+
+
+@pytest.fixture(autouse=True)
+def replay_sandbox(monkeypatch, tmp_path):
+    """Put back everything replay() and run_radar replace, and keep their files in tmp_path."""
+    monkeypatch.setattr(clock, "current", clock.current)
+    monkeypatch.setattr(state_store, "STATE_DIR", state_store.STATE_DIR)
+    monkeypatch.setattr(market_data, "CACHE_DIR", market_data.CACHE_DIR)
+    monkeypatch.setattr(market_data, "provider", market_data.provider)
+    monkeypatch.setattr(notifier, "DRY_RUN", notifier.DRY_RUN)
+    monkeypatch.setattr(latency, "log_file", str(tmp_path / "latency.log"))
+    monkeypatch.setattr(latency, "metrics_file", str(tmp_path / "latency_metrics.jsonl"))
+
+
+def session_bars(seed):
+    """15-minute bars over SESSIONS (10 morning and 12 afternoon bars a day)."""
+    starts = [pd.Timedelta(hours=9, minutes=15 * k) for k in range(10)]
+    starts += [pd.Timedelta(hours=12, minutes=30 + 15 * k) for k in range(12)]
+    index = pd.DatetimeIndex([day + start for day in SESSIONS for start in starts]).tz_localize("Asia/Tokyo")
+    rng = np.random.default_rng(seed)
+    drift = np.repeat(rng.normal(0, 0.003, len(index) // 30 + 1), 30)[:len(index)]
+    close = 1000 * np.exp(np.cumsum(drift + rng.normal(0, 0.008, len(index))))
+    return pd.DataFrame({"Open": close, "High": close * 1.002, "Low": close * 0.998, "Close": close,
+                         "Volume": 1e5}, index=index.as_unit("ns"))
+
+
+def run_macd_replay(monkeypatch, data_dir, work_dir):
+    """Replay MACD_full_breakout_watcher.run_radar from fresh state."""
+    monkeypatch.setattr(notifier, "dry_run_log", [])
+    monkeypatch.setattr(macd, "STATE_FILE", str(work_dir / "state" / "macd_full_breakout.pkl"))
+    monkeypatch.setattr(macd, "ticker_states", {
+        ticker: {"stage": None, "max_dif": 0.0, "alert_date": None,
+                 "stage1_confirmed": False, "stage2_confirmed": False}
+        for ticker in macd.WATCH_LIST})
+    monkeypatch.setattr(macd, "macd_engines", {
+        ticker: IncrementalMACD(history=macd.STAGE_LOOKBACK) for ticker in macd.WATCH_LIST})
+    monkeypatch.setattr(macd, "bar_tracker", BarChangeTracker())
+    return replay("MACD_full_breakout_watcher", str(data_dir), REPLAY_START, REPLAY_END, work_dir=str(work_dir))
+
+
+def record(root, seeds=(0, 1, 2)):
+    for ticker, seed in zip(TICKERS, seeds):
+        bar_store.write_frame(str(root), ticker, "15m", session_bars(seed))
+
+
+def test_bars_are_published_once_they_close(tmp_path):
+    record(tmp_path)
+    daily = session_bars(0)["Close"].resample("D").last().dropna()
+    daily = pd.DataFrame({"Close": daily.to_numpy()}, index=daily.index.tz_localize(None).as_unit("ns"))
+    bar_store.write_frame(str(tmp_path), TICKERS[0], "1d", daily)
+    provider = ReplayProvider(str(tmp_path))
+
+    def last_bar(interval, at):
+        clock.install(clock.SimulatedClock(at))
+        return provider.download_ticker(TICKERS[0], "1mo", interval).index[-1]
+
+    # The 10:00 bar closes at 10:15, the day's daily bar at 15:30
+    assert last_bar("15m", datetime(2026, 6, 15, 10, 14, 59)) == pd.Timestamp("2026-06-15 09:45", tz="Asia/Tokyo")
+    assert last_bar("15m", datetime(2026, 6, 15, 10, 15)) == pd.Timestamp("2026-06-15 10:00", tz="Asia/Tokyo")
+    assert last_bar("1d", datetime(2026, 6, 15, 15, 29, 59)) == pd.Timestamp("2026-06-12")
+    assert last_bar("1d", datetime(2026, 6, 15, 15, 30)) == pd.Timestamp("2026-06-15")
+
+
+def test_macd_replay_is_deterministic(monkeypatch, tmp_path):
+    record(tmp_path / "recording")
+    first = run_macd_replay(monkeypatch, tmp_path / "recording", tmp_path / "first")
+    second = run_macd_replay(monkeypatch, tmp_path / "recording", tmp_path / "second")
+
+    alerts = [(alert["at"].strftime("%Y-%m-%d %H:%M:%S"), alert["ticker"], alert["body"]) for alert in first["alerts"]]
+    assert alerts == [
+        ("2026-06-15 14:00:20", "6723.T", "6723.T_DEA_Retraced_50pct_Peak_7.741"),
+        ("2026-06-16 11:00:20", "6723.T", "6723.T_DEA_Retraced_50pct_Peak_7.741"),
+    ]
+    assert second["alerts"] == first["alerts"]
+    assert first["scans"] == second["scans"] == 130
+    assert first["bars"] == second["bars"]
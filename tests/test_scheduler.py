@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+PriorityPoller scheduling.
+"""
+
+from scheduler import PriorityPoller
+
+
+def test_unscheduled_tickers_are_always_due():
+    poller = PriorityPoller()
+    assert poller.due(["A", "B"]) == ["A", "B"]
+    poller.advance()
+    assert poller.due(["A", "B"]) == ["A", "B"]
+
+
+def test_tickers_wait_their_interval_and_near_ones_come_first():
+    poller = PriorityPoller()
+    poller.schedule("far", 3)
+    poller.schedule("near", 1)
+    polled = []
+    for _ in range(6):
+        poller.advance()
+        due = poller.due(["far", "near"])
+        polled.append(due)
+        for ticker in due:
+            poller.schedule(ticker, 3 if ticker == "far" else 1)
+
+    assert polled == [["near"], ["near"], ["near", "far"], ["near"], ["near"], ["near", "far"]]
+
+
+def test_interval_is_at_least_one_cycle():
+    poller = PriorityPoller()
+    poller.schedule("A", 0)
+    poller.advance()
+    assert poller.due(["A"]) == ["A"]
+
+
+def test_poll_all_makes_every_ticker_due():
+    poller = PriorityPoller()
+    poller.schedule("far", 3)
+    poller.advance()
+    assert poller.due(["far"]) == []
+
+    poller.poll_all()
+    assert poller.due(["far"]) == ["far"]
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+TSE holidays and sessions against the published calendars.
+"""
+
+from datetime import date, datetime
+
+import pytest
+
+from tse_calendar import JST, TSECalendar, is_exchange_holiday, japanese_holidays
+
+HOLIDAYS = {
+    2025: [
+        (1, 1), (1, 13), (2, 11), (2, 23), (2, 24), (3, 20), (4, 29), (5, 3), (5, 4), (5, 5), (5, 6),
+        (7, 21), (8, 11), (9, 15), (9, 23), (10, 13), (11, 3), (11, 23), (11, 24),
+    ],
+    2026: [
+        (1, 1), (1, 12), (2, 11), (2, 23), (3, 20), (4, 29), (5, 3), (5, 4), (5, 5), (5, 6),
+        (7, 20), (8, 11), (9, 21), (9, 22), (9, 23), (10, 12), (11, 3), (11, 23),
+    ],
+    2027: [
+        (1, 1), (1, 11), (2, 11), (2, 23), (3, 21), (3, 22), (4, 29), (5, 3), (5, 4), (5, 5),
+        (7, 19), (8, 11), (9, 20), (9, 23), (10, 11), (11, 3), (11, 23),
+    ],
+}
+
+
+@pytest.mark.parametrize("year", sorted(HOLIDAYS))
+def test_national_holidays(year):
+    assert japanese_holidays(year) == {date(year, month, day) for month, day in HOLIDAYS[year]}
+
+
+def test_year_end_closure():
+    assert is_exchange_holiday(date(2025, 12, 31), japanese_holidays(2025))
+    assert is_exchange_holiday(date(2026, 1, 2), japanese_holidays(2026))
+    assert not is_exchange_holiday(date(2026, 1, 5), japanese_holidays(2026))
+
+
+def test_sessions_and_next_open():
+    calendar = TSECalendar(2025, 2027)
+
+    assert calendar.status(datetime(2026, 9, 18, 10, 0, tzinfo=JST)) == (True, "Morning_Session")
+    assert calendar.status(datetime(2026, 9, 18, 12, 0, tzinfo=JST)) == (False, "Lunch_Break")
+    assert calendar.status(datetime(2026, 9, 18, 15, 30, 30, tzinfo=JST)) == (True, "Afternoon_Session")
+    assert calendar.status(datetime(2026, 9, 22, 10, 0, tzinfo=JST)) == (False, "Holiday")
+
+    # Silver Week 2026: Sep 19-23 closed
+    assert calendar.next_open(datetime(2026, 9, 18, 16, 0, tzinfo=JST)) == datetime(2026, 9, 24, 9, 0, tzinfo=JST)
+
+
+def test_closing_scan_is_the_grace_period_after_the_last_close():
+    calendar = TSECalendar(2025, 2027)
+
+    assert calendar.closing(datetime(2026, 9, 18, 15, 30, 20, tzinfo=JST))
+    assert not calendar.closing(datetime(2026, 9, 18, 15, 29, 0, tzinfo=JST))
+    assert not calendar.closing(datetime(2026, 9, 18, 11, 30, 20, tzinfo=JST))
+    assert not calendar.closing(datetime(2026, 9, 19, 15, 30, 20, tzinfo=JST))
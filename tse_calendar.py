@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+Tokyo Stock Exchange trading calendar (JST).
+
+Session open/close instants are precomputed per trading day, together
+with the next trading day for every calendar date, so "open now?" and
+"next open" are dict lookups instead of string comparisons of local time.
+
+Closed: weekends, Japanese national holidays (computed from the Act on
+National Holidays rules, equinoxes included, with substitute and citizens'
+holidays) and the year-end closure from Dec 31 to Jan 3. Ad-hoc closures
+and shortened days are configured in EXTRA_CLOSURES and HALF_DAYS.
+"""
+
+from datetime import date, datetime, time as dt_time, timedelta
+
+import clock
+from clock import JST
+
+# ================= CONFIGURATION =================
+SESSIONS = [
+    ("Morning_Session", dt_time(9, 0), dt_time(11, 30)),
+    ("Afternoon_Session", dt_time(12, 30), dt_time(15, 30)),
+]
+CLOSE_GRACE_SECONDS = 60  # Scans this soon after a close still count as open (last bar of the session)
+EXTRA_CLOSURES = set()    # Additional non-trading dates, e.g. {date(2020, 10, 1)}
+HALF_DAYS = {}            # Shortened days: date -> closing time, e.g. {date(2030, 12, 30): dt_time(11, 30)}
+# =================================================
+
+
+def nth_monday(year, month, n):
+    """Date of the n-th Monday of a month."""
+    first = date(year, month, 1)
+    return first + timedelta(days=(7 - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def equinox_day(year, base):
+    """Day of month of the vernal (base 20.8431) or autumnal (base 23.2488) equinox, 1980-2099."""
+    return int(base + 0.242194 * (year - 1980) - (year - 1980) // 4)
+
+
+def japanese_holidays(year):
+    """
+    National holidays of one year (rules in force since 2020).
+    Returns: set of dates, substitute and citizens' holidays included
+    """
+    fixed = [(1, 1), (2, 11), (2, 23), (4, 29), (5, 3), (5, 4), (5, 5), (8, 11), (11, 3), (11, 23)]
+    holidays = {date(year, month, day) for month, day in fixed}
+    holidays |= {
+        nth_monday(year, 1, 2),   # Coming of Age Day
+        nth_monday(year, 7, 3),   # Marine Day
+        nth_monday(year, 9, 3),   # Respect for the Aged Day
+        nth_monday(year, 10, 2),  # Sports Day
+        date(year, 3, equinox_day(year, 20.8431)),
+        date(year, 9, equinox_day(year, 23.2488)),
+    }
+
+    # Citizens' holiday: a weekday sandwiched between two holidays
+    for day in sorted(holidays):
+        between = day + timedelta(days=1)
+        if between not in holidays and between + timedelta(days=1) in holidays and between.weekday() != 6:
+            holidays.add(between)
+
+    # Substitute holiday: a holiday on Sunday moves to the next non-holiday
+    for day in sorted(holidays):
+        if day.weekday() == 6:
+            substitute = day + timedelta(days=1)
+            while substitute in holidays:
+                substitute += timedelta(days=1)
+            holidays.add(substitute)
+
+    return holidays
+
+
+def is_exchange_holiday(day, holidays):
+    """True if the TSE is closed on `day` (weekend, holiday or year-end closure)."""
+    if day.weekday() >= 5 or day in holidays or day in EXTRA_CLOSURES:
+        return True
+    return (day.month == 12 and day.day == 31) or (day.month == 1 and day.day <= 3)
+
+
+class TSECalendar:
+    """
+    Precomputed TSE sessions for a range of years, extended on demand.
+    """
+
+    def __init__(self, first_year=None, last_year=None):
+        this_year = clock.now().year
+        self.first_year = None
+        self.last_year = None
+        self.build(first_year or this_year - 1, last_year or this_year + 1)
+
+    def build(self, first_year, last_year):
+        """
+        Precompute sessions for every trading day of [first_year, last_year]
+        and the next trading day for every calendar date in that range.
+        """
+        holidays = set()
+        for year in range(first_year, last_year + 2):
+            holidays |= japanese_holidays(year)
+
+        self.sessions = {}
+        day, end = date(first_year, 1, 1), date(last_year + 1, 12, 31)
+        while day <= end:
+            if not is_exchange_holiday(day, holidays):
+                self.sessions[day] = self.day_sessions(day)
+            day += timedelta(days=1)
+
+        # Walk backwards so each date points at the first trading day after it
+        self.next_trading = {}
+        following = None
+        day = end
+        while day >= date(first_year, 1, 1):
+            if day.year <= last_year:
+                self.next_trading[day] = following
+            if day in self.sessions:
+                following = day
+            day -= timedelta(days=1)
+
+        self.first_year, self.last_year = first_year, last_year
+
+    def day_sessions(self, day):
+        """(name, open, close) JST datetimes of one trading day, shortened on half days."""
+        close_at = HALF_DAYS.get(day)
+        sessions = []
+        for name, start, stop in SESSIONS:
+            if close_at is not None:
+                if start >= close_at:
+                    break
+                stop = min(stop, close_at)
+            sessions.append((name, datetime.combine(day, start, JST), datetime.combine(day, stop, JST)))
+        return tuple(sessions)
+
+    def ensure(self, day):
+        """Extend the precomputed range to cover `day`."""
+        if not self.first_year <= day.year <= self.last_year:
+            self.build(min(self.first_year, day.year), max(self.last_year, day.year))
+
+    def status(self, now=None):
+        """
+        Check if the exchange is open at `now` (default: current time).
+        Returns: (bool: is_open, str: status_message)
+        """
+        now = to_jst(now)
+        day = now.date()
+        self.ensure(day)
+
+        sessions = self.sessions.get(day)
+        if sessions is None:
+            return False, "Weekend" if day.weekday() >= 5 else "Holiday"
+
+        grace = timedelta(seconds=CLOSE_GRACE_SECONDS)
+        for name, opens, closes in sessions:
+            if opens <= now <= closes + grace:
+                return True, name
+        if now < sessions[0][1]:
+            return False, "Pre_Open"
+        if now < sessions[-1][1]:
+            return False, "Lunch_Break"
+        return False, "Market_Closed"
+
+    def closing(self, now=None):
+        """True during the grace period after the day's final close (the last scan of the day)."""
+        now = to_jst(now)
+        day = now.date()
+        self.ensure(day)
+
+        sessions = self.sessions.get(day)
+        if sessions is None:
+            return False
+        closes = sessions[-1][2]
+        return closes < now <= closes + timedelta(seconds=CLOSE_GRACE_SECONDS)
+
+    def next_open(self, now=None):
+        """
+        Start of the next session after `now` (the current session's start if already open).
+        Returns: timezone-aware JST datetime
+        """
+        now = to_jst(now)
+        day = now.date()
+        self.ensure(day)
+
+        for _, opens, closes in self.sessions.get(day, ()):
+            if now < opens or now <= closes:
+                return opens
+
+        following = self.next_trading[day]
+        if following is None:
+            self.build(self.first_year, self.last_year + 1)
+            following = self.next_trading[day]
+        return self.sessions[following][0][1]
+
+
+def to_jst(now):
+    """Current time on the active clock, or `now` (naive = system local time), as a JST datetime."""
+    if now is None:
+        return clock.now()
+    return now.astimezone(JST)
+
+
+# Shared by every watcher and the daemon
+tse = TSECalendar()
+
+
+def is_market_open(now=None):
+    """
+    Check if Tokyo Stock Exchange is currently open.
+    Returns: (bool: is_open, str: status_message)
+    """
+    return tse.status(now)
+
+
+def sleep_until_open():
+    """
+    Block until the next session opens.
+    Returns: the opening time (JST)
+    """
+    opens = tse.next_open()
+    clock.sleep((opens - clock.now()).total_seconds())
+    return opens
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Shared Tokyo Stock Exchange watchlists.
+
+Every strategy imports its list from here so the unified daemon fetches
+each ticker once, no matter how many strategies watch it.
+
+The full listed universe is not hard-coded: load_universe() reads it from
+a local symbol file (e.g. exported from the JPX listed-issues sheet).
+"""
+
+import os
+
+# Default symbol file for full-universe screens, one code per line
+TSE_UNIVERSE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tse_universe.txt")
+
+# 40 large-cap TSE names scanned on daily bars
+TSE_WATCH_LIST = [
+    "6723.T", "9432.T", "7011.T", "7203.T", "8058.T", "8306.T", "9501.T", "285A.T",
+    "6758.T", "9434.T", "2760.T", "9984.T", "8035.T", "9503.T", "4324.T", "9433.T",
+    "7272.T", "6367.T", "6146.T", "6269.T", "6501.T", "8316.T", "5706.T", "5016.T",
+    "7974.T", "7013.T", "4063.T", "4502.T", "6762.T", "6361.T", "6503.T", "8053.T",
+    "7267.T", "6981.T", "6702.T", "8002.T", "4568.T", "9502.T", "1911.T", "5802.T"
+]
+
+# 13 names watched intraday (15-minute bars) by the MACD breakout watcher
+TSE_INTRADAY_LIST = TSE_WATCH_LIST[:13]
+
+
+def load_universe(path=TSE_UNIVERSE_FILE):
+    """
+    Read a symbol file into a list of yfinance tickers.
+
+    One code per line; the first comma-separated field is used, so a CSV
+    whose first column holds the code also works. Blank lines, "#" comments
+    and non-code header rows are skipped, bare codes ("7203", "285A") get
+    the ".T" suffix, and duplicates are dropped in file order.
+    """
+    tickers = []
+    seen = set()
+    with open(path, encoding="utf-8-sig") as f:
+        for line in f:
+            code = line.split("#", 1)[0].split(",", 1)[0].strip().strip('"').upper()
+            if not code:
+                continue
+            if "." not in code:
+                if len(code) != 4 or not code[0].isdigit():
+                    continue  # Header row or non-TSE code
+                code += ".T"
+            if code not in seen:
+                seen.add(code)
+                tickers.append(code)
+    return tickers